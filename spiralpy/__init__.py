@@ -23,17 +23,27 @@ SpiralPy, implemented as a Python package, uses the SPIRAL code generation syste
 NumPy-based specifications to generated code, then compiles that code into a loadable library.
 
 Modules:
+ -  allocator:          Aligned and huge page backed arrays for solver buffers
  -  batchmddftsolver:   Batch, multi-dimensional DFT solver
+ -  bufferpool:         Pool of reused output arrays for repeated solves
+ -  buildcache:         Content-addressed cache of generated code and compiled libraries
+ -  buildscheduler:     Parallel pre-build of libraries for lists of problems
+ -  bundle:             Generate several transforms into one shared library
  -  dftsolver:          One Dimension DFT solver
  -  hockneysolver:      Hockney problem solver
+ -  libcache:           Usage tracking and size-bounded pruning of library directories
+ -  locking:            File locks and atomic install coordinating builds between processes
+ -  manifest:           Build the libraries of transforms listed in a JSON manifest
  -  mddftsolver:        Multi-dimensional DFT solver
  -  mdprdftsolver:      Multi-dimensional packed real DFT (MDPRDFT) solver
  -  mdrconvsolver:      Three-dimensional Real Cyclic Convolution
  -  mdrfsconvsolver:    Three-dimensional Free Space Convolution
  -  metadata:           Extract metadata from binary file (i.e., library)
  -  spiral:             Handle interface to SPIRAL code generator
+ -  splitsource:        Split generated C sources into parallel-compiled translation units
  -  spsolver:           Base classes for SpiralPy
  -  stepphasesolver:    StepPhase problem solver
+ -  toolchain:          Locate and probe the tools used to build generated code
 
 """
 
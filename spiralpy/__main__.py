@@ -0,0 +1,112 @@
+# spiralpy/__main__.py
+#
+# Copyright 2018-2023, Carnegie Mellon University
+# All rights reserved.
+#
+# See LICENSE (https://github.com/spiral-software/python-package-spiralpy/blob/main/LICENSE)
+
+"""
+Command line interface of SpiralPy.
+
+usage: python -m spiralpy build [-h] [--libdir DIR] [-j N] [--timeout SECONDS] manifest.json
+       python -m spiralpy cache [-h] [--libdir DIR] {list,prune} [--max-size SIZE] [--max-count N] [--dry-run]
+"""
+
+from .constants import *
+from spiralpy.libcache import *
+from spiralpy.manifest import buildManifest
+
+import argparse
+import datetime
+import os
+import site
+import sys
+import time
+
+
+def _build(args):
+    start = time.monotonic()
+    try:
+        reports = buildManifest(args.manifest, args.libdir, args.jobs, args.timeout)
+    except (OSError, ValueError, RuntimeError, TypeError) as ex:
+        print('Error: ' + str(ex), file=sys.stderr)
+        return 2
+
+    counts = dict()
+    for (index, rep) in enumerate(reports):
+        status = rep[SP_KEY_STATUS]
+        counts[status] = counts.get(status, 0) + 1
+        print(f'{status:8} {rep[SP_KEY_ELAPSED]:8.2f}s  {index:4}  {rep[SP_KEY_NAMEBASE]}', flush = True)
+        if SP_KEY_ERROR in rep:
+            print(rep[SP_KEY_ERROR], file=sys.stderr)
+    summary = ', '.join([str(n) + ' ' + status for (status, n) in sorted(counts.items())])
+    print(f'{len(reports)} transforms ({summary}) in {time.monotonic() - start:.2f}s', flush = True)
+
+    failed = [rep for rep in reports if not rep[SP_KEY_STATUS] in (SP_BUILD_OK, SP_BUILD_PRESENT)]
+    return 1 if len(failed) > 0 else 0
+
+
+def _printLibraries(libs):
+    for lib in libs:
+        used = datetime.datetime.fromtimestamp(lib[SP_KEY_LASTUSED]).strftime('%Y-%m-%d %H:%M')
+        print(f'{formatSize(lib[SP_KEY_SIZE]):>8} {lib[SP_KEY_HITS]:6}  {used}  {lib[SP_KEY_FILENAME]}', flush = True)
+
+
+def _cache(args):
+    libdir = args.libdir
+    if libdir == None:
+        libdir = os.path.join(site.USER_BASE, SP_SHARE_DIR, __package__, SP_LIBSDIR)
+    try:
+        if args.action == 'list':
+            libs = libraryUsage(libdir)
+            print(f'{"size":>8} {"loads":>6}  {"last used":16}  library')
+            _printLibraries(libs)
+            total = sum([lib[SP_KEY_SIZE] for lib in libs])
+            print(f'{len(libs)} libraries, {formatSize(total)} in {libdir}', flush = True)
+            return 0
+
+        (maxSize, maxCount) = libsBudget()
+        if args.max_size != None:
+            maxSize = parseSize(args.max_size)
+        if args.max_count != None:
+            maxCount = args.max_count
+        if (maxSize == None) and (maxCount == None):
+            print('Error: no budget, give --max-size or --max-count, or define ' + SP_LIBS_MAXSIZE
+                  + ' or ' + SP_LIBS_MAXCOUNT, file=sys.stderr)
+            return 2
+        removed = pruneLibraries(libdir, maxSize, maxCount, dryRun=args.dry_run)
+    except (OSError, RuntimeError) as ex:
+        print('Error: ' + str(ex), file=sys.stderr)
+        return 2
+    _printLibraries(removed)
+    verb = 'would remove' if args.dry_run else 'removed'
+    print(f'{verb} {len(removed)} libraries, {formatSize(sum([lib[SP_KEY_SIZE] for lib in removed]))}', flush = True)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m spiralpy', description='SpiralPy library tools')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    build = commands.add_parser('build', help='build the libraries of the transforms in a manifest')
+    build.add_argument('manifest', help='JSON manifest listing the transforms')
+    build.add_argument('--libdir', metavar='DIR', help='install directory (default: the spiralpy .libs directory)')
+    build.add_argument('-j', '--jobs', type=int, metavar='N', help='concurrent builds (default: number of CPUs)')
+    build.add_argument('--timeout', type=float, metavar='SECONDS', help='stop builds taking longer')
+    build.set_defaults(func=_build)
+
+    cache = commands.add_parser('cache', help='report on or prune the installed libraries')
+    cache.add_argument('action', choices=['list', 'prune'], help='list libraries, least recently used first, or remove them down to a budget')
+    cache.add_argument('--libdir', metavar='DIR', help='library directory (default: the spiralpy .libs directory)')
+    cache.add_argument('--max-size', metavar='SIZE', help='prune to a total size, e.g. 2G (default: ' + SP_LIBS_MAXSIZE + ')')
+    cache.add_argument('--max-count', type=int, metavar='N', help='prune to a number of libraries (default: ' + SP_LIBS_MAXCOUNT + ')')
+    cache.add_argument('--dry-run', action='store_true', help='only list the libraries prune would remove')
+    cache.set_defaults(func=_cache)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
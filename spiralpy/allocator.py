@@ -0,0 +1,140 @@
+# spiralpy/allocator.py
+#
+# Copyright 2018-2023, Carnegie Mellon University
+# All rights reserved.
+#
+# See LICENSE (https://github.com/spiral-software/python-package-spiralpy/blob/main/LICENSE)
+
+"""
+SpiralPy Allocator Module
+==========================
+
+Allocate the arrays solvers pass to generated code with a guaranteed alignment, and back
+large ones with huge pages.
+
+NumPy only guarantees the alignment of its element types, and large arrays may be mapped
+with small pages, so kernels on multi-GB cubes lose time to TLB misses.  The allocator
+over-allocates a byte buffer and returns an array starting at the requested alignment
+(64 bytes, a cache line, by default).  With hugePages, on Linux, arrays of at least
+SP_HUGEPAGE_SIZE bytes are mapped anonymously, aligned to a huge page and advised with
+MADV_HUGEPAGE, so the kernel backs them with transparent huge pages when it is enabled.  Memory is zero when
+allocated; first-touch initialization writes it at allocation, faulting the pages in there
+rather than in the first call of a kernel.  CuPy arrays are allocated by CuPy, whose device
+allocations are already aligned.
+"""
+
+from .constants import *
+
+import mmap
+import numpy as np
+import sys
+import threading
+
+
+def arrayAlignment(a):
+    """Largest power of two the address of NumPy or CuPy array a is a multiple of."""
+    ptr = a.ctypes.data if isinstance(a, np.ndarray) else a.data.ptr
+    return ptr & -ptr if ptr != 0 else 0
+
+
+def _hugePageBuffer(nbytes):
+    """Zeroed byte array of nbytes at a huge page boundary, None if huge pages are not available."""
+    if (sys.platform != 'linux') or not hasattr(mmap, 'MADV_HUGEPAGE'):
+        return None
+    mm = mmap.mmap(-1, nbytes + SP_HUGEPAGE_SIZE)
+    try:
+        mm.madvise(mmap.MADV_HUGEPAGE)
+    except OSError:
+        # kernel without transparent huge pages
+        mm.close()
+        return None
+    # the array keeps the mapping alive
+    raw = np.frombuffer(mm, np.uint8)
+    offset = (-raw.ctypes.data) % SP_HUGEPAGE_SIZE
+    return raw[offset:offset + nbytes]
+
+
+def alignedZeros(shape, dtype, order='C', alignment=SP_DEFAULT_ALIGNMENT, hugePages=False, firstTouch=False):
+    """NumPy array of zeros whose data starts at a multiple of alignment bytes.
+
+    Arguments:
+    alignment   -- alignment in bytes, a power of two
+    hugePages   -- advise arrays of at least SP_HUGEPAGE_SIZE bytes to use huge pages (Linux)
+    firstTouch  -- write the array at allocation, so its pages are mapped before first use
+    """
+    return _alignedZeros(shape, dtype, order, alignment, hugePages, firstTouch)[0]
+
+
+def _alignedZeros(shape, dtype, order, alignment, hugePages, firstTouch):
+    """Return (array, True if advised to use huge pages), see alignedZeros."""
+    if (alignment < 1) or (alignment & (alignment - 1)) != 0:
+        raise RuntimeError('alignment must be a power of two')
+    shape = tuple(shape)
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    buf = None
+    if hugePages and (nbytes >= SP_HUGEPAGE_SIZE) and (SP_HUGEPAGE_SIZE % alignment == 0):
+        buf = _hugePageBuffer(nbytes)
+    advised = buf is not None
+    if buf is None:
+        # calloc'ed, so pages are only mapped when written
+        raw = np.zeros(nbytes + alignment, np.uint8)
+        offset = (-raw.ctypes.data) % alignment
+        buf = raw[offset:offset + nbytes]
+    arr = buf.view(dtype).reshape(shape, order=order)
+    if firstTouch:
+        arr.fill(0)
+    return (arr, advised)
+
+
+class SPAllocator:
+    """Allocator of the arrays of solvers and buffer pools, with alignment and huge page settings."""
+
+    def __init__(self, alignment=SP_DEFAULT_ALIGNMENT, hugePages=False, firstTouch=False):
+        """Allocator of arrays aligned to alignment bytes, see alignedZeros."""
+        if (alignment < 1) or (alignment & (alignment - 1)) != 0:
+            raise RuntimeError('alignment must be a power of two')
+        self._alignment = alignment
+        self._hugePages = hugePages
+        self._firstTouch = firstTouch
+        self._lock = threading.Lock()
+        self._arrays = 0
+        self._bytes = 0
+        self._hugePageBytes = 0
+        self._achieved = None
+
+    def __reduce__(self):
+        return (SPAllocator, (self._alignment, self._hugePages, self._firstTouch))
+
+    def zeros(self, xp, shape, dtype, order='C'):
+        """Array of zeros of array module xp (NumPy or CuPy)."""
+        if xp == np:
+            (arr, advised) = _alignedZeros(shape, dtype, order, self._alignment, self._hugePages, self._firstTouch)
+        else:
+            (arr, advised) = (xp.zeros(shape, dtype, order=order), False)
+        alignment = arrayAlignment(arr)
+        with self._lock:
+            self._arrays += 1
+            self._bytes += arr.nbytes
+            if advised:
+                self._hugePageBytes += arr.nbytes
+            if alignment != 0:
+                self._achieved = alignment if self._achieved == None else min(self._achieved, alignment)
+        return arr
+
+    def alignment(self):
+        """Alignment in bytes every array allocated so far has, at least the requested one."""
+        with self._lock:
+            return self._alignment if self._achieved == None else self._achieved
+
+    def stats(self):
+        """Allocation statistics.
+
+        A dict with the number of arrays allocated (Arrays), their total size in bytes (Bytes)
+        and the bytes advised to use huge pages (HugePageBytes), and the Alignment all arrays
+        achieved.
+        """
+        alignment = self.alignment()
+        with self._lock:
+            return {SP_KEY_ARRAYS:self._arrays, SP_KEY_BYTES:self._bytes,
+                    SP_KEY_HUGEPAGEBYTES:self._hugePageBytes, SP_KEY_ALIGNMENT:alignment}
@@ -62,9 +62,9 @@ class BatchMddftSolver(SPSolver):
         xp = get_array_module(src)
         
         if self._problem.direction() == SP_FORWARD:
-            out = xp.fft.fftn(src, axes=(1,2,3))
+            out = xp.fft.fftn(src, axes=(1,2,3), norm=self._norm)
         else:
-            out = xp.fft.ifftn(src, axes=(1,2,3))
+            out = xp.fft.ifftn(src, axes=(1,2,3), norm=self._norm)
         
         return out
     
@@ -100,23 +100,32 @@ class BatchMddftSolver(SPSolver):
     def solve(self, src, dst=None):
         """Call SPIRAL-generated function."""
     
-        if type(dst) == type(None):
+        if self._inPlace:
+            dst = self._inPlaceDst(src, dst)
+        elif type(dst) == type(None):
             xp = get_array_module(src)
             dims = self._problem.dimensions()
             b = self._problem.szBatch()
             dimsTuple = tuple([b]) + tuple(dims)
-            dst = xp.zeros(dimsTuple, src.dtype)
+            dst = self._empty(xp, dimsTuple, src.dtype)
         
         self._func(dst, src)
-        if self._problem.direction() == SP_INVERSE:
-            xp = get_array_module(dst)
-            scale = xp.size(dst) / self._problem.szBatch()
-            xp.divide(dst, scale, out=dst)
+        return self._normalize(dst)
+
+    def _supportsNorm(self):
+        return True
+
+    def _supportsInPlace(self):
+        return True
+
+    def _normalize(self, dst):
+        if (not self._fusedNorm) and self._problem.direction() == SP_INVERSE:
+            dst /= dst.size / self._problem.szBatch()
         return dst
 
     def _writeScript(self, script_file):
         nameroot = self._namebase
-        filename = nameroot
+        filename = self._sourcePath(script_file)
         filetype = '.c'
         if self._genCuda:
             filetype = '.cu'
@@ -132,7 +141,8 @@ class BatchMddftSolver(SPSolver):
         print('    ns := ' + str(self._problem.dimensions()) + ',', file = script_file)
         print('    k := ' + str(self._problem.direction()) + ',', file = script_file)
         print('    name := "' + nameroot + '",', file = script_file)
-        print('    TFCall(TRC(TTensorI(MDDFT(ns, k), batch, apat, apat)),', file = script_file)
+        xform = 'TRC(TTensorI(' + self._scaledSpec('MDDFT(ns, k)') + ', batch, apat, apat))'
+        print('    TFCall(' + self._inPlaceSpec(xform) + ',', file = script_file)
         print('        rec(fname := name, params := []))', file = script_file)
         print(');', file = script_file)
         print('', file = script_file)
@@ -153,6 +163,7 @@ class BatchMddftSolver(SPSolver):
             print("opts.printRuleTree := true;", file = script_file)
         print('', file = script_file)  
 
+        self._writeVariantOpts(script_file)
         print('tt := opts.tagIt(t);', file = script_file)
         print('c := opts.fftxGen(tt);', file = script_file)
         print('PrintTo("' + filename + filetype + '", opts.prettyPrint(c));', file = script_file)
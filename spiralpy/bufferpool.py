@@ -0,0 +1,184 @@
+# spiralpy/bufferpool.py
+#
+# Copyright 2018-2023, Carnegie Mellon University
+# All rights reserved.
+#
+# See LICENSE (https://github.com/spiral-software/python-package-spiralpy/blob/main/LICENSE)
+
+"""
+SpiralPy Buffer Pool Module
+============================
+
+Reuse the arrays solve() returns instead of allocating a zero-filled array on every call.
+
+A pool hands out uninitialized NumPy arrays made from pooled buffers through a lease object,
+which every view of the array references.  When the last of them is gone, a weak reference
+finalizer returns the buffer to the pool, which hands it out again for the next request of the
+same shape, type and order.  release() returns an array before that, and returns arrays of
+other array modules, e.g. CuPy, which are only pooled when released.  In a time-stepping loop
+that drops the result of the previous step before the next solve(), no memory is allocated
+after the first steps.  Solvers use a pool of their own with the SP_OPT_BUFFERPOOL option set
+to True, or share the SPBufferPool given as the option's value.
+"""
+
+from .constants import *
+from spiralpy.allocator import *
+
+import collections
+import numpy as np
+import threading
+import weakref
+
+
+class _Lease:
+    """Array interface of a pooled buffer, the base of the array handed out and its views."""
+
+    def __init__(self, buf, shape, dtype, order):
+        self.__array_interface__ = buf.view(dtype).reshape(shape, order=order).__array_interface__
+        self.buf = buf
+        self.finalizer = None
+
+
+def _leaseOf(arr):
+    """The lease arr or the array it is a view of was handed out with, None if none."""
+    base = getattr(arr, 'base', None)
+    while base is not None:
+        if isinstance(base, _Lease):
+            return base
+        base = getattr(base, 'base', None)
+    return None
+
+
+def _arrayKey(module, shape, dtype, order):
+    return (module, tuple(shape), np.dtype(dtype).str, order)
+
+
+class SPBufferPool:
+    """Pool of reusable arrays for the results of solvers."""
+
+    def __init__(self, maxBytes=None, allocator=None):
+        """Pool holding at most maxBytes bytes of arrays (default: unlimited).
+
+        Arrays that do not fit into the pool, after dropping free arrays, are allocated
+        without being pooled.  New arrays come from allocator, an SPAllocator, or from
+        numpy.zeros (cupy.zeros) without one.
+        """
+        self._maxBytes = maxBytes
+        self._allocator = allocator
+        self._free = dict()
+        # buffers of finalized leases, appended without the lock, as finalizers may run
+        # in any thread at any time
+        self._returned = collections.deque()
+        self._lock = threading.Lock()
+        self._leased = 0
+        self._bytes = 0
+        self._peakBytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def __reduce__(self):
+        # e.g. in the options of a solver built in another process, the arrays stay here
+        return (SPBufferPool, (self._maxBytes, self._allocator))
+
+    def empty(self, xp, shape, dtype, order='C'):
+        """Uninitialized array of array module xp (NumPy or CuPy), reused if one is free."""
+        shape = tuple(shape)
+        key = _arrayKey(xp.__name__, shape, dtype, order)
+        with self._lock:
+            self._collect()
+            free = self._free.get(key)
+            if free:
+                self._hits += 1
+                buf = free.pop()
+                if xp != np:
+                    self._bytes -= buf.nbytes
+                    return buf
+                return self._lease(key, buf, shape, dtype, order)
+            self._misses += 1
+            if xp != np:
+                return self._zeros(xp, shape, dtype, order)
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            if not self._reserve(nbytes):
+                return self._zeros(xp, shape, dtype, order)
+            buf = self._zeros(xp, (nbytes,), np.uint8)
+            return self._lease(key, buf, shape, dtype, order)
+
+    def release(self, arr):
+        """Return arr, which the caller and its views no longer use, to the pool.
+
+        NumPy arrays of the pool return when no reference to them or their views is left,
+        release() returns them at once.  Arrays of other array modules are pooled if they fit.
+        """
+        lease = _leaseOf(arr)
+        if lease != None:
+            lease.finalizer()
+            return
+        if isinstance(arr, np.ndarray):
+            return
+        order = 'F' if (arr.flags.f_contiguous and not arr.flags.c_contiguous) else 'C'
+        key = _arrayKey(type(arr).__module__.split('.')[0], arr.shape, arr.dtype, order)
+        with self._lock:
+            self._collect()
+            if self._reserve(arr.nbytes):
+                self._free.setdefault(key, []).append(arr)
+
+    def _zeros(self, xp, shape, dtype, order='C'):
+        """Array of zeros from the allocator, or of xp.zeros without one."""
+        if self._allocator == None:
+            return xp.zeros(shape, dtype, order=order)
+        return self._allocator.zeros(xp, shape, dtype, order)
+
+    def _lease(self, key, buf, shape, dtype, order):
+        """Hand out pooled buffer buf as an array, caller holds the lock."""
+        lease = _Lease(buf, shape, dtype, order)
+        lease.finalizer = weakref.finalize(lease, self._returned.append, (key, buf))
+        self._leased += 1
+        return np.asarray(lease)
+
+    def _collect(self):
+        """Move the buffers of finalized leases to the free arrays, caller holds the lock."""
+        while self._returned:
+            (key, buf) = self._returned.popleft()
+            self._leased -= 1
+            self._free.setdefault(key, []).append(buf)
+
+    def _reserve(self, nbytes):
+        """Account nbytes more in the pool, dropping free arrays to fit, caller holds the lock.
+
+        Return False if they do not fit.
+        """
+        if self._maxBytes != None and self._bytes + nbytes > self._maxBytes:
+            self._dropFree(self._bytes + nbytes - self._maxBytes)
+            if self._bytes + nbytes > self._maxBytes:
+                return False
+        self._bytes += nbytes
+        self._peakBytes = max(self._peakBytes, self._bytes)
+        return True
+
+    def _dropFree(self, nbytes):
+        """Drop free arrays until at least nbytes are released, caller holds the lock."""
+        for arrays in self._free.values():
+            while (nbytes > 0) and (len(arrays) > 0):
+                size = arrays.pop().nbytes
+                self._bytes -= size
+                nbytes -= size
+        self._free = {key:arrays for (key, arrays) in self._free.items() if len(arrays) > 0}
+
+    def clear(self):
+        """Drop all free arrays, arrays still in use stay in the pool."""
+        with self._lock:
+            self._collect()
+            self._dropFree(self._bytes)
+
+    def stats(self):
+        """Pool statistics.
+
+        A dict with the number of requests served by a free array (Hits) and by a new
+        array (Misses), the number of pooled arrays (Buffers), their size in bytes (Bytes)
+        and the largest size reached (PeakBytes).
+        """
+        with self._lock:
+            self._collect()
+            return {SP_KEY_HITS:self._hits, SP_KEY_MISSES:self._misses,
+                    SP_KEY_BUFFERS:self._leased + sum([len(arrays) for arrays in self._free.values()]),
+                    SP_KEY_BYTES:self._bytes, SP_KEY_PEAKBYTES:self._peakBytes}
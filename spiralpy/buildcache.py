@@ -0,0 +1,131 @@
+# spiralpy/buildcache.py
+#
+# Copyright 2018-2023, Carnegie Mellon University
+# All rights reserved.
+#
+# See LICENSE (https://github.com/spiral-software/python-package-spiralpy/blob/main/LICENSE)
+
+"""
+SpiralPy Build Cache Module
+============================
+
+Content-addressed cache of generated code and compiled libraries.  Entries are keyed on a
+hash of everything that determines a build (generated SPIRAL script, SPIRAL build info,
+compiler identity and build flags) and are shared by all processes, and all users, that
+point at the same cache directory.
+
+Failed builds are recorded under the same keys, with the error output, so constructing a
+solver whose build failed before fails fast instead of running SPIRAL and the compiler again.
+A changed toolchain changes the key, and with it builds are tried again.
+"""
+
+from .constants import *
+
+import hashlib
+import json
+import os
+import shutil
+import site
+import tempfile
+import threading
+
+
+_CACHED_EXTS = ('.g', '.c', '.cu', '.cpp', '.h', SP_SHLIB_EXT)
+
+
+def buildCacheDir():
+    """Root directory of the build cache, SP_CACHE_DIR or .cache next to .libs."""
+    cachedir = os.getenv(SP_CACHE_DIR)
+    if cachedir == None:
+        cachedir = os.path.join(site.USER_BASE, SP_SHARE_DIR, __package__, SP_CACHEDIR)
+    os.makedirs(cachedir, mode=0o777, exist_ok=True)
+    return cachedir
+
+
+def buildCacheKey(parts):
+    """Hash a list of strings into a cache key."""
+    h = hashlib.sha256()
+    for part in parts:
+        data = part.encode('utf-8')
+        # length prefix keeps ['ab', 'c'] and ['a', 'bc'] apart
+        h.update(str(len(data)).encode('ascii') + b':')
+        h.update(data)
+    return h.hexdigest()
+
+
+def _entryDir(key):
+    return os.path.join(buildCacheDir(), key[:2], key)
+
+
+def cacheLookup(key, libname):
+    """Return path of cached library libname for key, None on a miss."""
+    path = os.path.join(_entryDir(key), libname)
+    return path if os.path.exists(path) else None
+
+
+def cacheStore(key, builddir, libpath):
+    """Store generated sources of builddir and library libpath under key.
+
+    The entry is assembled in a temporary directory and renamed into place, so readers
+    never see a partial entry.  Returns the path of the cached library.
+    """
+    entry = _entryDir(key)
+    libname = os.path.basename(libpath)
+    if os.path.exists(os.path.join(entry, libname)):
+        return os.path.join(entry, libname)
+    parent = os.path.dirname(entry)
+    os.makedirs(parent, mode=0o777, exist_ok=True)
+    tmpdir = tempfile.mkdtemp(prefix='.' + key[:8] + '_', dir=parent)
+    try:
+        for name in os.listdir(builddir):
+            src = os.path.join(builddir, name)
+            if os.path.isfile(src) and name.endswith(_CACHED_EXTS):
+                shutil.copy2(src, tmpdir)
+        shutil.copy2(libpath, tmpdir)
+        # entries are never modified, other users only need to read them
+        os.chmod(tmpdir, 0o755)
+        os.rename(tmpdir, entry)
+    except OSError:
+        # another process stored the same entry first
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        if not os.path.exists(os.path.join(entry, libname)):
+            raise
+    return os.path.join(entry, libname)
+
+
+def _failureFile(key):
+    return os.path.join(buildCacheDir(), SP_FAILURES_DIR, key[:2], key + '.json')
+
+
+def failureLookup(key):
+    """Return the failure record stored under key, None if no build with key failed."""
+    try:
+        with open(_failureFile(key), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def failureStore(key, record):
+    """Record that the build with key failed, record is a dict describing the failure."""
+    path = _failureFile(key)
+    tmpfile = path + '.' + str(os.getpid()) + '_' + str(threading.get_ident()) + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o777, exist_ok=True)
+        with open(tmpfile, 'w') as f:
+            json.dump(record, f, sort_keys=True, indent=1)
+        os.replace(tmpfile, path)
+    except OSError:
+        # not recording only costs trying the build again
+        try:
+            os.remove(tmpfile)
+        except OSError:
+            pass
+
+
+def failureClear(key):
+    """Remove the failure record of key, e.g. after the build succeeded."""
+    try:
+        os.remove(_failureFile(key))
+    except OSError:
+        pass
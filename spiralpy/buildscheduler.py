@@ -0,0 +1,195 @@
+# spiralpy/buildscheduler.py
+#
+# Copyright 2018-2023, Carnegie Mellon University
+# All rights reserved.
+#
+# See LICENSE (https://github.com/spiral-software/python-package-spiralpy/blob/main/LICENSE)
+
+"""
+SpiralPy Build Scheduler Module
+================================
+
+Pre-build the libraries for a list of problems in parallel.  Each job constructs its solver
+in a separate Python process, so SPIRAL code generation and compilation of different
+transforms run concurrently.
+"""
+
+from .constants import *
+from spiralpy.batchmddftsolver import *
+from spiralpy.dftsolver import *
+from spiralpy.hockneysolver import *
+from spiralpy.mddftsolver import *
+from spiralpy.mdprdftsolver import *
+from spiralpy.mdrconvsolver import *
+from spiralpy.mdrfsconvsolver import *
+from spiralpy.stepphasesolver import *
+
+import heapq
+import json
+import os
+import pickle
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+
+_SOLVERS = [
+    (BatchMddftProblem, BatchMddftSolver),
+    (DftProblem,        DftSolver),
+    (HockneyProblem,    HockneySolver),
+    (MddftProblem,      MddftSolver),
+    (MdprdftProblem,    MdprdftSolver),
+    (MdrconvProblem,    MdrconvSolver),
+    (MdrfsconvProblem,  MdrfsconvSolver),
+    (StepPhaseProblem,  StepPhaseSolver),
+]
+
+_RESULT_TAG = '!!SPIRALPY_BUILD_RESULT!!'
+
+
+def solverClassForProblem(problem):
+    """Return the solver class that handles problem."""
+    for (problemClass, solverClass) in _SOLVERS:
+        if type(problem) is problemClass:
+            return solverClass
+    msg = 'no solver for problem type ' + type(problem).__name__
+    raise TypeError(msg)
+
+
+def _jobKey(problem, opts):
+    """Key identifying jobs that produce the same library: its directory and namebase.
+
+    The namebase includes the variant suffix, so options that do not change the library,
+    or defaults given explicitly, do not make a job distinct.
+    """
+    solver = solverClassForProblem(problem)(problem, dict(opts, **{SP_OPT_NOBUILD:True}))
+    return (solver._libsDir, solver._namebase)
+
+
+def _runJobFromStdin():
+    """Entry point of a build process, (problem, opts) is pickled on stdin."""
+    (problem, opts) = pickle.load(sys.stdin.buffer)
+    solver = solverClassForProblem(problem)(problem, opts)
+    report = solver.buildReport()
+    result = {SP_KEY_NAMEBASE:solver._namebase, SP_KEY_PHASES:report[SP_KEY_PHASES]}
+    if SP_KEY_SOURCE in report:
+        result[SP_KEY_SOURCE] = report[SP_KEY_SOURCE]
+    print(_RESULT_TAG + json.dumps(result), flush = True)
+
+
+class _BuildProcess:
+    """One running build job."""
+
+    def __init__(self, index, problem, opts, env):
+        self.index = index
+        self.out = tempfile.TemporaryFile()
+        self.err = tempfile.TemporaryFile()
+        cmd = [sys.executable, '-c', 'import spiralpy.buildscheduler; spiralpy.buildscheduler._runJobFromStdin()']
+        # own process group so a timeout also stops SPIRAL and the compiler
+        kwargs = dict()
+        if sys.platform == 'win32':
+            kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs['start_new_session'] = True
+        self.start = time.monotonic()
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=self.out, stderr=self.err,
+                                     env=env, **kwargs)
+        self.proc.stdin.write(pickle.dumps((problem, opts)))
+        self.proc.stdin.close()
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def kill(self):
+        try:
+            if sys.platform == 'win32':
+                self.proc.kill()
+            else:
+                os.killpg(self.proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self.proc.wait()
+
+    def report(self, status):
+        self.out.seek(0)
+        self.err.seek(0)
+        outstr = self.out.read().decode(errors='replace')
+        errstr = self.err.read().decode(errors='replace')
+        self.out.close()
+        self.err.close()
+        report = {SP_KEY_STATUS:status, SP_KEY_ELAPSED:self.elapsed(), SP_KEY_NAMEBASE:None}
+        for line in outstr.splitlines():
+            if line.startswith(_RESULT_TAG):
+                report.update(json.loads(line[len(_RESULT_TAG):]))
+        if status != SP_BUILD_OK:
+            report[SP_KEY_ERROR] = errstr.strip()
+        return report
+
+
+def buildProblems(jobs, maxWorkers=None, timeout=None, verbose=False):
+    """Build the libraries for a list of problems in parallel.
+
+    Arguments:
+    jobs        -- list of (problem, opts) or (problem, opts, priority) tuples, jobs with
+                   higher priority start first (default priority 0)
+    maxWorkers  -- maximum number of concurrent builds (default: number of CPUs)
+    timeout     -- seconds after which a job is stopped (default: no limit)
+    verbose     -- print each job's status as it finishes
+
+    Jobs producing the same library are only built once.  Returns a list of dicts, one per
+    job in input order, with the job's SP_KEY_STATUS (SP_BUILD_OK, SP_BUILD_FAILED or
+    SP_BUILD_TIMEOUT), SP_KEY_ELAPSED time in seconds, SP_KEY_NAMEBASE and, on failure,
+    SP_KEY_ERROR.  Successful jobs add SP_KEY_SOURCE and SP_KEY_PHASES of the solver's
+    buildReport().  Duplicate jobs share the report of the first job and add SP_KEY_DUPLICATEOF.
+    """
+    if maxWorkers == None:
+        maxWorkers = os.cpu_count() or 1
+    maxWorkers = max(1, maxWorkers)
+
+    # validate all jobs before starting any
+    queue = []
+    primary = dict()
+    duplicates = dict()
+    for (index, job) in enumerate(jobs):
+        problem = job[0]
+        opts = dict(job[1]) if len(job) > 1 else dict()
+        priority = job[2] if len(job) > 2 else 0
+        key = _jobKey(problem, opts)
+        if key in primary:
+            duplicates[index] = primary[key]
+            continue
+        primary[key] = index
+        heapq.heappush(queue, (-priority, index, problem, opts))
+
+    # children must import the same spiralpy as this process
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([p for p in sys.path if p])
+
+    reports = dict()
+    running = []
+    while queue or running:
+        while queue and len(running) < maxWorkers:
+            (negprio, index, problem, opts) = heapq.heappop(queue)
+            running.append(_BuildProcess(index, problem, opts, env))
+        time.sleep(0.05)
+        for bp in list(running):
+            ret = bp.proc.poll()
+            if ret == None:
+                if (timeout == None) or (bp.elapsed() < timeout):
+                    continue
+                bp.kill()
+                status = SP_BUILD_TIMEOUT
+            else:
+                status = SP_BUILD_OK if ret == 0 else SP_BUILD_FAILED
+            running.remove(bp)
+            reports[bp.index] = bp.report(status)
+            if verbose:
+                rep = reports[bp.index]
+                print(f'{rep[SP_KEY_STATUS]:8} {rep[SP_KEY_ELAPSED]:8.2f}s  job {bp.index}  {rep[SP_KEY_NAMEBASE]}', flush = True)
+
+    for (index, orig) in duplicates.items():
+        reports[index] = dict(reports[orig])
+        reports[index][SP_KEY_DUPLICATEOF] = orig
+    return [reports[i] for i in range(len(jobs))]
@@ -0,0 +1,56 @@
+# spiralpy/bundle.py
+#
+# Copyright 2018-2023, Carnegie Mellon University
+# All rights reserved.
+#
+# See LICENSE (https://github.com/spiral-software/python-package-spiralpy/blob/main/LICENSE)
+
+"""
+SpiralPy Bundle Module
+=======================
+
+Generate several transforms into one shared library.  The library carries merged metadata
+listing every transform, so solvers constructed later find their functions in the bundle
+through findFunctionsWithMetadata.
+"""
+
+from .constants import *
+from spiralpy.buildscheduler import solverClassForProblem
+
+
+def buildBundle(jobs, bundlename):
+    """Generate and compile the transforms of several problems into one library.
+
+    Arguments:
+    jobs        -- list of (problem, opts) pairs, all for the same platform
+    bundlename  -- root name of the library, installed as lib<bundlename> in .libs
+
+    Returns the full path of the installed library.
+    """
+    solvers = []
+    namebases = set()
+    for job in jobs:
+        problem = job[0]
+        opts = dict(job[1]) if len(job) > 1 else dict()
+        opts[SP_OPT_NOBUILD] = True
+        solver = solverClassForProblem(problem)(problem, opts)
+        if solver._namebase in namebases:
+            continue
+        if solver._functionMetadata().get(SP_KEY_TRANSFORMTYPE) == SP_TRANSFORM_UNKNOWN:
+            msg = type(solver).__name__ + ' has no metadata and cannot be bundled'
+            raise RuntimeError(msg)
+        namebases.add(solver._namebase)
+        solvers.append(solver)
+
+    if len(solvers) == 0:
+        raise RuntimeError('no transforms to bundle')
+    lead = solvers[0]
+    for solver in solvers:
+        if (solver._genCuda, solver._genHIP, solver._withMPI) != (lead._genCuda, lead._genHIP, lead._withMPI):
+            raise RuntimeError('bundled transforms must share platform and MPI options')
+        if solver._variantSuffix() != lead._variantSuffix():
+            raise RuntimeError('bundled transforms must share vector ISA, thread count and optimization profile')
+
+    # bundles are installed in .libs, where metadata search finds them
+    lead._useBuildCache = False
+    return lead._buildWithLock(bundlename, solvers)
@@ -9,25 +9,99 @@ import sys
 
 # internal names
 
-SP_LIBSDIR      = '.libs'
-SP_SHARE_DIR    = 'share'
+SP_CACHEDIR             = '.cache'
+SP_FAILURES_DIR         = '.failures'
+SP_LIBSDIR              = '.libs'
+SP_LOCKFILE_EXT         = '.lock'
+SP_METAINDEX_FILE       = '.spiralpy_index.json'
+SP_METAINDEX_VERSION    = 1
+SP_SHARE_DIR            = 'share'
+SP_TOOLCHAIN_FILE       = '.toolchain.json'
+SP_TOOLCHAIN_VERSION    = 1
+SP_USAGE_FILE           = '.usage.json'
+SP_USAGE_LOG            = '.usage.log'
+SP_USAGE_LOG_MAXSIZE    = 1 << 20
+SP_USAGE_VERSION        = 1
 
 # environment varibles
 
+SP_BUILDBACKEND  = 'SP_BUILDBACKEND'
+SP_BUILDJOBS     = 'SP_BUILDJOBS'
+SP_BUILDLOG      = 'SP_BUILDLOG'
+SP_CACHE_DIR     = 'SP_CACHE_DIR'
 SP_KEEPTEMP      = 'SP_KEEPTEMP'
 SP_LIBRARY_PATH  = 'SP_LIBRARY_PATH'
+SP_LIBS_MAXCOUNT = 'SP_LIBS_MAXCOUNT'
+SP_LIBS_MAXSIZE  = 'SP_LIBS_MAXSIZE'
 SP_PRINTRULETREE = 'SP_PRINTRULETREE'
+SP_RETRYFAILED   = 'SP_RETRYFAILED'
+SP_SPIRALPOOL    = 'SP_SPIRALPOOL'
 SP_WORKDIR       = 'SP_WORKDIR'
 
+# environment variables of the build tools, part of the key of failure records
+
+SP_FAILURE_ENV   = ['CC', 'CFLAGS', 'SPIRAL_HOME']
+
 # options
 
+SP_OPT_ALLOCATOR        = 'allocator'
+SP_OPT_ASYNCBUILD       = 'asyncbuild'
+SP_OPT_BUFFERPOOL       = 'bufferpool'
+SP_OPT_BUILDBACKEND     = 'buildbackend'
+SP_OPT_BUILDCACHE       = 'buildcache'
+SP_OPT_BUILDJOBS        = 'buildjobs'
+SP_OPT_CFLAGS           = 'cflags'
+SP_OPT_INPLACE          = 'inplace'
 SP_OPT_COLMAJOR         = 'colmajor'
 SP_OPT_KEEPTEMP         = 'keeptemp'
+SP_OPT_LIBDIR           = 'libdir'
 SP_OPT_METADATA         = 'metadata'
 SP_OPT_MPI              = 'mpi'
+SP_OPT_NOBUILD          = 'nobuild'
+SP_OPT_NORM             = 'norm'
+SP_OPT_OPTPROFILE       = 'optprofile'
 SP_OPT_PLATFORM         = 'platform'
 SP_OPT_PRINTRULETREE    = 'printruletree'
 SP_OPT_REALCTYPE        = 'realctype'
+SP_OPT_RETRYFAILED      = 'retryfailed'
+SP_OPT_SPLITSOURCES     = 'splitsources'
+SP_OPT_THREADS          = 'threads'
+SP_OPT_VECTORISA        = 'vectorisa'
+
+# build backends
+
+SP_BACKEND_CC       = 'cc'
+SP_BACKEND_CMAKE    = 'cmake'
+
+# optimization profiles
+
+SP_PROFILE_CUSTOM   = 'custom'
+SP_PROFILE_DEFAULT  = 'default'
+SP_PROFILE_FASTMATH = 'fastmath'
+SP_PROFILE_LTO      = 'lto'
+SP_PROFILE_NATIVE   = 'native'
+
+# normalization modes, as the norm argument of numpy.fft
+
+SP_NORM_BACKWARD    = 'backward'
+SP_NORM_FORWARD     = 'forward'
+SP_NORM_ORTHO       = 'ortho'
+
+# array allocation
+
+SP_DEFAULT_ALIGNMENT    = 64
+SP_HUGEPAGE_SIZE        = 2 << 20
+
+# vector instruction sets
+
+SP_ISA_AVX2     = 'avx2'
+SP_ISA_AVX512   = 'avx512'
+SP_ISA_SCALAR   = 'scalar'
+SP_ISA_SSE2     = 'sse2'
+
+# CPU feature required by code built for a host whose features are unknown
+
+SP_FEATURE_UNKNOWNHOST  = 'unknown-host'
 
 # transform direction, 'k'
 
@@ -40,6 +114,35 @@ SP_CPU  = 'CPU'
 SP_CUDA = 'CUDA'
 SP_HIP  = 'HIP'
 
+# build status
+
+SP_BUILD_FAILED     = 'Failed'
+SP_BUILD_OK         = 'OK'
+SP_BUILD_PRESENT    = 'Present'
+SP_BUILD_TIMEOUT    = 'Timeout'
+
+# build report: where the library came from, and the timed phases of building it
+
+SP_LIB_BUILT        = 'Built'
+SP_LIB_CACHED       = 'Cached'
+SP_LIB_INSTALLED    = 'Installed'
+
+SP_PHASE_CACHELOOKUP    = 'CacheLookup'
+SP_PHASE_CACHESTORE     = 'CacheStore'
+SP_PHASE_COMPILE        = 'Compile'
+SP_PHASE_CONFIGURE      = 'Configure'
+SP_PHASE_INIT           = 'Init'
+SP_PHASE_INSTALL        = 'Install'
+SP_PHASE_LOAD           = 'Load'
+SP_PHASE_LOCKWAIT       = 'LockWait'
+SP_PHASE_METADATA       = 'Metadata'
+SP_PHASE_PRUNE          = 'Prune'
+SP_PHASE_RESOLVE        = 'Resolve'
+SP_PHASE_SCRIPT         = 'Script'
+SP_PHASE_SPIRAL         = 'Spiral'
+SP_PHASE_SPLIT          = 'Split'
+SP_PHASE_TRACE          = 'Trace'
+
 # metadata
 
 SP_METADATA_START   = '!!START_METADATA!!'
@@ -69,26 +172,76 @@ SP_TRANSFORM_MDRFSCONV  = 'MDRFSCONV'
 SP_TRANSFORM_MDPRDFT    = 'MDPRDFT'
 SP_TRANSFORM_UNKNOWN    = 'UNKNOWN'
 
+SP_KEY_ALIGNMENT        = 'Alignment'
+SP_KEY_ARRAYS           = 'Arrays'
+SP_KEY_BACKEND          = 'Backend'
 SP_KEY_BATCHSIZE        = 'BatchSize'
+SP_KEY_BUFFERS          = 'Buffers'
+SP_KEY_BYTES            = 'Bytes'
+SP_KEY_CACHEHIT         = 'CacheHit'
+SP_KEY_CALL             = 'Call'
+SP_KEY_CACHEKEY         = 'CacheKey'
+SP_KEY_COMPILEFLAGS     = 'CompileFlags'
+SP_KEY_CPUFEATURES      = 'CPUFeatures'
 SP_KEY_DESTROY          = 'Destroy'
 SP_KEY_DIMENSIONS       = 'Dimensions'
 SP_KEY_DIRECTION        = 'Direction'
+SP_KEY_DUPLICATEOF      = 'DuplicateOf'
+SP_KEY_ELAPSED          = 'Elapsed'
+SP_KEY_ERROR            = 'Error'
 SP_KEY_EXEC             = 'Exec'
+SP_KEY_EXECUTE          = 'Execute'
 SP_KEY_FILENAME         = 'Filename'
+SP_KEY_FILES            = 'Files'
 SP_KEY_FUNCTIONS        = 'Functions'
+SP_KEY_HITS             = 'Hits'
+SP_KEY_HUGEPAGEBYTES    = 'HugePageBytes'
+SP_KEY_INFO             = 'Info'
 SP_KEY_INIT             = 'Init'
+SP_KEY_INPLACE          = 'InPlace'
+SP_KEY_KNOWNFAILURE     = 'KnownFailure'
+SP_KEY_LASTUSED         = 'LastUsed'
+SP_KEY_LIBRARIES        = 'Libraries'
+SP_KEY_LIBRARY          = 'Library'
 SP_KEY_METADATA         = 'Metadata'
+SP_KEY_MISSES           = 'Misses'
+SP_KEY_MTIME            = 'MTime'
+SP_KEY_NAMEBASE         = 'Namebase'
 SP_KEY_NAMES            = 'Names'
+SP_KEY_NORM             = 'Norm'
+SP_KEY_OPTPROFILE       = 'OptProfile'
 SP_KEY_ORDER            = 'Order'
+SP_KEY_OVERHEAD         = 'Overhead'
+SP_KEY_PHASE            = 'Phase'
+SP_KEY_PEAKBYTES        = 'PeakBytes'
+SP_KEY_PHASES           = 'Phases'
+SP_KEY_PID              = 'Pid'
 SP_KEY_PLATFORM         = 'Platform'
 SP_KEY_PRECISION        = 'Precision'
 SP_KEY_READSTRIDE       = 'ReadStride'
+SP_KEY_SIZE             = 'Size'
+SP_KEY_SOURCE           = 'Source'
 SP_KEY_SPIRALBUILDINFO  = 'SpiralBuildInfo'
+SP_KEY_STATUS           = 'Status'
+SP_KEY_THREADS          = 'Threads'
+SP_KEY_TIMESTAMP        = 'Timestamp'
+SP_KEY_TOOLS            = 'Tools'
 SP_KEY_TRANSFORMS       = 'Transforms'
 SP_KEY_TRANSFORMTYPE    = 'TransformType'
 SP_KEY_TRANSFORMTYPES   = 'TransformTypes'
+SP_KEY_VECTORISA        = 'VectorISA'
+SP_KEY_VERSION          = 'Version'
 SP_KEY_WRITESTRIDE      = 'WriteStride'
 
+# value of keys missing from the metadata of libraries built before the key was introduced
+SP_METADATA_DEFAULTS = {
+    SP_KEY_INPLACE:     False,
+    SP_KEY_NORM:        SP_NORM_BACKWARD,
+    SP_KEY_OPTPROFILE:  SP_PROFILE_DEFAULT,
+    SP_KEY_THREADS:     1,
+    SP_KEY_VECTORISA:   SP_ISA_SCALAR,
+}
+
 if sys.platform == 'win32':
     SP_SHLIB_EXT = '.dll'
 elif sys.platform == 'darwin':
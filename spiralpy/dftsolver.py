@@ -70,9 +70,9 @@ class DftSolver(SPSolver):
         ax = -1 if self._problem._readStride == 1 else 0
         
         if self._problem.direction() == SP_FORWARD:
-            dst = xp.fft.fft(src, axis=ax)
+            dst = xp.fft.fft(src, axis=ax, norm=self._norm)
         else:
-            dst = xp.fft.ifft(src, axis=ax)
+            dst = xp.fft.ifft(src, axis=ax, norm=self._norm)
             
         if self._problem._writeStride != self._problem._readStride:
             if self._problem._writeStride != 1:
@@ -94,19 +94,28 @@ class DftSolver(SPSolver):
 
     def solve(self, src, dst=None):
         """Call SPIRAL-generated function."""
-        if type(dst) == type(None):
+        if self._inPlace:
+            dst = self._inPlaceDst(src, dst)
+        elif type(dst) == type(None):
             xp = get_array_module(src)
             if self._problem._writeStride == self._problem._readStride:
-                dst = xp.zeros_like(src)
+                dst = self._empty(xp, src.shape, src.dtype)
             else:
                 # reverse dims
                 dims = src.shape[::-1]
-                dst = xp.zeros(dims,src.dtype)
+                dst = self._empty(xp, dims, src.dtype)
         self._func(dst, src)
         return dst
 
+    def _supportsNorm(self):
+        return True
+
+    def _supportsInPlace(self):
+        # the result overwrites the input in the same layout
+        return self._problem._writeStride == self._problem._readStride
+
     def _writeScript(self, script_file):
-        filename = self._namebase
+        filename = self._sourcePath(script_file)
         nameroot = self._namebase
         filetype = '.c'
         if self._genCuda:
@@ -119,9 +128,7 @@ class DftSolver(SPSolver):
 
         print('', file = script_file)
         
-        dft_def = 'DFT(N, ' + str(self._problem.direction()) + ')'
-        if self._problem.direction() == SP_INVERSE:
-            dft_def = 'Scale(1/N, ' + dft_def + ')'
+        dft_def = self._scaledSpec('DFT(N, ' + str(self._problem.direction()) + ')')
         
         bdims = self._problem._batchDims
         #bdims_str = '[Ind({0}), Ind({1}), Ind(1)]'.format(bdims[0],bdims[1])
@@ -133,7 +140,8 @@ class DftSolver(SPSolver):
         print('t := let(', file = script_file) 
         print('    name := "' + nameroot + '",', file = script_file)
         print('    N  := ' + str(self._problem.dimN()) + ',', file = script_file)
-        print('    TFCall(TRC(TTensorI(' + dft_def + ', ' + bdims_str + ' ,' + W + ', ' + R +')), rec(fname := name, params := []))', file = script_file)
+        xform = 'TRC(TTensorI(' + dft_def + ', ' + bdims_str + ' ,' + W + ', ' + R +'))'
+        print('    TFCall(' + self._inPlaceSpec(xform) + ', rec(fname := name, params := []))', file = script_file)
         print(');', file = script_file)
         
         if self._genCuda:
@@ -154,6 +162,7 @@ class DftSolver(SPSolver):
             print("opts.printRuleTree := true;", file = script_file)
 
         print('Add(opts.includes, "<float.h>");',  file = script_file)
+        self._writeVariantOpts(script_file)
         print("tt := opts.tagIt(t);", file = script_file)
         print("", file = script_file)
         print("c := opts.fftxGen(tt);", file = script_file)
@@ -45,7 +45,8 @@ class HockneySolver(SPSolver):
         self._symbol = self._buildSymbol(problem)
 
         c = "_";
-        namebase = "hockney" + c + n + c + ns + c + nd
+        # unlike libraries of earlier versions, the function includes the scaling
+        namebase = "hockney" + c + n + c + ns + c + nd + c + "scaled"
         super(HockneySolver, self).__init__(problem, namebase, opts)
 
     def _buildSymbol(self, problem):
@@ -98,16 +99,23 @@ class HockneySolver(SPSolver):
         
         if type(dst) == type(None):
             Nd = self._problem.dimND()
-            dst = np.zeros((Nd,Nd,Nd), dtype=np.double)
+            dst = self._empty(np, (Nd,Nd,Nd), np.double)
 
         # swapaxes was necessary b/c C interprets symbol in y-->x-->z order
-        self._func(dst, src, np.swapaxes(self._symbol, axis1=0, axis2=1))
+        self._func(dst, src, *self._planArgs())
         
         return dst
 
+    def _planArgs(self):
+        return [np.swapaxes(self._symbol, axis1=0, axis2=1)]
+
+    def _normScale(self):
+        # the forward and inverse transforms together scale by 1/N, the backward norm
+        return '1/' + str(self._normSize())
+
     def scale(self, d):
-        N = self._problem.dimN()
-        return (d / N**3)
+        """Return d, solve() already scales the result."""
+        return d
  
     def _func(self, dst, src, sym):
         """Call the SPIRAL generated main function"""
@@ -122,7 +130,7 @@ class HockneySolver(SPSolver):
         ns = self._problem.dimNS()
         nd = self._problem.dimND()
         nameroot = self._namebase
-        filename = nameroot
+        filename = self._sourcePath(script_file)
         nnn = '[' + str(n) + ',' + str(n) + ',' + str(n) + ']'
         ndrange = '[' + str(n-nd) + '..' + str(n-1) + ']'
         ndr3D = '[' + ndrange + ',' + ndrange + ',' + ndrange + ']'
@@ -150,12 +158,13 @@ class HockneySolver(SPSolver):
         if self._printRuleTree:
             print("opts.printRuleTree := true;", file = script_file)
         print("", file = script_file)
+        self._writeVariantOpts(script_file)
         print('t := let(symvar := var("sym", TPtr(TReal)),', file = script_file)
         print("    TFCall(", file = script_file)
-        print("        Compose([", file = script_file)
+        print("        Scale(" + self._normScale() + ", Compose([", file = script_file)
         for i in range(len(self._callGraph)):
             print("            " + self._callGraph[i], file = script_file)
-        print("        ]),", file = script_file)
+        print("        ])),", file = script_file)
         print('        rec(fname := "' + nameroot + '", params := [symvar])', file = script_file)
         print("    ).withTags(opts.tags)", file = script_file)
         print(");", file = script_file)
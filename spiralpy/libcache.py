@@ -0,0 +1,222 @@
+# spiralpy/libcache.py
+#
+# Copyright 2018-2023, Carnegie Mellon University
+# All rights reserved.
+#
+# See LICENSE (https://github.com/spiral-software/python-package-spiralpy/blob/main/LICENSE)
+
+"""
+SpiralPy Library Cache Module
+==============================
+
+Track the use of the libraries in a library directory (by default .libs) and keep the directory
+within a budget by removing the least recently used libraries.
+
+Every load of a library appends a line to a usage log in the directory, which is cheap and safe
+for concurrent processes.  Pruning, and a load that grows the log beyond SP_USAGE_LOG_MAXSIZE
+bytes, merge the log into the usage file, which holds the time of the last load and the number
+of loads of each library.  Libraries are removed while holding their lock, so a process never
+loads a library that is being removed; libraries being built or loaded are not removed.  The budget is a total size, a number
+of libraries, or both, given by the SP_LIBS_MAXSIZE and SP_LIBS_MAXCOUNT environment variables.
+Processes that already loaded a removed library keep using it; later constructions build it again.
+"""
+
+from .constants import *
+from spiralpy.locking import FileLock, libraryLock
+
+import json
+import os
+import threading
+import time
+
+
+_SIZE_UNITS = {'K':1 << 10, 'M':1 << 20, 'G':1 << 30, 'T':1 << 40}
+
+
+def parseSize(text):
+    """Number of bytes of a size like 500M or 2G (binary units, optional B suffix)."""
+    value = str(text).strip().upper()
+    if value.endswith('B'):
+        value = value[:-1]
+    scale = 1
+    if value[-1:] in _SIZE_UNITS:
+        scale = _SIZE_UNITS[value[-1]]
+        value = value[:-1]
+    try:
+        return int(float(value) * scale)
+    except ValueError:
+        raise RuntimeError('invalid size "' + str(text) + '", expected e.g. 500M or 2G')
+
+
+def formatSize(size):
+    """Size in bytes as a short string, e.g. 1.5M."""
+    for unit in ['T', 'G', 'M', 'K']:
+        if size >= _SIZE_UNITS[unit]:
+            return f'{size / _SIZE_UNITS[unit]:.1f}{unit}'
+    return str(size)
+
+
+def libsBudget():
+    """Return (maximum total size, maximum count) of a library directory, None if unlimited."""
+    maxSize = os.getenv(SP_LIBS_MAXSIZE)
+    maxCount = os.getenv(SP_LIBS_MAXCOUNT)
+    maxSize = parseSize(maxSize) if maxSize else None
+    maxCount = int(maxCount) if maxCount else None
+    return (maxSize, maxCount)
+
+
+def _usageLock(libdir):
+    return FileLock(os.path.join(libdir, os.path.splitext(SP_USAGE_FILE)[0] + SP_LOCKFILE_EXT))
+
+
+def recordLibraryUse(libdir, libname):
+    """Note that library libname in libdir was loaded now."""
+    line = json.dumps([libname, time.time()]) + '\n'
+    try:
+        # a short append is atomic, so concurrent processes do not need a lock
+        with open(os.path.join(libdir, SP_USAGE_LOG), 'a') as f:
+            f.write(line)
+            size = f.tell()
+    except OSError:
+        return
+    if size > SP_USAGE_LOG_MAXSIZE:
+        # another process holding the lock is pruning or compacting already
+        lock = _usageLock(libdir)
+        if lock.acquire(blocking=False) != None:
+            try:
+                _compactUsage(libdir)
+            finally:
+                lock.release()
+
+
+def _readUsage(libdir):
+    try:
+        with open(os.path.join(libdir, SP_USAGE_FILE), 'r') as f:
+            usage = json.load(f)
+        if usage.get(SP_KEY_VERSION) == SP_USAGE_VERSION:
+            return usage.get(SP_KEY_LIBRARIES, dict())
+    except (OSError, ValueError):
+        pass
+    return dict()
+
+
+def _mergeLog(usage, logfile):
+    try:
+        with open(logfile, 'r') as f:
+            lines = f.readlines()
+    except OSError:
+        return
+    for line in lines:
+        try:
+            (name, stamp) = json.loads(line)
+        except ValueError:
+            # line cut short by a crash
+            continue
+        rec = usage.setdefault(name, {SP_KEY_HITS:0, SP_KEY_LASTUSED:0})
+        rec[SP_KEY_HITS] += 1
+        rec[SP_KEY_LASTUSED] = max(rec[SP_KEY_LASTUSED], stamp)
+
+
+def _compactUsage(libdir):
+    """Merge the usage log into the usage file, caller holds the directory's usage lock."""
+    usage = _readUsage(libdir)
+    logfile = os.path.join(libdir, SP_USAGE_LOG)
+    # loads logged while merging go to a new log
+    moved = logfile + '.' + str(os.getpid()) + '_' + str(threading.get_ident())
+    try:
+        os.replace(logfile, moved)
+    except OSError:
+        return usage
+    _mergeLog(usage, moved)
+    usage = {name:rec for (name, rec) in usage.items() if os.path.exists(os.path.join(libdir, name))}
+    path = os.path.join(libdir, SP_USAGE_FILE)
+    tmpfile = path + '.' + str(os.getpid()) + '_' + str(threading.get_ident()) + '.tmp'
+    try:
+        with open(tmpfile, 'w') as f:
+            json.dump({SP_KEY_VERSION:SP_USAGE_VERSION, SP_KEY_LIBRARIES:usage}, f, sort_keys=True, indent=1)
+        os.replace(tmpfile, path)
+        os.remove(moved)
+    except OSError:
+        # keep the moved log, it is merged by the next compaction
+        pass
+    return usage
+
+
+def libraryUsage(libdir):
+    """Return the libraries in libdir, least recently used first.
+
+    Each entry is a dict with the library's Filename, Size in bytes, number of loads (Hits)
+    and the time of its last load (LastUsed, seconds since the epoch).  Libraries never
+    loaded since tracking started count as used when they were last modified.
+    """
+    usage = _readUsage(libdir)
+    for name in os.listdir(libdir) if os.path.isdir(libdir) else []:
+        if name.startswith(SP_USAGE_LOG):
+            _mergeLog(usage, os.path.join(libdir, name))
+    libs = []
+    for entry in os.scandir(libdir) if os.path.isdir(libdir) else []:
+        if (not entry.name.endswith(SP_SHLIB_EXT)) or entry.name.startswith('.'):
+            continue
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        rec = usage.get(entry.name, dict())
+        libs.append({SP_KEY_FILENAME:entry.name, SP_KEY_SIZE:st.st_size, SP_KEY_HITS:rec.get(SP_KEY_HITS, 0),
+                     SP_KEY_LASTUSED:max(rec.get(SP_KEY_LASTUSED, 0), st.st_mtime)})
+    return sorted(libs, key=lambda lib: (lib[SP_KEY_LASTUSED], lib[SP_KEY_FILENAME]))
+
+
+def pruneLibraries(libdir, maxSize=None, maxCount=None, keep=(), dryRun=False):
+    """Remove least recently used libraries from libdir until it is within budget.
+
+    Arguments:
+    maxSize     -- maximum total size of the libraries in bytes (default: unlimited)
+    maxCount    -- maximum number of libraries (default: unlimited)
+    keep        -- file names of libraries never removed, e.g. one just installed
+    dryRun      -- only report the libraries that would be removed
+
+    Returns the usage entries (see libraryUsage) of the removed libraries.
+    """
+    if (maxSize == None) and (maxCount == None):
+        return []
+    if not os.path.isdir(libdir):
+        return []
+    removed = []
+    with _usageLock(libdir):
+        if not dryRun:
+            _compactUsage(libdir)
+        libs = libraryUsage(libdir)
+        total = sum([lib[SP_KEY_SIZE] for lib in libs])
+        count = len(libs)
+        for lib in libs:
+            if ((maxSize == None) or (total <= maxSize)) and ((maxCount == None) or (count <= maxCount)):
+                break
+            if lib[SP_KEY_FILENAME] in keep:
+                continue
+            if not dryRun:
+                # skip libraries being built or loaded, waiting could deadlock with a builder
+                # that prunes while holding its own library's lock
+                path = os.path.join(libdir, lib[SP_KEY_FILENAME])
+                lock = libraryLock(path)
+                if lock.acquire(blocking=False) == None:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    # e.g. loaded by a process on Windows
+                    continue
+                finally:
+                    lock.release()
+            removed.append(lib)
+            total -= lib[SP_KEY_SIZE]
+            count -= 1
+    return removed
+
+
+def pruneToBudget(libdir, keep=()):
+    """Prune libdir to the budget of the SP_LIBS_MAXSIZE and SP_LIBS_MAXCOUNT variables."""
+    (maxSize, maxCount) = libsBudget()
+    if (maxSize == None) and (maxCount == None):
+        return []
+    return pruneLibraries(libdir, maxSize, maxCount, keep)
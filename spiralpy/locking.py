@@ -0,0 +1,135 @@
+# spiralpy/locking.py
+#
+# Copyright 2018-2023, Carnegie Mellon University
+# All rights reserved.
+#
+# See LICENSE (https://github.com/spiral-software/python-package-spiralpy/blob/main/LICENSE)
+
+"""
+SpiralPy Locking Module
+========================
+
+Coordinate builds between processes, e.g. the ranks of an MPI job that all construct the
+same solver.  A lock file next to the library lets one process build it while the others
+wait, and libraries are installed by renaming a complete copy into place, so a library is
+never loaded while it is being written.
+"""
+
+from .constants import *
+
+import os
+import shutil
+import sys
+import threading
+import time
+
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import fcntl
+
+
+# some file systems implement flock per process, so threads also take a process-local lock
+_threadLocks = dict()
+_threadLocksGuard = threading.Lock()
+
+def _threadLock(path):
+    with _threadLocksGuard:
+        if path not in _threadLocks:
+            _threadLocks[path] = threading.Lock()
+        return _threadLocks[path]
+
+
+class FileLock:
+    """Exclusive lock on a file, held by one thread of one process at a time.
+
+    Use as a context manager.  The lock is released when the holder exits or dies; the
+    lock file itself is left in place.
+    """
+
+    def __init__(self, path, poll=0.1):
+        self._path = os.path.abspath(path)
+        self._poll = poll
+        self._file = None
+
+    def acquire(self, blocking=True):
+        """Acquire the lock, returns self, or None if not blocking and the lock is held."""
+        if not _threadLock(self._path).acquire(blocking):
+            return None
+        try:
+            self._file = open(self._path, 'a+')
+            if sys.platform == 'win32':
+                # LK_LOCK gives up after 10 seconds, so poll with the non-blocking mode
+                while True:
+                    try:
+                        self._file.seek(0)
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            raise BlockingIOError()
+                        time.sleep(self._poll)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._abandon()
+            if blocking:
+                raise
+            return None
+        except:
+            self._abandon()
+            raise
+        return self
+
+    def _abandon(self):
+        """Undo a failed acquire."""
+        if self._file != None:
+            self._file.close()
+            self._file = None
+        _threadLock(self._path).release()
+
+    def release(self):
+        if self._file == None:
+            return
+        try:
+            if sys.platform == 'win32':
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+            _threadLock(self._path).release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def libraryLock(path):
+    """Lock of library path, held while it is built, loaded or removed."""
+    return FileLock(os.path.splitext(path)[0] + SP_LOCKFILE_EXT)
+
+
+def installFile(src, destdir):
+    """Copy file src into destdir under the same name, atomically replacing any existing file.
+
+    Processes that already loaded the old file keep using it.  Returns the installed path.
+    """
+    os.makedirs(destdir, mode=0o777, exist_ok=True)
+    dest = os.path.join(destdir, os.path.basename(src))
+    # hidden name without the library extension, so metadata searches skip partial copies
+    tmp = os.path.join(destdir, '.' + os.path.basename(src) + '.' + str(os.getpid()) + '_' + str(threading.get_ident()) + '.tmp')
+    try:
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dest)
+    except:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return dest
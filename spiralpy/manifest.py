@@ -0,0 +1,149 @@
+# spiralpy/manifest.py
+#
+# Copyright 2018-2023, Carnegie Mellon University
+# All rights reserved.
+#
+# See LICENSE (https://github.com/spiral-software/python-package-spiralpy/blob/main/LICENSE)
+
+"""
+SpiralPy Manifest Module
+=========================
+
+Build the libraries listed in a manifest ahead of time, e.g. once per deployment, instead of
+paying build costs inside jobs.  A manifest is a JSON file holding a list of transforms, or an
+object with a "transforms" list and "defaults" applied to every transform:
+
+    {
+        "defaults":   { "precision": "double", "platform": "CPU" },
+        "transforms": [
+            { "type": "mddft", "dims": [64, 64, 64], "direction": "inverse" },
+            { "type": "dft", "dims": 1024, "batch": [16, 1], "strides": [1, 2] },
+            { "type": "mdrconv", "dims": [32, 32, 32], "options": { "threads": 8 } }
+        ]
+    }
+
+Transform fields:
+type        -- batchmddft, dft, hockney, mddft, mdprdft, mdrconv, mdrfsconv or stepphase
+dims        -- dimensions; [n, ns, nd] for hockney, an int n for dft and stepphase
+direction   -- forward (default) or inverse
+precision   -- double (default) or single
+batch       -- batch size (batchmddft), or batch dimensions (dft)
+strides     -- [readStride, writeStride] (dft), 1 is unit stride, other values block stride
+order       -- C (default) or Fortran
+platform    -- CPU (default), CUDA or HIP
+options     -- further solver options, e.g. threads, vectorisa or optprofile
+"""
+
+from .constants import *
+from spiralpy.buildscheduler import *
+
+import json
+import os
+import time
+
+
+_PROBLEMS = {
+    'batchmddft':   lambda e, k: BatchMddftProblem(e['dims'], e['batch'], k),
+    'dft':          lambda e, k: DftProblem(_scalar(e['dims']), k, e.get('batch', [1,1]), *e.get('strides', [1,1])),
+    'hockney':      lambda e, k: HockneyProblem(*e['dims']),
+    'mddft':        lambda e, k: MddftProblem(e['dims'], k),
+    'mdprdft':      lambda e, k: MdprdftProblem(e['dims'], k),
+    'mdrconv':      lambda e, k: MdrconvProblem(e['dims']),
+    'mdrfsconv':    lambda e, k: MdrfsconvProblem(e['dims']),
+    'stepphase':    lambda e, k: StepPhaseProblem(_scalar(e['dims'])),
+}
+
+_DIRECTIONS = {'forward':SP_FORWARD, 'inverse':SP_INVERSE}
+_PRECISIONS = {'double':None, 'single':'float'}
+_ORDERS     = {'c':False, 'fortran':True}
+
+
+def _scalar(dims):
+    return dims[0] if type(dims) is list else dims
+
+
+def _choice(entry, field, table, default):
+    value = str(entry.get(field, default)).lower()
+    if not value in table:
+        msg = 'invalid ' + field + ' "' + value + '", expected one of ' + ', '.join(sorted(table))
+        raise RuntimeError(msg)
+    return table[value]
+
+
+def jobFromEntry(entry):
+    """Return (problem, opts) for one manifest transform entry."""
+    typ = str(entry.get('type', '')).lower()
+    if not typ in _PROBLEMS:
+        msg = 'invalid type "' + typ + '", expected one of ' + ', '.join(sorted(_PROBLEMS))
+        raise RuntimeError(msg)
+    if not 'dims' in entry:
+        raise RuntimeError('missing dims')
+    k = _choice(entry, 'direction', _DIRECTIONS, 'forward')
+    try:
+        problem = _PROBLEMS[typ](entry, k)
+    except (KeyError, TypeError) as ex:
+        msg = 'invalid ' + typ + ' entry: ' + str(ex)
+        raise RuntimeError(msg)
+
+    opts = dict(entry.get('options', dict()))
+    opts[SP_OPT_METADATA] = True
+    realctype = _choice(entry, 'precision', _PRECISIONS, 'double')
+    if realctype != None:
+        opts[SP_OPT_REALCTYPE] = realctype
+    if _choice(entry, 'order', _ORDERS, 'C'):
+        opts[SP_OPT_COLMAJOR] = True
+    opts[SP_OPT_PLATFORM] = _choice(entry, 'platform', {SP_CPU.lower():SP_CPU, SP_CUDA.lower():SP_CUDA, SP_HIP.lower():SP_HIP}, SP_CPU)
+    return (problem, opts)
+
+
+def readManifest(path):
+    """Read manifest file path, return a list of (problem, opts) jobs."""
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    defaults = dict()
+    if type(manifest) is dict:
+        defaults = manifest.get('defaults', dict())
+        manifest = manifest.get('transforms', [])
+    if not type(manifest) is list:
+        raise RuntimeError(path + ': expected a list of transforms')
+    jobs = []
+    for (index, entry) in enumerate(manifest):
+        try:
+            jobs.append(jobFromEntry(dict(defaults, **entry)))
+        except RuntimeError as ex:
+            msg = path + ': transform ' + str(index) + ': ' + str(ex)
+            raise RuntimeError(msg)
+    return jobs
+
+
+def buildManifest(path, libdir=None, maxWorkers=None, timeout=None, verbose=False):
+    """Build the libraries of the transforms in manifest file path.
+
+    Arguments:
+    libdir      -- directory the libraries are installed in (default: .libs)
+    maxWorkers  -- maximum number of concurrent builds (default: number of CPUs)
+    timeout     -- seconds after which a build is stopped (default: no limit)
+    verbose     -- print each build's status as it finishes
+
+    Transforms whose library is already in libdir or on SP_LIBRARY_PATH are not built and
+    report status SP_BUILD_PRESENT.  Returns the reports of buildProblems, one per transform.
+    """
+    reports = dict()
+    pending = []
+    for (index, (problem, opts)) in enumerate(readManifest(path)):
+        if libdir != None:
+            opts[SP_OPT_LIBDIR] = os.path.abspath(libdir)
+        start = time.monotonic()
+        solver = solverClassForProblem(problem)(problem, dict(opts, **{SP_OPT_NOBUILD:True}))
+        if solver._resolveLibrary() != None:
+            reports[index] = {SP_KEY_STATUS:SP_BUILD_PRESENT, SP_KEY_ELAPSED:time.monotonic() - start,
+                              SP_KEY_NAMEBASE:solver._namebase}
+        else:
+            pending.append((index, problem, opts))
+
+    built = buildProblems([(problem, opts) for (index, problem, opts) in pending], maxWorkers, timeout, verbose)
+    for ((index, problem, opts), report) in zip(pending, built):
+        if SP_KEY_DUPLICATEOF in report:
+            report[SP_KEY_DUPLICATEOF] = pending[report[SP_KEY_DUPLICATEOF]][0]
+        reports[index] = report
+    return [reports[i] for i in range(len(reports))]
@@ -57,9 +57,9 @@ class MddftSolver(SPSolver):
         xp = get_array_module(src)
 
         if self._problem.direction() == SP_FORWARD:
-            FFT = xp.fft.fftn ( src )
+            FFT = xp.fft.fftn ( src, norm=self._norm )
         else:
-            FFT = xp.fft.ifftn ( src ) 
+            FFT = xp.fft.ifftn ( src, norm=self._norm ) 
 
         return FFT
         
@@ -69,22 +69,33 @@ class MddftSolver(SPSolver):
     def solve(self, src, dst=None):
         """Call SPIRAL-generated function."""
    
-        if type(dst) == type(None):
+        if self._inPlace:
+            dst = self._inPlaceDst(src, dst)
+        elif type(dst) == type(None):
             xp = get_array_module(src)
             nt = tuple(self._problem.dimensions())
             ordc = 'F' if self._colMajor else 'C'
-            dst = xp.zeros(nt, src.dtype,  order=ordc)
+            dst = self._empty(xp, nt, src.dtype, ordc)
             
         self._func(dst, src)
-        if self._problem.direction() == SP_INVERSE:
-            xp = get_array_module(dst)
-            xp.divide(dst, xp.size(dst), out=dst)
+        return self._normalize(dst)
+
+    def _supportsNorm(self):
+        return True
+
+    def _supportsInPlace(self):
+        return True
+
+    def _normalize(self, dst):
+        if (not self._fusedNorm) and self._problem.direction() == SP_INVERSE:
+            dst /= dst.size
         return dst
 
     def _writeScript(self, script_file):
-        filename = self._namebase
+        filename = self._sourcePath(script_file)
         nameroot = self._namebase
         dims = str(self._problem.dimensions())
+        xform = self._scaledSpec('MDDFT(ns, ' + str(self._problem.direction()) + ')')
         filetype = '.c'
         if self._genCuda:
             filetype = '.cu'
@@ -105,13 +116,13 @@ class MddftSolver(SPSolver):
         print('    name := "' + nameroot + '",', file = script_file)
         # -1 is inverse for Numpy and forward (1) for Spiral
         if self._colMajor:
-            print("    TFCallF(TRC(MDDFT(ns, " + str(self._problem.direction()) + ")),", file = script_file)
+            print("    TFCallF(" + self._inPlaceSpec("TRC(" + xform + ")") + ",", file = script_file)
             print("        rec(fname := name,", file = script_file)
             print("            params := [],", file = script_file)
             print("            Xtype := TArrayNDF(TComplex, ns),", file = script_file)
             print("            Ytype := TArrayNDF(TComplex, ns)))", file = script_file)
         else:
-            print("    TFCall(MDDFT(ns, " + str(self._problem.direction()) + "), rec(fname := name, params := []))", file = script_file)
+            print("    TFCall(" + self._inPlaceSpec(xform) + ", rec(fname := name, params := []))", file = script_file)
         print(");", file = script_file)        
 
         print('', file = script_file)
@@ -126,6 +137,7 @@ class MddftSolver(SPSolver):
             print("opts.printRuleTree := true;", file = script_file)
 
         print('Add(opts.includes, "<float.h>");',  file = script_file)
+        self._writeVariantOpts(script_file)
         print("tt := opts.tagIt(t);", file = script_file)
         print("", file = script_file)
         print("c := opts.fftxGen(tt);", file = script_file)
@@ -80,6 +80,10 @@ class MdprdftSolver(SPSolver):
     def dimensionsCX(self):
         return self._cxns
 
+    def dimensionsPadded(self):
+        """Dimensions of the real array of an in-place transform, padded to hold the complex array."""
+        return self._problem.dimensions()[:-1] + [2 * self._cxns[-1]]
+
     def runDef(self, src):
         """Solve using internal Python definition."""
         
@@ -90,12 +94,15 @@ class MdprdftSolver(SPSolver):
             axes = np.flip(axes)
 
         if self._problem.direction() == SP_FORWARD:
-            dst = xp.fft.rfftn(src, axes=axes)
+            if self._inPlace:
+                # padded real array
+                src = src[..., :self._problem.dimensions()[-1]]
+            dst = xp.fft.rfftn(src, axes=axes, norm=self._norm)
         else:
             if self._colMajor:
-                dst = xp.fft.irfftn(src, tuple(self._problem.dimensions())[::-1], axes=axes)
+                dst = xp.fft.irfftn(src, tuple(self._problem.dimensions())[::-1], axes=axes, norm=self._norm)
             else:
-                dst = xp.fft.irfftn(src, tuple(self._problem.dimensions()), axes=axes)
+                dst = xp.fft.irfftn(src, tuple(self._problem.dimensions()), axes=axes, norm=self._norm)
 
         # make sure dst array is correct order
         if self._colMajor:
@@ -111,6 +118,16 @@ class MdprdftSolver(SPSolver):
     def solve(self, src, dst=None):
         """Call SPIRAL-generated function."""
         
+        if self._inPlace:
+            # the real array is padded, its memory holds the complex array
+            buf = self._inPlaceDst(src, dst)
+            if (self._problem.direction() == SP_FORWARD) and (list(buf.shape) != self.dimensionsPadded()):
+                raise RuntimeError('in-place transform requires a real array of dimensions ' + str(self.dimensionsPadded()))
+            self._func(buf, buf)
+            if self._problem.direction() == SP_FORWARD:
+                return self._normalize(buf.view(self._cxtype))
+            return self._normalize(buf.view(self._ftype)[..., :self._problem.dimensions()[-1]])
+
         if type(dst) == type(None):
             xp = get_array_module(src)
             if self._problem.direction() == SP_FORWARD:
@@ -120,16 +137,24 @@ class MdprdftSolver(SPSolver):
                 nt = tuple(self._problem.dimensions())
                 rtype = self._ftype
             ordc = 'F' if self._colMajor else 'C'
-            dst = xp.zeros(nt, rtype,  order=ordc)
+            dst = self._empty(xp, nt, rtype, ordc)
             
         self._func(dst, src)
-        if self._problem.direction() == SP_INVERSE:
-            xp = get_array_module(dst)
-            xp.divide(dst, xp.size(dst), out=dst)
+        return self._normalize(dst)
+
+    def _supportsNorm(self):
+        return True
+
+    def _supportsInPlace(self):
+        return not self._colMajor
+
+    def _normalize(self, dst):
+        if (not self._fusedNorm) and self._problem.direction() == SP_INVERSE:
+            dst /= dst.size
         return dst
 
     def _writeScript(self, script_file):
-        filename = self._namebase
+        filename = self._sourcePath(script_file)
         nameroot = self._namebase
         dims = str(self._problem.dimensions())
         filetype = '.c'
@@ -151,6 +176,16 @@ class MdprdftSolver(SPSolver):
         else:
             print("conf := LocalConfig.fftx.defaultConf();", file = script_file) 
 
+        xform = self._scaledSpec(xform + '(ns, ' + str(self._problem.direction()) + ')')
+        if self._inPlace:
+            # the real array is padded, so the complex array fits into its memory
+            pns = str(self.dimensionsPadded())
+            box = '[' + ', '.join(['[0..' + str(n-1) + ']' for n in self._problem.dimensions()]) + ']'
+            if self._problem.direction() == SP_FORWARD:
+                xform = 'Compose([' + xform + ', ExtractBox(' + pns + ', ' + box + ')])'
+            else:
+                xform = 'Compose([ZeroEmbedBox(' + pns + ', ' + box + '), ' + xform + '])'
+
         print("t := let(ns := " + dims + ",", file = script_file) 
         print('    name := "' + nameroot + '",', file = script_file)
         # -1 is inverse for Numpy and forward (1) for Spiral
@@ -162,13 +197,13 @@ class MdprdftSolver(SPSolver):
                 xtype = 'Xtype := TArrayNDF(TReal, ns)'
                 ytype = 'Ytype := TArrayNDF_ConjEven(TComplex, ns)'
         
-            print('  TFCallF(' + xform + '(ns, ' + str(self._problem.direction()) + '),', file = script_file)
+            print('  TFCallF(' + xform + ',', file = script_file)
             print('    rec(fname := name,', file = script_file)
             print('        params := [],', file = script_file)
             print('        ' + xtype + ',', file = script_file)
             print('        ' + ytype + '))', file = script_file)
         else:
-            print("    TFCall(" + xform + "(ns, " + str(self._problem.direction()) + "), rec(fname := name, params := []))", file = script_file)
+            print("    TFCall(" + self._inPlaceSpec(xform) + ", rec(fname := name, params := []))", file = script_file)
         print(");", file = script_file)        
 
         print("opts := conf.getOpts(t);", file = script_file)
@@ -181,6 +216,7 @@ class MdprdftSolver(SPSolver):
         if self._printRuleTree:
             print("opts.printRuleTree := true;", file = script_file)
 
+        self._writeVariantOpts(script_file)
         print("tt := opts.tagIt(t);", file = script_file)
         print("", file = script_file)
         print("c := opts.fftxGen(tt);", file = script_file)
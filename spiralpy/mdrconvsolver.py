@@ -88,16 +88,24 @@ class MdrconvSolver(SPSolver):
         if shape[0] == shape[2]:
             N = shape[0]
             Nx = (N // 2) + 1
-            sym = xp.ascontiguousarray(sym[:, :, :Nx])
+            sym = self._contiguous(xp, sym[:, :, :Nx])
                 
         n1 = self._problem.dimensions()[0]
         n2 = self._problem.dimensions()[1]
         n3 = self._problem.dimensions()[2]
         if type(dst) == type(None):
-            dst = xp.zeros((n1,n2,n3), src.dtype)
+            dst = self._empty(xp, (n1,n2,n3), src.dtype)
         self._func(dst, src, sym)
-        xp.divide(dst, n1*n2*n3, out=dst)
+        return self._normalize(dst)
+
+    def _normalize(self, dst):
+        if not self._fusedNorm:
+            dst /= self._normSize()
         return dst
+
+    def _normScale(self):
+        # the forward and inverse transforms together scale by 1/N, the backward norm
+        return '1/' + str(self._normSize())
  
     def _func(self, dst, src, sym):
         """Call the SPIRAL generated main function"""
@@ -124,7 +132,7 @@ class MdrconvSolver(SPSolver):
 
     def _writeScript(self, script_file):
         nameroot = self._namebase
-        filename = nameroot
+        filename = self._sourcePath(script_file)
         filetype = '.c'
         if self._genCuda:
             filetype = '.cu'
@@ -144,10 +152,10 @@ class MdrconvSolver(SPSolver):
         print("", file = script_file)
         print('t := let(symvar := var("sym", TPtr(TReal)),', file = script_file)
         print("    TFCall(", file = script_file)
-        print("        Compose([", file = script_file)
+        print("        Scale(" + self._normScale() + ", Compose([", file = script_file)
         for i in range(len(self._callGraph)):
             print("            " + self._callGraph[i], file = script_file)
-        print("        ]),", file = script_file)
+        print("        ])),", file = script_file)
         print('        rec(fname := "' + nameroot + '", params := [symvar])', file = script_file)
         print("    )", file = script_file)
         print(");", file = script_file)
@@ -163,6 +171,7 @@ class MdrconvSolver(SPSolver):
         if self._printRuleTree:
             print("opts.printRuleTree := true;", file = script_file)
 
+        self._writeVariantOpts(script_file)
         print("tt := opts.tagIt(t);", file = script_file)
         print("", file = script_file)
         print("c := opts.fftxGen(tt);", file = script_file)
@@ -107,13 +107,26 @@ class MdrfsconvSolver(SPSolver):
         if shape[2] == 2*n3:
             N = shape[2]
             Nx = (N // 2) + 1
-            sym = xp.ascontiguousarray(sym[:, :, :Nx])
+            sym = self._contiguous(xp, sym[:, :, :Nx])
         
         if type(dst) == type(None):
-            dst = xp.zeros((n1,n2,n3), src.dtype)
+            dst = self._empty(xp, (n1,n2,n3), src.dtype)
         self._func(dst, src, sym)
-        xp.divide(dst, n1*n2*n3*8, out=dst)
+        return self._normalize(dst)
+
+    def _normalize(self, dst):
+        if not self._fusedNorm:
+            dst /= self._normSize()
         return dst
+
+    def _normSize(self):
+        # the transforms are of the cube padded to twice the size
+        dims = self._problem.dimensions()
+        return dims[0] * dims[1] * dims[2] * 8
+
+    def _normScale(self):
+        # the forward and inverse transforms together scale by 1/N, the backward norm
+        return '1/' + str(self._normSize())
  
     def _func(self, dst, src, sym):
         """Call the SPIRAL generated main function"""
@@ -140,7 +153,7 @@ class MdrfsconvSolver(SPSolver):
 
     def _writeScript(self, script_file):
         nameroot = self._namebase
-        filename = nameroot
+        filename = self._sourcePath(script_file)
         filetype = '.c'
         if self._genCuda:
             filetype = '.cu'
@@ -160,10 +173,10 @@ class MdrfsconvSolver(SPSolver):
         print("", file = script_file)
         print('t := let(symvar := var("sym", TPtr(TReal)),', file = script_file)
         print("    TFCall(", file = script_file)
-        print("        Compose([", file = script_file)
+        print("        Scale(" + self._normScale() + ", Compose([", file = script_file)
         for i in range(len(self._callGraph)):
             print("            " + self._callGraph[i], file = script_file)
-        print("        ]),", file = script_file)
+        print("        ])),", file = script_file)
         print('        rec(fname := "' + nameroot + '", params := [symvar])', file = script_file)
         print("    )", file = script_file)
         print(");", file = script_file)
@@ -179,6 +192,7 @@ class MdrfsconvSolver(SPSolver):
         if self._printRuleTree:
             print("opts.printRuleTree := true;", file = script_file)
 
+        self._writeVariantOpts(script_file)
         print("tt := opts.tagIt(t);", file = script_file)
         print("", file = script_file)
         print("c := opts.fftxGen(tt);", file = script_file)
@@ -8,27 +8,110 @@
 
 ##  from spiralpy import *
 from .constants import *
+from spiralpy.toolchain import hostCPUFeatures, isaRank
 
 import json
 import glob
+import mmap
 import os
+import struct
 import sys
+import threading
 import site
 
+_ELF_MAGIC       = b'\x7fELF'
+_ELF_SECTIONS    = ('.rodata', '.data', '.ldata', '.lrodata')
+_STREAM_CHUNK    = 1 << 20
+
+def _elfDataSections(mm):
+    """Return (offset, size) of the data sections of an ELF image, None if not ELF."""
+    if mm[:4] != _ELF_MAGIC:
+        return None
+    endian = '<' if mm[5] == 1 else '>'
+    try:
+        if mm[4] == 2:
+            # 64 bit: name, type, flags, addr, offset, size
+            (shoff,) = struct.unpack_from(endian + 'Q', mm, 0x28)
+            (shentsize, shnum, shstrndx) = struct.unpack_from(endian + 'HHH', mm, 0x3A)
+            shfmt = endian + 'IIQQQQ'
+        else:
+            (shoff,) = struct.unpack_from(endian + 'I', mm, 0x20)
+            (shentsize, shnum, shstrndx) = struct.unpack_from(endian + 'HHH', mm, 0x2E)
+            shfmt = endian + 'IIIIII'
+        if shoff == 0 or shnum == 0 or shstrndx >= shnum:
+            return None
+        headers = [struct.unpack_from(shfmt, mm, shoff + i * shentsize) for i in range(shnum)]
+        stroff = headers[shstrndx][4]
+        ranges = []
+        for (name, typ, flags, addr, offset, size) in headers:
+            end = mm.find(b'\0', stroff + name)
+            secname = mm[stroff + name:end].decode('ascii', 'replace')
+            # SHT_NOBITS (8) sections, e.g. .bss, have no file contents
+            if typ != 8 and secname.startswith(_ELF_SECTIONS):
+                ranges.append((offset, size))
+        return ranges
+    except (struct.error, IndexError):
+        return None
+
+
+def _metadataInStream(f, bstr, estr):
+    """Scan a file in fixed size chunks for the marker-bounded metadata."""
+    f.seek(0)
+    buff = b''
+    found = False
+    while True:
+        chunk = f.read(_STREAM_CHUNK)
+        if not chunk:
+            return None
+        buff = buff + chunk
+        if not found:
+            b = buff.find(bstr)
+            if b < 0:
+                # keep enough bytes to match a marker split across chunks
+                buff = buff[-(len(bstr) - 1):]
+                continue
+            buff = buff[b + len(bstr):]
+            found = True
+        e = buff.find(estr)
+        if e >= 0:
+            return buff[:e]
+
+
 def metadataInFile(filename):
-    """extract metadata from binary file."""
+    """extract metadata from binary file.
+    
+    ELF libraries are memory-mapped and only their data sections are searched for the
+    metadata markers; other files are scanned in bounded chunks.
+    """
     bstr = bytes(SP_METADATA_START, 'utf-8')
     estr = bytes(SP_METADATA_END, 'utf-8')
     with open(filename, 'rb') as f:
-        buff = f.read()
-        if bstr in buff:
-            b = buff.find(bstr) + len(bstr)
-            e = buff.find(estr)
-            metabytes = buff[b:e]
-            metaobj = json.loads(metabytes)
-            return metaobj
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            mm = None
+        if mm == None:
+            metabytes = _metadataInStream(f, bstr, estr)
         else:
+            with mm:
+                ranges = _elfDataSections(mm)
+                if ranges == None:
+                    metabytes = _metadataInStream(f, bstr, estr)
+                else:
+                    metabytes = None
+                    for (offset, size) in ranges:
+                        b = mm.find(bstr, offset, offset + size)
+                        if b < 0:
+                            continue
+                        b = b + len(bstr)
+                        e = mm.find(estr, b, offset + size)
+                        if e >= 0:
+                            metabytes = mm[b:e]
+                            break
+        if metabytes == None:
             return None
+        metaobj = json.loads(metabytes)
+        return metaobj
 
 
 def metadataInDir(path):
@@ -63,13 +146,99 @@ def metadataMatches(metadata, metavals):
     if len(metavals) < 1:
         return False
     for k,v in metavals.items():
-        if not k in metadata:
-            return False
-        if v != metadata[k]:
+        if k in metadata:
+            if v != metadata[k]:
+                return False
+        elif (not k in SP_METADATA_DEFAULTS) or (v != SP_METADATA_DEFAULTS[k]):
             return False
     return True
     
     
+def _indexBucket(metavals):
+    """Key of the index bucket holding transforms that could match metavals."""
+    return json.dumps([metavals.get(SP_KEY_TRANSFORMTYPE),
+                       metavals.get(SP_KEY_DIMENSIONS),
+                       metavals.get(SP_KEY_PRECISION),
+                       metavals.get(SP_KEY_PLATFORM)])
+
+
+def _readMetadataIndex(path):
+    """Read the persisted index of a library directory, empty if missing or stale."""
+    try:
+        with open(os.path.join(path, SP_METAINDEX_FILE), 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return dict()
+    if index.get(SP_KEY_VERSION) != SP_METAINDEX_VERSION:
+        return dict()
+    return index.get(SP_KEY_FILES, dict())
+
+
+def _writeMetadataIndex(path, files):
+    """Atomically replace the persisted index, ignoring read-only directories."""
+    indexfile = os.path.join(path, SP_METAINDEX_FILE)
+    tmpfile = indexfile + '.' + str(os.getpid()) + '_' + str(threading.get_ident()) + '.tmp'
+    try:
+        with open(tmpfile, 'w') as f:
+            json.dump({SP_KEY_VERSION:SP_METAINDEX_VERSION, SP_KEY_FILES:files}, f)
+        os.replace(tmpfile, indexfile)
+    except OSError:
+        try:
+            os.remove(tmpfile)
+        except OSError:
+            pass
+
+
+_metadataIndexes = dict()
+
+def metadataIndexForDir(path):
+    """Return the metadata index of a library directory, refreshing stale entries.
+
+    The index maps bucket keys (transform type, dimensions, precision, platform) to
+    lists of (filename, transform metadata) pairs.  It is persisted in the directory
+    as SP_METAINDEX_FILE and an entry is only re-read from its library when the
+    library's mtime or size changed.
+    """
+    cached = _metadataIndexes.get(path)
+    files = cached[0] if cached != None else _readMetadataIndex(path)
+    
+    current = dict()
+    changed = False
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        entries = []
+    for entry in entries:
+        if not entry.name.endswith(SP_SHLIB_EXT):
+            continue
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        rec = files.get(entry.name)
+        if (rec == None) or (rec.get(SP_KEY_MTIME) != st.st_mtime_ns) or (rec.get(SP_KEY_SIZE) != st.st_size):
+            metaobj = metadataInFile(entry.path)
+            transforms = metaobj.get(SP_KEY_TRANSFORMS, []) if type(metaobj) is dict else []
+            rec = {SP_KEY_MTIME:st.st_mtime_ns, SP_KEY_SIZE:st.st_size, SP_KEY_TRANSFORMS:transforms}
+            changed = True
+        current[entry.name] = rec
+    if len(current) != len(files):
+        changed = True
+    
+    if (cached != None) and not changed:
+        return cached[1]
+    
+    buckets = dict()
+    for name in sorted(current):
+        for xform in current[name].get(SP_KEY_TRANSFORMS, []):
+            key = _indexBucket(xform)
+            buckets.setdefault(key, []).append((os.path.join(path, name), xform))
+    _metadataIndexes[path] = (current, buckets)
+    if changed:
+        _writeMetadataIndex(path, current)
+    return buckets
+
+
 def findFunctionsWithMetadata(metavals, libdir=None):
     """Search for matching metadata in libraries."""
     if not type(metavals) is dict:
@@ -91,17 +260,22 @@ def findFunctionsWithMetadata(metavals, libdir=None):
         sep = ';' if sys.platform == 'win32' else ':'
         paths = libpath.split(sep)
         dirlist = dirlist + paths
-        
+    
+    # drop variants the host cannot run, prefer the widest vector ISA, then search order
+    host = hostCPUFeatures()
+    key = _indexBucket(metavals)
+    matches = []
     for libdir in dirlist:    
-        mdlist = metadataInDir(libdir)
-        for filedict in mdlist:
-            filemd = filedict.get(SP_KEY_METADATA, {})
-            if transformType not in filemd.get(SP_KEY_TRANSFORMTYPES, []):
+        for (filename, xform) in metadataIndexForDir(libdir).get(key, []):
+            if not metadataMatches(xform, metavals):
+                continue
+            if (host != None) and not set(xform.get(SP_KEY_CPUFEATURES, [])) <= host:
                 continue
-            for xform in filemd.get(SP_KEY_TRANSFORMS, []):
-                if metadataMatches(xform, metavals):
-                    return(filedict.get(SP_KEY_FILENAME), xform.get(SP_KEY_NAMES, {}))
-            
-    return (None, None)
+            matches.append((filename, xform))
+    if len(matches) == 0:
+        return (None, None)
+    isaDefault = SP_METADATA_DEFAULTS[SP_KEY_VECTORISA]
+    (filename, xform) = min(matches, key=lambda m: isaRank(m[1].get(SP_KEY_VECTORISA, isaDefault)))
+    return (filename, xform.get(SP_KEY_NAMES, {}))
 
 
@@ -6,9 +6,17 @@
 # See LICENSE (https://github.com/spiral-software/python-package-spiralpy/blob/main/LICENSE)
 
 
-import sys
-import subprocess
+from .constants import SP_SPIRALPOOL
+
+import atexit
 import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
 
 
 SPIRAL_KEY_CMAKEVERSION     =  'CMakeVersion'
@@ -24,18 +32,28 @@ SPIRAL_KEY_VERSION          =  'Version'
 SPIRAL_RET_OK   = 0
 SPIRAL_RET_ERR  = 1
 
+SPIRAL_POOL_PRELOAD     = 'Load(fftx);\nImportAll(fftx);\nLoad(simt);\nImportAll(simt);\n'
+SPIRAL_POOL_SENTINEL    = '!!SPIRALPY_DONE_'
+
+# statements that load packages or import their names into the global namespace
+_PACKAGE_STATEMENT  = re.compile(r'^\s*(Load|Import|ImportAll)\s*\(\s*([\w.]+)\s*\)', re.MULTILINE)
+
 if sys.platform == 'win32':
     SPIRAL_EXE = 'spiral.bat'
 else:
     SPIRAL_EXE = 'spiral'
 
 
-def spiralBuildInfo():
+def spiralBuildInfo(runprog=None):
     # -B option signals Spiral to print build info and exit early in startup
     # use BuildInfo() and quit commands for older Spiral version w/o -B option
     fallthroughstr = b'BuildInfo();\nquit;\n'
+    if runprog == None:
+        runprog = _spiralProgram()
+        if runprog == None:
+            return dict()
     try:
-        res = subprocess.run([SPIRAL_EXE, '-B'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, input=fallthroughstr)
+        res = subprocess.run([runprog, '-B'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, input=fallthroughstr)
     except:
         return dict()
     bdl = res.stdout.split(b'\n')
@@ -51,38 +69,54 @@ def spiralBuildInfo():
 
 def isSpiralInPath(progname):
     "Determine if the Spiral executable is in the user's PATH"
-    try:
-        ##  Use the 'which' command (Unix/Linux) or the 'where' command (Windows)
-        if sys.platform =='win32':              ##  Windows
-            subprocess.run ( ['where', progname], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE )
-        else:                                   ##  Unix/Linux/Mac
-            subprocess.run ( ['which', progname], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE )
+    return shutil.which(progname) != None
+
 
-        return True
-    except subprocess.CalledProcessError:
-        return False
+_spiralPrograms = dict()
 
+def _spiralProgram():
+    """Return the full path of the SPIRAL program to run, None if it cannot be found.
+    
+    The search, and the message when SPIRAL is not found, are done once per value of PATH
+    and SPIRAL_HOME.
+    """
+    sh_value = os.environ.get ( 'SPIRAL_HOME' )
+    env = (os.environ.get('PATH'), sh_value)
+    if env in _spiralPrograms:
+        return _spiralPrograms[env]
+    runprog = shutil.which(SPIRAL_EXE)
+    if runprog == None and sh_value is not None:
+        ##  Try setting full path to Spiral exe as: $SPIRAL_HOME/bin/SPIRAL_EXE
+        runprog = os.path.join ( sh_value, 'bin', SPIRAL_EXE )
+    _spiralPrograms[env] = runprog
+    if runprog == None:
+        print ( f'Can\'t run {SPIRAL_EXE}, not found in PATH and SPIRAL_HOME is undefined', flush=True )
+    return runprog
 
-def callSpiralWithFile(filename):
+
+def callSpiralWithFile(filename, cwd=None, errors=None, keepSession=True):
+    """Run SPIRAL on script filename, in directory cwd (default: current directory).
+    
+    If SPIRAL reports an error in the script, its error output is appended to the list errors
+    (if given).  Failures to run SPIRAL, crashes and timeouts are not appended.  With the
+    SPIRAL pool, keepSession=False marks a script that changes the session's global state.
+    """
+    if os.getenv(SP_SPIRALPOOL) != None:
+        return spiralPool().runFile(filename, errors, keepSession)
     try:
-        if isSpiralInPath(SPIRAL_EXE):
-            runprog = SPIRAL_EXE
-        else:
-            ##  Try setting full path to Spiral exe as: $SPIRAL_HOME/bin/SPIRAL_EXE
-            sh_value = os.environ.get ( 'SPIRAL_HOME' )
-            if sh_value is not None:
-                runprog = os.path.join ( sh_value, 'bin', SPIRAL_EXE )
-                ##  print ( f'{SPIRAL_EXE} is NOT in the user\'s path, try running program {runprog}', flush=True )
-            else:
-                print ( f'Can\'t run {SPIRAL_EXE}, not found in PATH and SPIRAL_HOME is undefined', flush=True )
-                return SPIRAL_RET_ERR
+        runprog = _spiralProgram()
+        if runprog == None:
+            return SPIRAL_RET_ERR
 
         with open(filename, 'r') as f:
-            runResult = subprocess.run(runprog, stdin=f, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            runResult = subprocess.run(runprog, stdin=f, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd)
             if runResult.returncode == 0:
                 return SPIRAL_RET_OK
             else:
                 print(runResult.stderr.decode(), file=sys.stderr)
+                # negative return codes are signals, e.g. out of memory
+                if (errors != None) and (runResult.returncode > 0):
+                    errors.append((runResult.stderr or runResult.stdout).decode(errors='replace'))
                 return SPIRAL_RET_ERR
     except OSError as ex:
         print(ex.strerror, file=sys.stderr)
@@ -90,3 +124,183 @@ def callSpiralWithFile(filename):
         pass
     return SPIRAL_RET_ERR
 
+
+_WORKER_EXITED      = 'SPIRAL worker exited\n'
+_WORKER_TIMEDOUT    = 'SPIRAL worker timed out\n'
+
+class _SpiralWorker:
+    """Long-lived SPIRAL process taking scripts on stdin."""
+
+    def __init__(self, runprog, preload, timeout):
+        self._count = 0
+        self._lines = queue.Queue()
+        self._proc = subprocess.Popen([runprog], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                      stderr=subprocess.STDOUT, text=True, bufsize=1)
+        self._reader = threading.Thread(target=self._readOutput, daemon=True)
+        self._reader.start()
+        (ok, output) = self.run(preload, timeout)
+        if not ok:
+            self.close()
+            raise RuntimeError('SPIRAL worker failed to start:\n' + output)
+
+    def _readOutput(self):
+        for line in self._proc.stdout:
+            self._lines.put(line)
+        # end of output, the process exited
+        self._lines.put(None)
+
+    def run(self, text, timeout=None):
+        """Run script text, return (ok, output)."""
+        self._count += 1
+        sentinel = SPIRAL_POOL_SENTINEL + str(self._count) + '!!'
+        try:
+            self._proc.stdin.write(text + '\nPrint("\\n' + sentinel + '\\n");\n')
+            self._proc.stdin.flush()
+        except OSError:
+            return (False, _WORKER_EXITED)
+        deadline = None if timeout == None else time.monotonic() + timeout
+        output = []
+        failed = False
+        while True:
+            try:
+                wait = None if deadline == None else max(0, deadline - time.monotonic())
+                line = self._lines.get(timeout=wait)
+            except queue.Empty:
+                output.append(_WORKER_TIMEDOUT)
+                return (False, ''.join(output))
+            if line == None:
+                output.append(_WORKER_EXITED)
+                return (False, ''.join(output))
+            if sentinel in line:
+                break
+            output.append(line)
+            # an error leaves SPIRAL in a break loop
+            if line.lstrip().startswith('Error') or ('brk>' in line):
+                failed = True
+        return (not failed, ''.join(output))
+
+    def alive(self):
+        return self._proc.poll() == None
+
+    def close(self):
+        try:
+            self._proc.stdin.write('quit;\n')
+            self._proc.stdin.close()
+            self._proc.wait(timeout=5)
+        except:
+            self._proc.kill()
+
+
+class SpiralPool:
+    """Pool of SPIRAL processes that stay loaded with the FFTX and SIMT packages.
+
+    Scripts run by the pool must write generated files to absolute paths, as the
+    workers do not share the caller's working directory.  A worker is replaced after
+    any error, crash or timeout, after a script that loads or imports packages the
+    preload did not, e.g. paradigms.vector for a vector ISA, and after a script run with
+    keepSession=False, so each script starts from the SPIRAL session of the preload.
+    """
+
+    def __init__(self, size=1, preload=SPIRAL_POOL_PRELOAD, timeout=None):
+        self._size = max(1, size)
+        self._preload = preload
+        self._preloaded = set(_PACKAGE_STATEMENT.findall(preload))
+        self._timeout = timeout
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = 0
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._workers < self._size
+            if create:
+                self._workers += 1
+        if not create:
+            return self._idle.get()
+        runprog = _spiralProgram()
+        try:
+            if runprog == None:
+                raise RuntimeError('SPIRAL not found')
+            return _SpiralWorker(runprog, self._preload, self._timeout)
+        except:
+            with self._lock:
+                self._workers -= 1
+            raise
+
+    def _release(self, worker, ok):
+        if ok and worker.alive():
+            self._idle.put(worker)
+        else:
+            worker.close()
+            with self._lock:
+                self._workers -= 1
+
+    def _keepsSession(self, text):
+        """True if script text leaves the global state of the preloaded session unchanged."""
+        return set(_PACKAGE_STATEMENT.findall(text)) <= self._preloaded
+
+    def runScript(self, text, keepSession=True):
+        """Run script text in a pooled SPIRAL process, return (SPIRAL_RET_*, output).
+        
+        keepSession=False retires the worker afterwards, for scripts that change global state.
+        """
+        try:
+            worker = self._checkout()
+        except (OSError, RuntimeError) as ex:
+            # no worker ran the script
+            return (SPIRAL_RET_ERR, str(ex) + '\n' + _WORKER_EXITED)
+        (ok, output) = worker.run(text, self._timeout)
+        # a worker whose session the script changed is not reused
+        self._release(worker, ok and keepSession and self._keepsSession(text))
+        return (SPIRAL_RET_OK if ok else SPIRAL_RET_ERR, output)
+
+    def runFile(self, filename, errors=None, keepSession=True):
+        """Run script file in a pooled SPIRAL process, return SPIRAL_RET_*.
+        
+        Output of scripts SPIRAL reports errors in is appended to the list errors (if given).
+        """
+        try:
+            with open(filename, 'r') as f:
+                text = f.read()
+        except OSError as ex:
+            print(ex.strerror, file=sys.stderr)
+            return SPIRAL_RET_ERR
+        (ret, output) = self.runScript(text, keepSession)
+        if ret != SPIRAL_RET_OK:
+            print(output, file=sys.stderr)
+            if (errors != None) and not output.endswith((_WORKER_EXITED, _WORKER_TIMEDOUT)):
+                errors.append(output)
+        return ret
+
+    def close(self):
+        """Stop all idle workers."""
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            worker.close()
+            with self._lock:
+                self._workers -= 1
+
+
+_spiralPool = None
+_spiralPoolLock = threading.Lock()
+
+def spiralPool():
+    """Return the process-wide SPIRAL pool, sized by the SP_SPIRALPOOL environment variable."""
+    global _spiralPool
+    with _spiralPoolLock:
+        if _spiralPool == None:
+            try:
+                size = int(os.getenv(SP_SPIRALPOOL, '1'))
+            except ValueError:
+                size = 1
+            _spiralPool = SpiralPool(size)
+            atexit.register(_spiralPool.close)
+        return _spiralPool
+
@@ -0,0 +1,246 @@
+# spiralpy/splitsource.py
+#
+# Copyright 2018-2023, Carnegie Mellon University
+# All rights reserved.
+#
+# See LICENSE (https://github.com/spiral-software/python-package-spiralpy/blob/main/LICENSE)
+
+"""
+SpiralPy Split Source Module
+=============================
+
+Split a generated C source into several translation units that compile in parallel.
+
+SPIRAL writes each transform into one source file, and for large sizes compiling that file
+takes longer than generating it.  The source is split at its top-level definitions: a shared
+header gets the preprocessor lines, type definitions and declarations of every function and
+global array, and the functions are distributed over units of about equal size.  File-local
+(static) names become global so the units can share them, and are prefixed with the source
+root to keep the transforms of a bundle apart.
+
+The split only understands the plain C that SPIRAL generates.  Sources it cannot parse are
+left alone and compiled whole.
+"""
+
+from .constants import *
+
+import os
+import re
+
+
+_IDENT      = re.compile(r'[A-Za-z_]\w*')
+_ATTRIBUTE  = re.compile(r'__attribute__\s*\(\(.*?\)\)', re.S)
+_STATIC     = re.compile(r'\bstatic\b\s*')
+_TYPEHEAD   = re.compile(r'\s*(typedef\b|(struct|union|enum)\b[^(=]*$)')
+
+
+def _stripComments(text):
+    """Text with comments replaced by a space, None if a comment or literal is unterminated."""
+    out = []
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c in '"\'':
+            j = i + 1
+            while j < n and text[j] != c:
+                j += 2 if text[j] == '\\' else 1
+            if j >= n:
+                return None
+            out.append(text[i:j+1])
+            i = j + 1
+        elif text.startswith('/*', i):
+            j = text.find('*/', i + 2)
+            if j < 0:
+                return None
+            out.append(' ')
+            i = j + 2
+        elif text.startswith('//', i):
+            j = text.find('\n', i)
+            i = n if j < 0 else j
+        else:
+            out.append(c)
+            i += 1
+    return ''.join(out)
+
+
+def _topLevelChunks(text):
+    """Split comment-free C text into top-level items.
+
+    Returns a list of (kind, text, head) with kind '#' for preprocessor lines, ';' for
+    declarations and '{' for function definitions, head being the text before the body.
+    Returns None if the text does not parse.
+    """
+    chunks = []
+    start = 0
+    depth = 0
+    brace = None
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c in '"\'':
+            j = i + 1
+            while j < n and text[j] != c:
+                j += 2 if text[j] == '\\' else 1
+            i = j + 1
+            continue
+        if c == '#' and depth == 0 and text[start:i].strip() == '':
+            # preprocessor line, including continuation lines
+            end = i
+            while True:
+                end = text.find('\n', end)
+                if end < 0:
+                    end = n
+                    break
+                if text[end-1] != '\\':
+                    break
+                end += 1
+            chunks.append(('#', text[i:end].strip(), None))
+            i = start = end
+            continue
+        if c == '{':
+            if depth == 0 and brace == None:
+                brace = i
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth < 0:
+                return None
+            head = text[start:brace] if brace != None else ''
+            # initializers and type definitions continue to the next ';'
+            if depth == 0 and ('=' not in head) and not _TYPEHEAD.match(head):
+                chunks.append(('{', text[start:i+1].strip(), head.strip()))
+                start = i + 1
+                brace = None
+        elif c == ';' and depth == 0:
+            chunks.append((';', text[start:i+1].strip(), None))
+            start = i + 1
+            brace = None
+        i += 1
+    if depth != 0 or text[start:].strip() != '':
+        return None
+    return chunks
+
+
+def _declaredName(head):
+    """Name declared by a declaration head, None if it declares several or none."""
+    head = _ATTRIBUTE.sub(' ', head)
+    depth = 0
+    for c in head:
+        if c in '([':
+            depth += 1
+        elif c in ')]':
+            depth -= 1
+        elif c == '=' and depth == 0:
+            break
+        elif c == ',' and depth == 0:
+            return None
+    # the declarator ends at its parameter list or array bounds, or its initializer
+    cut = re.search(r'[\(\[=;]', head)
+    end = len(head) if cut == None else cut.start()
+    if re.match(r'\(\s*\*', head[end:]):
+        # function pointer
+        return None
+    names = _IDENT.findall(head[:end])
+    return names[-1] if len(names) > 0 else None
+
+
+def splitSource(filename, units):
+    """Split generated C source filename into at most units translation units.
+
+    The units are written next to filename as <root>_part<i>.c with the shared header
+    <root>_split.h, filename itself is left in place.  Returns the list of the units'
+    source roots (file names without extension), or None if the source was not split
+    because it is too small or cannot be parsed.
+    """
+    root = os.path.splitext(os.path.basename(filename))[0]
+    srcdir = os.path.dirname(filename)
+    with open(filename, 'r') as f:
+        text = _stripComments(f.read())
+    chunks = None if text == None else _topLevelChunks(text)
+    if chunks == None:
+        return None
+
+    preproc  = []
+    renames  = []
+    types    = []
+    decls    = []
+    inlines  = []
+    data     = []
+    funcs    = []
+    for (kind, chunk, head) in chunks:
+        if kind == '#':
+            preproc.append(chunk)
+        elif kind == '{':
+            if re.search(r'\binline\b', head):
+                # inline functions are compiled in every unit that uses them
+                inlines.append(chunk)
+                continue
+            name = _declaredName(head)
+            if name == None:
+                return None
+            (head, isStatic) = _STATIC.subn('', head, count=1)
+            if isStatic and not name in renames:
+                renames.append(name)
+            decls.append(head + ';')
+            funcs.append(_STATIC.sub('', chunk, count=1) if isStatic else chunk)
+        elif _TYPEHEAD.match(chunk) or re.match(r'\s*extern\b', chunk):
+            types.append(chunk)
+        else:
+            (decl, eq, init) = chunk.partition('=')
+            name = _declaredName(decl)
+            if name == None:
+                return None
+            (decl, isStatic) = _STATIC.subn('', decl.rstrip().rstrip(';'), count=1)
+            if isStatic and not name in renames:
+                renames.append(name)
+            if eq == '' and re.search(r'\)\s*$', _ATTRIBUTE.sub(' ', decl)):
+                # function prototype
+                decls.append(decl.strip() + ';')
+            else:
+                decls.append('extern ' + decl.strip() + ';')
+                data.append(_STATIC.sub('', chunk, count=1) if isStatic else chunk)
+
+    units = min(units, len(funcs))
+    if units < 2:
+        return None
+
+    # largest functions first, each to the unit with the least code so far
+    parts = [[] for u in range(units)]
+    sizes = [0] * units
+    sizes[0] = sum([len(d) for d in data])
+    for index in sorted(range(len(funcs)), key=lambda k: -len(funcs[k])):
+        u = sizes.index(min(sizes))
+        parts[u].append(index)
+        sizes[u] += len(funcs[index])
+
+    header = root + '_split.h'
+    guard = re.sub(r'\W', '_', header).upper()
+    with open(os.path.join(srcdir, header), 'w') as f:
+        print('#ifndef ' + guard, file = f)
+        print('#define ' + guard, file = f)
+        print(file = f)
+        for line in preproc:
+            print(line, file = f)
+        print(file = f)
+        # formerly file-local names, unique per transform
+        for name in renames:
+            print('#define ' + name + ' ' + root + '_' + name, file = f)
+        print(file = f)
+        for item in types + decls + inlines:
+            print(item, file = f)
+        print(file = f)
+        print('#endif', file = f)
+
+    roots = []
+    for (u, indices) in enumerate(parts):
+        partroot = root + '_part' + str(u)
+        with open(os.path.join(srcdir, partroot + '.c'), 'w') as f:
+            print('#include "' + header + '"', file = f)
+            print(file = f)
+            for item in (data if u == 0 else []) + [funcs[k] for k in sorted(indices)]:
+                print(item, file = f)
+                print(file = f)
+        roots.append(partroot)
+    return roots
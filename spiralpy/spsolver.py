@@ -9,10 +9,22 @@
 from .constants import *
 ##  from spiralpy import *
 import spiralpy as sp
+from spiralpy.allocator import *
+from spiralpy.bufferpool import *
+from spiralpy.buildcache import *
+from spiralpy.libcache import *
+from spiralpy.locking import *
 from spiralpy.metadata import *
 from spiralpy.spiral import *
+from spiralpy.splitsource import *
+from spiralpy.toolchain import *
 
+import concurrent.futures
+import contextlib
+import copy
 import datetime
+import inspect
+import shlex
 import subprocess
 import os
 import sys
@@ -21,6 +33,7 @@ import site
 
 import tempfile
 import shutil
+import time
 
 import numpy as np
 
@@ -34,6 +47,52 @@ import sys
 
 
 
+_buildExecutor = None
+
+def _asyncBuildExecutor():
+    """Thread pool running background builds."""
+    global _buildExecutor
+    if _buildExecutor == None:
+        _buildExecutor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix='spiralpy-build')
+    return _buildExecutor
+
+
+def _dataPointer(a):
+    """Address of the data of NumPy or CuPy array a."""
+    return a.ctypes.data if isinstance(a, np.ndarray) else a.data.ptr
+
+
+class _OpenMPCall:
+    """Function of an OpenMP library, called with the solver's thread count.
+    
+    The OpenMP thread count applies to later parallel regions of the calling thread, so it
+    is set for each call and the caller's count restored after it, leaving other solvers,
+    NumPy and BLAS alone.
+    """
+    
+    def __init__(self, lib, func, threads):
+        self.func = func
+        self._threads = threads
+        self._set = lib.omp_set_num_threads
+        self._set.argtypes = [ctypes.c_int]
+        self._get = lib.omp_get_max_threads
+        self._get.restype = ctypes.c_int
+    
+    def wrap(self, func):
+        """Call of func with the same thread count."""
+        call = copy.copy(self)
+        call.func = func
+        return call
+    
+    def __call__(self, *args):
+        previous = self._get()
+        self._set(self._threads)
+        try:
+            return self.func(*args)
+        finally:
+            self._set(previous)
+
+
 class SPProblem:
     """Base class for SpiralPy problem."""
     
@@ -55,6 +114,7 @@ class SPSolver:
     """Base class for SpiralPy solver."""
     
     def __init__(self, problem: SPProblem, namebase = 'func', opts = {}):
+        self._constructStart = time.perf_counter()
         self._problem = problem
         self._opts = opts
         self._colMajor = self._opts.get(SP_OPT_COLMAJOR, False)
@@ -65,18 +125,85 @@ class SPSolver:
         self._printRuleTree = self._opts.get(SP_OPT_PRINTRULETREE, os.getenv(SP_PRINTRULETREE) != None)
         self._tracingOn = False
         self._callGraph = []
+        self._traced = False
         self._SharedLibAccess = None
         self._MainFunc = None
         self._spiralname = 'spiral'
         self._metadata = dict()
         self._includeMetadata = self._opts.get(SP_OPT_METADATA, False)
         self._workdir = os.getenv(SP_WORKDIR)
+        self._useBuildCache = self._opts.get(SP_OPT_BUILDCACHE, os.getenv(SP_CACHE_DIR) != None)
+        self._retryFailed = self._opts.get(SP_OPT_RETRYFAILED, os.getenv(SP_RETRYFAILED) != None)
+        self._buildErrors = []
+        self._buildBackend = self._opts.get(SP_OPT_BUILDBACKEND, os.getenv(SP_BUILDBACKEND, SP_BACKEND_CMAKE))
+        
+        # explicit flags are used for compiling and linking, e.g. for -flto
+        cflags = self._opts.get(SP_OPT_CFLAGS)
+        if cflags != None:
+            cflags = shlex.split(cflags) if type(cflags) is str else list(cflags)
+            self._optProfile = SP_PROFILE_CUSTOM
+            self._profileFlags = (cflags, cflags)
+        else:
+            self._optProfile = profileName(self._opts.get(SP_OPT_OPTPROFILE, SP_PROFILE_DEFAULT))
+            self._profileFlags = profileFlags(self._optProfile)
+        if (self._genCuda or self._genHIP) and self._optProfile != SP_PROFILE_DEFAULT:
+            raise RuntimeError('optimization profiles apply to CPU libraries only')
+        self._threads = int(self._opts.get(SP_OPT_THREADS, 1))
+        if self._threads < 1:
+            raise RuntimeError('number of threads must be at least 1')
+        if (self._genCuda or self._genHIP) and self._threads > 1:
+            raise RuntimeError('OpenMP threads apply to CPU libraries only')
+        # without the option, libraries for any ISA the host supports may be used
+        self._isaConstrained = SP_OPT_VECTORISA in self._opts
+        self._vectorISA = self._opts.get(SP_OPT_VECTORISA, SP_ISA_SCALAR)
+        precision = SP_STR_SINGLE if self._opts.get(SP_OPT_REALCTYPE) == "float" else SP_STR_DOUBLE
+        (self._spiralISA, self._isaFlags) = vectorISA(self._vectorISA, precision)
+        if (self._genCuda or self._genHIP) and self._vectorISA != SP_ISA_SCALAR:
+            raise RuntimeError('vector ISAs apply to CPU libraries only')
+        # scaling of the result as by numpy.fft's norm argument, part of the generated code
+        self._norm = self._opts.get(SP_OPT_NORM, SP_NORM_BACKWARD)
+        if not self._norm in (SP_NORM_BACKWARD, SP_NORM_ORTHO, SP_NORM_FORWARD):
+            msg = 'invalid norm "' + str(self._norm) + '", expected one of backward, ortho, forward'
+            raise RuntimeError(msg)
+        if (self._norm != SP_NORM_BACKWARD) and not self._supportsNorm():
+            msg = type(self).__name__ + ' does not support norm modes other than backward'
+            raise RuntimeError(msg)
+        # the generated function overwrites its input with the result
+        self._inPlace = self._opts.get(SP_OPT_INPLACE, False)
+        if self._inPlace and not self._supportsInPlace():
+            msg = type(self).__name__ + ' does not support in-place transforms with these options'
+            raise RuntimeError(msg)
+        # the runDef fallback of a background build returns new arrays, not the input
+        if self._inPlace and self._opts.get(SP_OPT_ASYNCBUILD, False):
+            raise RuntimeError('in-place transforms cannot be built in the background')
+        # large generated sources may be split into units compiled by concurrent build jobs
+        self._buildJobs = int(self._opts.get(SP_OPT_BUILDJOBS, os.getenv(SP_BUILDJOBS, os.cpu_count() or 1)))
+        if self._buildJobs < 1:
+            raise RuntimeError('number of build jobs must be at least 1')
+        split = self._opts.get(SP_OPT_SPLITSOURCES, False)
+        self._splitUnits = self._buildJobs if split is True else int(split)
+        if (self._genCuda or self._genHIP) and self._splitUnits > 1:
+            raise RuntimeError('splitting sources applies to CPU libraries only')
+        # solve() allocates outputs with numpy.zeros or, by option, an SPAllocator, or takes
+        # them from a buffer pool, its own or one shared between solvers
+        self._allocator = self._opts.get(SP_OPT_ALLOCATOR)
+        pool = self._opts.get(SP_OPT_BUFFERPOOL, False)
+        if isinstance(pool, SPBufferPool):
+            self._bufferPool = pool
+        else:
+            self._bufferPool = SPBufferPool(allocator=self._allocator) if pool else None
 
-        # find and possibly create the .libs subdirectory
+        # find and possibly create the .libs subdirectory, or the directory given by option
         # directory = Join ( site.USER_BASE, 'share', __package__, .libs )
-        self._libsDir = os.path.join(site.USER_BASE, SP_SHARE_DIR, __package__, SP_LIBSDIR)
+        self._libsDir = self._opts.get(SP_OPT_LIBDIR)
+        if self._libsDir == None:
+            self._libsDir = os.path.join(site.USER_BASE, SP_SHARE_DIR, __package__, SP_LIBSDIR)
+        self._libsDir = os.path.abspath(self._libsDir)
         os.makedirs(self._libsDir, mode=0o777, exist_ok=True)
         
+        # variants of a transform coexist under different names
+        namebase = namebase + self._variantSuffix()
+        
         if self._genCuda:
             self._namebase = namebase + '_cu'
         elif self._genHIP:
@@ -88,28 +215,41 @@ class SPSolver:
         self._initFuncName = 'init_' + self._namebase
         self._destroyFuncName = 'destroy_' + self._namebase
         
-        # check first for library built for this specific transform
-        sharedLibFullPath = os.path.join(self._libsDir, 'lib' + self._namebase + SP_SHLIB_EXT)
-
-        # if no matching specific library, look in metadata of installed libraries
-        # and create one if no matching transform is in an existing installed library
-        if not os.path.exists(sharedLibFullPath):
-            searchmd = self._metadataForSearch()
-            (path, names) = findFunctionsWithMetadata(searchmd)
-            if (type(path) is str) and (type(names) is dict) and (len(names) > 2):
-                sharedLibFullPath = path
-                self._mainFuncName    = names.get(SP_KEY_EXEC, self._mainFuncName)
-                self._initFuncName    = names.get(SP_KEY_INIT, self._initFuncName)
-                self._destroyFuncName = names.get(SP_KEY_DESTROY, self._destroyFuncName)
-            else:
-                self._setupCFuncs(self._namebase)
-
-        self._SharedLibAccess = ctypes.CDLL(sharedLibFullPath)
-        self._MainFunc = getattr(self._SharedLibAccess, self._mainFuncName)
-        if self._MainFunc == None:
-            msg = 'could not find function: ' + self._mainFuncName
-            raise RuntimeError(msg)
-        self._initFunc()
+        self._libReady = False
+        self._fusedNorm = False
+        self._buildFuture = None
+        self._report = {SP_KEY_NAMEBASE:self._namebase, SP_KEY_PHASES:dict()}
+        
+        # solver only describes its transform, e.g. for a bundle build
+        if self._opts.get(SP_OPT_NOBUILD, False):
+            return
+        
+        # create library if no matching transform is in an existing installed library,
+        # with the build cache libraries are only found by the content of their build
+        try:
+            sharedLibFullPath = None
+            if not self._useBuildCache:
+                with self._phase(SP_PHASE_RESOLVE):
+                    sharedLibFullPath = self._resolveLibrary()
+                if sharedLibFullPath != None:
+                    self._report[SP_KEY_SOURCE] = SP_LIB_INSTALLED
+            # a library another process pruned before it was loaded is built again
+            if (sharedLibFullPath == None) or not self._loadLibrary(sharedLibFullPath):
+                if self._opts.get(SP_OPT_ASYNCBUILD, False):
+                    # trace here, runDef of the fallback solve() would add to the call graph
+                    # while a build thread traces
+                    with self._phase(SP_PHASE_TRACE):
+                        self._trace()
+                    self._traced = True
+                    # solve() uses runDef until the background build is loaded
+                    self.solve = self._solveWhileBuilding
+                    self._buildFuture = _asyncBuildExecutor().submit(self._buildInBackground)
+                    return
+                self._buildAndLoad()
+        except Exception as ex:
+            self._finishReport(ex)
+            raise
+        self._finishReport()
 
     def __del__(self):
         try:
@@ -118,38 +258,331 @@ class SPSolver:
         except:
             pass
     
+    @contextlib.contextmanager
+    def _phase(self, name):
+        """Time the enclosed block, adding the seconds to phase name of the build report."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases = self._report[SP_KEY_PHASES]
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+    
+    def _finishReport(self, error=None):
+        """Complete the build report, and append it to the SP_BUILDLOG file if defined."""
+        self._report[SP_KEY_ELAPSED] = time.perf_counter() - self._constructStart
+        if error != None:
+            self._report[SP_KEY_ERROR] = str(error)
+        logfile = os.getenv(SP_BUILDLOG)
+        if logfile == None:
+            return
+        entry = dict(self.buildReport())
+        entry[SP_KEY_TIMESTAMP] = datetime.datetime.now().isoformat()
+        entry[SP_KEY_PID] = os.getpid()
+        try:
+            # one short append per line, so lines of concurrent processes do not interleave
+            with open(logfile, 'a') as f:
+                f.write(json.dumps(entry, sort_keys=True) + '\n')
+        except OSError as ex:
+            print('Warning: could not write build log ' + logfile + ': ' + str(ex), file=sys.stderr)
+    
+    def buildReport(self):
+        """Timings and details of how this solver's library was found or built.
+        
+        A dict with the Namebase, the Source of the library (Installed, Cached or Built),
+        its Library path, the build Backend and CacheKey/CacheHit with the build cache,
+        the total Elapsed seconds of construction, and Phases mapping each timed phase to
+        seconds.  Error holds the message of a failed construction.
+        """
+        report = dict(self._report)
+        report[SP_KEY_PHASES] = dict(self._report[SP_KEY_PHASES])
+        return report
+    
+    def _variantSuffix(self):
+        """Namebase suffix of the code variant: in-place, norm, vector ISA, threads and optimization profile."""
+        suffix = ''
+        if self._inPlace:
+            suffix += '_ip'
+        if self._norm != SP_NORM_BACKWARD:
+            suffix += '_' + self._norm
+        if self._vectorISA != SP_ISA_SCALAR:
+            suffix += '_' + self._vectorISA
+        if self._threads > 1:
+            suffix += '_t' + str(self._threads)
+        if self._optProfile == SP_PROFILE_CUSTOM:
+            suffix += '_o' + buildCacheKey(self._profileFlags[0])[:8]
+        elif self._optProfile != SP_PROFILE_DEFAULT:
+            suffix += '_' + self._optProfile.replace('+', '_')
+        return suffix
+    
+    def _resolveLibrary(self):
+        """Return path of a library providing this transform, None if there is none."""
+        
+        # check first for library built for this specific transform, unless the
+        # vector ISA is open and a faster variant may be installed
+        sharedLibFullPath = os.path.join(self._libsDir, 'lib' + self._namebase + SP_SHLIB_EXT)
+        if self._isaConstrained and os.path.exists(sharedLibFullPath):
+            return sharedLibFullPath
+
+        # look in metadata of installed libraries
+        searchmd = self._metadataForSearch()
+        (path, names) = findFunctionsWithMetadata(searchmd, self._libsDir)
+        if (type(path) is str) and (type(names) is dict) and (len(names) > 2):
+            self._mainFuncName    = names.get(SP_KEY_EXEC, self._mainFuncName)
+            self._initFuncName    = names.get(SP_KEY_INIT, self._initFuncName)
+            self._destroyFuncName = names.get(SP_KEY_DESTROY, self._destroyFuncName)
+            return path
+        
+        if os.path.exists(sharedLibFullPath):
+            return sharedLibFullPath
+        return None
+        
+    def _loadLibrary(self, sharedLibFullPath):
+        """Load library, find the main function and call the init function.
+        
+        Returns False if the library was removed, e.g. pruned by another process, before
+        it could be loaded.
+        """
+        self._report[SP_KEY_LIBRARY] = sharedLibFullPath
+        inLibsDir = (os.path.dirname(sharedLibFullPath) == self._libsDir)
+        with self._phase(SP_PHASE_LOAD):
+            # pruning removes libraries of .libs while holding their lock
+            with (libraryLock(sharedLibFullPath) if inLibsDir else contextlib.nullcontext()):
+                if not os.path.exists(sharedLibFullPath):
+                    return False
+                self._SharedLibAccess = ctypes.CDLL(sharedLibFullPath)
+            self._MainFunc = getattr(self._SharedLibAccess, self._mainFuncName)
+        if inLibsDir:
+            recordLibraryUse(self._libsDir, os.path.basename(sharedLibFullPath))
+        if self._MainFunc == None:
+            msg = 'could not find function: ' + self._mainFuncName
+            raise RuntimeError(msg)
+        # functions built before normalization was generated leave it to solve()
+        self._fusedNorm = (self._functionNorm(sharedLibFullPath) != None)
+        initFunc = self._initFunc
+        if self._threads > 1:
+            try:
+                self._MainFunc = _OpenMPCall(self._SharedLibAccess, self._MainFunc, self._threads)
+                initFunc = self._MainFunc.wrap(initFunc)
+            except AttributeError:
+                # library without the OpenMP runtime
+                pass
+        with self._phase(SP_PHASE_INIT):
+            initFunc()
+        self._libReady = True
+        return True
+    
+    def _buildAndLoad(self):
+        """Build the library, or use the one another process installed meanwhile, and load it."""
+        for attempt in range(2):
+            if self._loadLibrary(self._buildWithLock(self._namebase)):
+                return
+        raise RuntimeError('library ' + self._namebase + ' was removed before it could be loaded')
+        
+    def _functionNorm(self, sharedLibFullPath):
+        """Norm recorded for the main function in the library's metadata, None if not recorded.
+        
+        Libraries of solvers without metadata are found by name only, which includes the norm.
+        """
+        if not self._includeMetadata:
+            return self._norm
+        try:
+            metadata = metadataInFile(sharedLibFullPath)
+        except (OSError, ValueError):
+            return None
+        if metadata == None:
+            return None
+        for xform in metadata.get(SP_KEY_TRANSFORMS, []):
+            if xform.get(SP_KEY_NAMES, dict()).get(SP_KEY_EXEC) == self._mainFuncName:
+                return xform.get(SP_KEY_NORM)
+        return None
+        
+    def _buildInBackground(self):
+        """Build library on a build thread, then load it."""
+        try:
+            self._buildAndLoad()
+        except Exception as ex:
+            self._finishReport(ex)
+            raise
+        self._finishReport()
+        # switch solve() over to the compiled kernel
+        del self.solve
+        return self
+        
+    def _solveWhileBuilding(self, *args, **kwargs):
+        """Serve solve() through runDef until the background build has loaded."""
+        if self._libReady:
+            return type(self).solve(self, *args, **kwargs)
+        nargs = len(inspect.signature(self.runDef).parameters)
+        dst = kwargs.get('dst', args[nargs] if len(args) > nargs else None)
+        res = self._fallbackSolve(*args[:nargs])
+        if type(dst) == type(None):
+            return res
+        dst[...] = res
+        return dst
+        
+    def _fallbackSolve(self, *args):
+        """Result of solve() computed with the internal Python definition."""
+        return self.runDef(*args)
+        
+    def buildFuture(self):
+        """Future that resolves to this solver once its library is loaded."""
+        if self._buildFuture == None:
+            self._buildFuture = concurrent.futures.Future()
+            self._buildFuture.set_result(self)
+        return self._buildFuture
+        
+    def isReady(self):
+        """True when solve() calls the SPIRAL-generated function."""
+        return self._libReady
+    
     def solve(self):
         raise NotImplementedError()
 
+    def _normalize(self, dst):
+        """Scale the result of the generated function in dst in place, as solve() does.
+        
+        The scaling is part of the generated function, solvers only scale here for libraries
+        built before it was.
+        """
+        return dst
+
+    def _supportsNorm(self):
+        """True if the solver scales its result by the norm mode, not only as backward."""
+        return False
+
+    def _supportsInPlace(self):
+        """True if the solver can generate an in-place transform with its options."""
+        return False
+
+    def _inPlaceSpec(self, spec):
+        """SPIRAL transform spec, marked in-place for an in-place solver."""
+        return 'Inplace(' + spec + ')' if self._inPlace else spec
+
+    def _inPlaceDst(self, src, dst):
+        """Return the array an in-place solve() writes to, src, after checking dst is src."""
+        if (type(dst) != type(None)) and (_dataPointer(dst) != _dataPointer(src)):
+            raise RuntimeError('in-place solver requires dst to be src')
+        return src
+
+    def allocator(self):
+        """The SPAllocator solve() allocates outputs with, None without SP_OPT_ALLOCATOR."""
+        return self._allocator
+
+    def bufferPool(self):
+        """The SPBufferPool solve() allocates outputs from, None without SP_OPT_BUFFERPOOL."""
+        return self._bufferPool
+
+    def _empty(self, xp, shape, dtype, order='C'):
+        """Array for a result the generated function overwrites, from the buffer pool if any."""
+        if self._bufferPool != None:
+            return self._bufferPool.empty(xp, shape, dtype, order)
+        if self._allocator == None:
+            return xp.zeros(shape, dtype, order=order)
+        return self._allocator.zeros(xp, shape, dtype, order)
+
+    def _contiguous(self, xp, a):
+        """C-contiguous copy of array a, in a buffer allocated as for results."""
+        buf = self._empty(xp, a.shape, a.dtype)
+        buf[...] = a
+        return buf
+
+    def _normSize(self):
+        """Number of points of the transform, as used by the norm."""
+        return int(np.prod(self._problem.dimensions()))
+
+    def _normScale(self):
+        """SPIRAL expression of the factor the generated function scales by, None for no scaling."""
+        n = self._normSize()
+        if self._norm == SP_NORM_ORTHO:
+            # fixed format of sqrt(N) >= 1, never in e-notation, and exact for squares
+            return '1/' + ('%.17g' % np.sqrt(n))
+        inverse = (self._problem.direction() == SP_INVERSE)
+        if inverse == (self._norm == SP_NORM_BACKWARD):
+            return '1/' + str(n)
+        return None
+
+    def _scaledSpec(self, spec):
+        """SPIRAL transform spec with the scaling of the norm applied."""
+        scale = self._normScale()
+        if scale == None:
+            return spec
+        return 'Scale(' + scale + ', ' + spec + ')'
+
+    def _planArgs(self):
+        """Arrays the solver passes to the generated function after the caller's arguments."""
+        return []
+
+    def plan(self):
+        """Return an SPPlan executing this solver's generated function with little overhead."""
+        return SPPlan(self)
+
     def runDef(self):
         raise NotImplementedError()
         
     def _writeScript(self, script_file):
         raise NotImplementedError()
+        
+    def _writeVariantOpts(self, script_file):
+        """Write SPIRAL options of the CPU code variant, after opts is defined."""
+        if self._genCuda or self._genHIP:
+            return
+        if self._spiralISA != None:
+            isa = self._spiralISA
+            print('ImportAll(paradigms.vector);', file = script_file)
+            print('opts.vector := rec(isa := ' + isa + ');', file = script_file)
+            print('opts.tags := Concat([AVecReg(' + isa + ')], opts.tags);', file = script_file)
+            print('Append(opts.includes, ' + isa + '.includes());', file = script_file)
+        if self._threads > 1:
+            print('opts.tags := Concat([AParSMP(' + str(self._threads) + ')], opts.tags);', file = script_file)
+            print('opts.unparser := CopyFields(opts.unparser, OpenMP_UnparseMixin);', file = script_file)
     
-    def _genScript(self, filename : str):
-        self._trace()
+    def _genScript(self, filename : str, solvers=None):
+        """Write SPIRAL script generating the transforms of solvers (default self).
+        
+        Tracing and writing are timed as the separate phases trace and script, solvers
+        traced before, for a background build, are not traced again.
+        """
+        if solvers == None:
+            solvers = [self]
         try:
             script_file = open(filename, 'w')
         except:
             print('Error: Could not open ' + filename + ' for writing', file=sys.stderr)
             return
         timestr = datetime.datetime.now().strftime("%a %b %d %H:%M:%S %Y")
-        print(file = script_file)
-        print("# SPIRAL script generated by " + type(self).__name__, file = script_file)
-        print('# ' + timestr, file = script_file)
-        print(file = script_file)
-        self._writeScript(script_file)
+        for solver in solvers:
+            if not solver._traced:
+                with self._phase(SP_PHASE_TRACE):
+                    solver._trace()
+            with self._phase(SP_PHASE_SCRIPT):
+                print(file = script_file)
+                print("# SPIRAL script generated by " + type(solver).__name__, file = script_file)
+                print('# ' + timestr, file = script_file)
+                print(file = script_file)
+                solver._writeScript(script_file)
         script_file.close()
         
+    def _sourcePath(self, script_file):
+        """Absolute root path for PrintTo of generated source, next to script_file."""
+        path = os.path.join(os.path.dirname(os.path.abspath(script_file.name)), self._namebase)
+        # forward slashes need no escaping in SPIRAL strings, also on Windows
+        return path.replace('\\', '/')
+        
     def _setFunctionMetadata(self, obj):
         pass
         
-    def _buildMetadata(self):
+    def _buildMetadata(self, solvers=None):
+        if solvers == None:
+            solvers = [self]
         md = self._metadata
-        md[SP_KEY_SPIRALBUILDINFO] = spiralBuildInfo()
+        md[SP_KEY_SPIRALBUILDINFO] = cachedSpiralBuildInfo()
+        md[SP_KEY_TRANSFORMS] = [ solver._functionMetadata() for solver in solvers ]
+        md[SP_KEY_TRANSFORMTYPES] = sorted(set([ fm.get(SP_KEY_TRANSFORMTYPE) for fm in md[SP_KEY_TRANSFORMS] ]))
+        
+    def _functionMetadata(self):
+        """Metadata describing this solver's generated functions."""
         funcmeta = dict()
-        md[SP_KEY_TRANSFORMS] = [ funcmeta ]
         funcmeta[SP_KEY_DIRECTION]  = SP_STR_INVERSE if self._problem.direction() == SP_INVERSE else SP_STR_FORWARD
         funcmeta[SP_KEY_PRECISION] = SP_STR_SINGLE if self._opts.get(SP_OPT_REALCTYPE) == "float" else SP_STR_DOUBLE
         funcmeta[SP_KEY_TRANSFORMTYPE] = SP_TRANSFORM_UNKNOWN
@@ -160,15 +593,37 @@ class SPSolver:
         names[SP_KEY_EXEC] = self._mainFuncName
         names[SP_KEY_INIT] = self._initFuncName
         names[SP_KEY_DESTROY] = 'destroy_' + self._namebase
+        funcmeta[SP_KEY_CPUFEATURES] = self._cpuFeatures()
+        self._setBuildMetadata(funcmeta)
         self._setFunctionMetadata(funcmeta)
-        md[SP_KEY_TRANSFORMTYPES] = [ funcmeta.get(SP_KEY_TRANSFORMTYPE) ]
+        return funcmeta
+    
+    def _cpuFeatures(self):
+        """CPU features the generated code requires to run."""
+        features = set(isaFeatures(self._vectorISA))
+        # -march=native code may use any instruction of the build host, so it requires all
+        # of the host's features, and never runs elsewhere if they are unknown
+        if any([flag.startswith('-march') for flag in self._profileFlags[0]]):
+            features.update(hostCPUFeatures() or [SP_FEATURE_UNKNOWNHOST])
+        return sorted(features)
     
-    def _createMetadataFile(self, basename):
-        """Write metadata source file."""
+    def _setBuildMetadata(self, obj):
+        """Add the build variant (in-place, norm, vector ISA, threads, optimization profile) to function metadata obj."""
+        obj[SP_KEY_INPLACE] = self._inPlace
+        obj[SP_KEY_NORM] = self._norm
+        obj[SP_KEY_VECTORISA] = self._vectorISA
+        obj[SP_KEY_THREADS] = self._threads
+        obj[SP_KEY_OPTPROFILE] = self._optProfile
+        if self._optProfile == SP_PROFILE_CUSTOM:
+            obj[SP_KEY_COMPILEFLAGS] = self._profileFlags[0]
+    
+    def _createMetadataFile(self, basename, builddir, solvers=None):
+        """Write metadata source file into builddir."""
         varname  = basename + SP_METAVAR_EXT
-        filename = basename + SP_METAFILE_EXT
-        self._buildMetadata()
-        writeMetadataSourceFile(self._metadata, varname, filename) 
+        filename = os.path.join(builddir, basename + SP_METAFILE_EXT)
+        with self._phase(SP_PHASE_METADATA):
+            self._buildMetadata(solvers)
+            writeMetadataSourceFile(self._metadata, varname, filename) 
 
     def _metadataForSearch(self):
         funcmeta = dict()
@@ -177,97 +632,346 @@ class SPSolver:
         funcmeta[SP_KEY_TRANSFORMTYPE] = SP_TRANSFORM_UNKNOWN
         funcmeta[SP_KEY_DIMENSIONS] = self._problem.dimensions()
         funcmeta[SP_KEY_PLATFORM] = self._opts.get(SP_OPT_PLATFORM, SP_CPU)
+        self._setBuildMetadata(funcmeta)
         self._setFunctionMetadata(funcmeta)
+        if not self._isaConstrained:
+            del funcmeta[SP_KEY_VECTORISA]
         return funcmeta
 
-    def _callSpiral(self, script):
-        """Run SPIRAL with script as input."""
+    def _callSpiral(self, script, builddir):
+        """Run SPIRAL with script as input, in builddir."""
         if self._genCuda:
             print ( 'Generating CUDA', flush = True )
         elif self._genHIP:
             print ( 'Generating HIP', flush = True )
         else:
             print ( 'Generating C', flush = True )
-        return callSpiralWithFile(script)
+        # options of vector ISA and OpenMP variants may change the session's global state
+        variant = (self._spiralISA != None) or (self._threads > 1)
+        return callSpiralWithFile(script, builddir, self._buildErrors, keepSession=not variant)
 
-    def _callCMake (self, basename):
+    def _cmakeOptions(self, basename, roots=None, units=None):
+        """CMake cache definitions, except install directory, for building basename.
+        
+        units lists the source roots compiled when the generated sources were split.
+        """
+        opts = ['-DFILEROOT:STRING=' + basename]
+        # always set, so building the whole sources after a failed split build does not
+        # reuse the units from the CMake cache of the same build directory
+        sourceRoots = units if units != None else (roots if roots != None else [basename])
+        opts.append('-DFILEROOTS:STRING=' + ';'.join(sourceRoots))
+        if self._genCuda:
+            opts.append('-DHASCUDA=1')
+        elif self._genHIP:
+            opts += ['-DHASHIP=1', '-DCMAKE_CXX_COMPILER=hipcc']
+            
+        if self._withMPI:
+            opts.append('-DHASMPI=1')
+            
+        if self._includeMetadata or roots != None:
+            opts.append('-DHAS_METADATA=1')
+            
+        if self._threads > 1:
+            opts.append('-DHASOPENMP=1')
+            
+        (cflags, ldflags) = self._codeFlags()
+        if len(cflags) > 0:
+            opts.append('-DSP_COMPILE_FLAGS:STRING=' + ';'.join(cflags))
+        if len(ldflags) > 0:
+            opts.append('-DSP_LINK_FLAGS:STRING=' + ';'.join(ldflags))
+        return opts
+
+    def _callCMake (self, basename, builddir, roots=None, libsDir=None, units=None):
         ##  Assumes:  SPIRAL_HOME is defined (environment variable) or override on command line
-        ##  FILEROOT = basename;
+        ##  FILEROOT = basename; FILEROOTS = roots, the generated sources of a bundle
+        ##  builddir is both the CMake source and binary directory
         
         print ( 'Compiling and linking', flush = True )
         
-        # copy module CMakeLists to current directory
+        # copy module CMakeLists to the build directory
         module_dir = os.path.dirname(__file__)
         cmfile = os.path.join(module_dir, 'CMakeLists.txt')
-        shutil.copy(cmfile, os.getcwd())
+        shutil.copy(cmfile, builddir)
 
-        cmake_defroot = '-DFILEROOT:STRING=' + basename
+        configure = ['cmake'] + self._cmakeOptions(basename, roots, units)
+        configure.append('-DPY_LIBS_DIR=' + (self._libsDir if libsDir == None else libsDir))
+        configure += ['-S', builddir, '-B', builddir]
+        ##  NOTE: Ensure Python installed on Windows is 64 bit
+        build = ['cmake', '--build', builddir, '--config', 'Release', '--target', 'install', '--parallel', str(self._buildJobs)]
         
-        cmd = 'cmake ' + cmake_defroot
-        if self._genCuda:
-            cmd += ' -DHASCUDA=1'
-        elif self._genHIP:
-            cmd += ' -DHASHIP=1 -DCMAKE_CXX_COMPILER=hipcc'    
-            
-        if self._withMPI:
-            cmd += ' -DHASMPI=1'
-            
-        if self._includeMetadata:
-            cmd += ' -DHAS_METADATA=1'
-
-        cmd += ' -DPY_LIBS_DIR=' + self._libsDir
+        self._report[SP_KEY_BACKEND] = SP_BACKEND_CMAKE
+        for (phase, cmd) in [(SP_PHASE_CONFIGURE, configure), (SP_PHASE_COMPILE, build)]:
+            with self._phase(phase):
+                runResult = subprocess.run(cmd, cwd=builddir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if runResult.returncode != 0:
+                # configure errors come from the environment, e.g. SPIRAL_HOME, not the sources
+                self._buildError(runResult, record=(phase != SP_PHASE_CONFIGURE))
+                break
         
-        if sys.platform == 'win32':
-            ##  NOTE: Ensure Python installed on Windows is 64 bit
-            cmd += ' . && cmake --build . --config Release --target install'
-        else:
-            cmd += ' . && make install'
-            
-        runResult = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        return runResult.returncode
+    
+    def _useDirectCompiler(self):
+        """True when the library is built by calling the C compiler without CMake."""
+        if self._buildBackend != SP_BACKEND_CC:
+            return False
+        if self._genCuda or self._genHIP or self._withMPI:
+            return False
+        return (directCompiler() != None) and (spiralIncludeDirs() != None)
+    
+    def _codeFlags(self):
+        """(compile flags, link flags) of the optimization profile and vector ISA."""
+        (cflags, ldflags) = self._profileFlags
+        return (cflags + self._isaFlags, ldflags)
+    
+    def _variantFlags(self):
+        """(compile flags, link flags) of the code variant for the direct compiler."""
+        (cflags, ldflags) = self._codeFlags()
+        if self._threads > 1:
+            cflags = cflags + SP_CC_OPENMP
+            ldflags = ldflags + SP_CC_OPENMP
+        return (cflags, ldflags)
+    
+    def _callCompiler(self, basename, builddir, roots=None, libsDir=None, units=None):
+        """Compile and link CPU library in builddir with the C compiler, then install it."""
+        
+        print ( 'Compiling and linking', flush = True )
+        
+        (compiler, cflags, ldflags) = directCompiler()
+        sourceRoots = units if units != None else (roots if roots != None else [basename])
+        sources = [root + '.c' for root in sourceRoots]
+        if self._includeMetadata or roots != None:
+            sources.append(basename + SP_METAFILE_EXT)
+        sources = [os.path.join(builddir, src) for src in sources]
+        incdirs = ['-I' + d for d in [builddir] + spiralIncludeDirs()]
+        libname = os.path.join(builddir, 'lib' + basename + SP_SHLIB_EXT)
+        
+        (profileCFlags, profileLDFlags) = self._variantFlags()
+        cflags = cflags + profileCFlags
+        ldflags = ldflags + profileLDFlags
+        self._report[SP_KEY_BACKEND] = SP_BACKEND_CC
+        with self._phase(SP_PHASE_COMPILE):
+            if self._buildJobs > 1 and len(sources) > 1:
+                # compile the sources concurrently, then link the objects
+                objects = [os.path.splitext(src)[0] + '.o' for src in sources]
+                cmds = [[compiler] + cflags + incdirs + ['-c', src, '-o', obj] for (src, obj) in zip(sources, objects)]
+                cmds.append([compiler] + cflags + objects + ['-o', libname] + ldflags)
+            else:
+                cmds = [[compiler] + cflags + incdirs + sources + ['-o', libname] + ldflags]
+            runResult = self._runCommands(cmds, builddir)
         if runResult.returncode != 0:
-            print(runResult.stderr.decode(), file=sys.stderr)
+            self._buildError(runResult)
+            return runResult.returncode
         
-        return runResult.returncode
+        libsDir = self._libsDir if libsDir == None else libsDir
+        os.makedirs(libsDir, mode=0o777, exist_ok=True)
+        shutil.copy(libname, libsDir)
+        return 0
+    
+    def _buildError(self, runResult, record=True):
+        """Print the error output of failed build command runResult, and keep it for the failure record."""
+        text = (runResult.stderr or runResult.stdout).decode(errors='replace')
+        print(text, file=sys.stderr)
+        # negative return codes are signals, e.g. out of memory, which may not recur
+        if record and runResult.returncode > 0:
+            self._buildErrors.append(text)
+    
+    def _failureKey(self, cachekey):
+        """Key of failure records, the build cache key plus the environment the tools depend on."""
+        return buildCacheKey([cachekey] + [os.getenv(var, '') for var in SP_FAILURE_ENV])
+    
+    def _recordFailure(self, failurekey, phase):
+        """Record the failed build with failurekey, if the build tools reported errors."""
+        if len(self._buildErrors) == 0:
+            return
+        record = {SP_KEY_NAMEBASE:self._namebase, SP_KEY_PHASE:phase, SP_KEY_ERROR:'\n'.join(self._buildErrors),
+                  SP_KEY_TIMESTAMP:datetime.datetime.now().isoformat()}
+        failureStore(failurekey, record)
+    
+    def _runCommands(self, cmds, builddir):
+        """Run all but the last of cmds concurrently with up to buildjobs processes, then the last.
+        
+        Returns the result of the first command that failed, or of the last command.
+        """
+        run = lambda cmd: subprocess.run(cmd, cwd=builddir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self._buildJobs) as pool:
+            results = list(pool.map(run, cmds[:-1]))
+        for runResult in results:
+            if runResult.returncode != 0:
+                return runResult
+        return run(cmds[-1])
+    
+    def _splitSources(self, basename, builddir, roots=None):
+        """Split the generated sources in builddir into translation units.
+        
+        Returns the source roots of the units, None if no source was split.
+        """
+        units = []
+        split = False
+        with self._phase(SP_PHASE_SPLIT):
+            for root in (roots if roots != None else [basename]):
+                parts = splitSource(os.path.join(builddir, root + '.c'), self._splitUnits)
+                split = split or (parts != None)
+                units += parts if parts != None else [root]
+        return units if split else None
+    
+    def _buildLibrary(self, basename, builddir, roots=None, libsDir=None):
+        """Compile sources in builddir and install library with the selected build backend."""
+        units = self._splitSources(basename, builddir, roots) if self._splitUnits > 1 else None
+        if units != None:
+            if self._compileLibrary(basename, builddir, roots, libsDir, units) == 0:
+                return 0
+            print ( 'Split build failed, compiling the whole sources', flush = True )
+        return self._compileLibrary(basename, builddir, roots, libsDir)
+    
+    def _compileLibrary(self, basename, builddir, roots=None, libsDir=None, units=None):
+        """Compile and install library with the selected build backend, falling back to CMake."""
+        if self._useDirectCompiler():
+            if self._callCompiler(basename, builddir, roots, libsDir, units) == 0:
+                return 0
+            print ( 'Direct compile failed, falling back to CMake', flush = True )
+        return self._callCMake(basename, builddir, roots, libsDir, units)
             
-    def _setupCFuncs(self, basename):
-        # if workdir specified, cd to it
+    def _buildCacheKey(self, basename, builddir, roots=None):
+        """Build cache key of library basename, whose script was generated in builddir."""
+        with open(os.path.join(builddir, basename + '.g'), 'r') as f:
+            lines = f.read().splitlines()
+        # drop timestamp comments and the random build directory from the script text
+        text = '\n'.join([line for line in lines if not line.startswith('#')])
+        text = text.replace(os.path.abspath(builddir).replace('\\', '/'), '')
+        with open(os.path.join(os.path.dirname(__file__), 'CMakeLists.txt'), 'r') as f:
+            cmakelists = f.read()
+        platform = self._opts.get(SP_OPT_PLATFORM, SP_CPU)
+        compiler = None
+        if self._useDirectCompiler():
+            (compiler, cflags, ldflags) = directCompiler()
+            (variantCFlags, variantLDFlags) = self._variantFlags()
+            buildopts = ' '.join([SP_BACKEND_CC] + cflags + ldflags + variantCFlags + variantLDFlags)
+        else:
+            buildopts = ' '.join(self._cmakeOptions(basename, roots)) + '\n' + cmakelists
+        if self._splitUnits > 1:
+            # split sources lose inlining across units, so they make a different library
+            buildopts += '\nsplitsources ' + str(self._splitUnits)
+        parts = [text, json.dumps(cachedSpiralBuildInfo(), sort_keys=True), compilerIdentity(platform, compiler), buildopts]
+        return buildCacheKey(parts)
+
+    def _buildWithLock(self, basename, bundle=None):
+        """Build library basename while holding its lock file in .libs.
+        
+        Only one process (or thread) builds a given library at a time.  A process that had
+        to wait uses the library installed meanwhile instead of building it again.
+        """
+        lock = libraryLock(os.path.join(self._libsDir, 'lib' + basename + SP_SHLIB_EXT))
+        with self._phase(SP_PHASE_LOCKWAIT):
+            lock.acquire()
+        try:
+            if (bundle == None) and (not self._useBuildCache):
+                with self._phase(SP_PHASE_RESOLVE):
+                    sharedLibFullPath = self._resolveLibrary()
+                if sharedLibFullPath != None:
+                    self._report[SP_KEY_SOURCE] = SP_LIB_INSTALLED
+                    return sharedLibFullPath
+            # with the build cache, _setupCFuncs finds an entry stored meanwhile
+            return self._setupCFuncs(basename, bundle)
+        finally:
+            lock.release()
+
+    def _cachedLibrary(self, path):
+        """Library to load for build cache entry path.
+        
+        With an explicit SP_OPT_LIBDIR the library is also installed there.
+        """
+        if self._opts.get(SP_OPT_LIBDIR) != None:
+            return installFile(path, self._libsDir)
+        return path
+
+    def _setupCFuncs(self, basename, bundle=None):
+        """Generate and build library basename, bundle lists the solvers it includes.
+        
+        Returns the full path of the library.
+        """
+        
+        # builds never change the working directory, so solvers can be built concurrently
+        parentdir = os.getcwd()
         if self._workdir != None:
-            try:
-                os.chdir(self._workdir)
-            except:
+            if os.path.isdir(self._workdir):
+                parentdir = os.path.abspath(self._workdir)
+            else:
                 print ( f'Could not find workdir "{self._workdir}". Using current directory.', flush = True )
     
-        # create temporary build directory and cd to it
-        cwd = os.getcwd()
-        tempdir = tempfile.mkdtemp(None, basename + '_', cwd)
-        os.chdir(tempdir)
+        # create temporary build directory
+        builddir = tempfile.mkdtemp(None, basename + '_', parentdir)
     
-        script = basename + ".g"
-        self._genScript(script)
-        ret = self._callSpiral(script)
-        if ret == SPIRAL_RET_OK:
-            if self._includeMetadata:
-                self._createMetadataFile(basename)
-        else:
-            # return to original working directory and raise error
-            os.chdir(cwd)
-            msg = 'SPIRAL error'
-            raise RuntimeError(msg)
+        libname = 'lib' + basename + SP_SHLIB_EXT
+        roots = None if bundle == None else [solver._namebase for solver in bundle]
+        script = os.path.join(builddir, basename + ".g")
+        self._genScript(script, bundle)
         
-        ret = self._callCMake(basename)
+        # failed builds are recorded under the build cache key and the environment, even
+        # without the build cache
+        with self._phase(SP_PHASE_CACHELOOKUP):
+            cachekey = self._buildCacheKey(basename, builddir, roots)
+            failurekey = self._failureKey(cachekey)
+            cachedLib = cacheLookup(cachekey, libname) if self._useBuildCache else None
+            failure = None if self._retryFailed else failureLookup(failurekey)
+        self._report[SP_KEY_CACHEKEY] = cachekey
+        if self._useBuildCache:
+            self._report[SP_KEY_CACHEHIT] = (cachedLib != None)
+        if (cachedLib != None) or (failure != None):
+            if (not self._keeptemp):
+                shutil.rmtree(builddir, ignore_errors=True)
+        if cachedLib != None:
+            self._report[SP_KEY_SOURCE] = SP_LIB_CACHED
+            with self._phase(SP_PHASE_INSTALL):
+                return self._cachedLibrary(cachedLib)
+        if failure != None:
+            self._report[SP_KEY_KNOWNFAILURE] = True
+            msg = ('SPIRAL error' if failure.get(SP_KEY_PHASE) == SP_PHASE_SPIRAL else 'Build error')
+            msg += ' in an earlier build with the same script and tools (' + str(failure.get(SP_KEY_TIMESTAMP))
+            msg += '), define ' + SP_RETRYFAILED + ' to build again:\n' + str(failure.get(SP_KEY_ERROR, ''))
+            raise RuntimeError(msg)
         
-        # return to original working directory
-        os.chdir(cwd)
+        self._report[SP_KEY_SOURCE] = SP_LIB_BUILT
+        self._buildErrors = []
+        with self._phase(SP_PHASE_SPIRAL):
+            ret = self._callSpiral(script, builddir)
+        if ret != SPIRAL_RET_OK:
+            self._recordFailure(failurekey, SP_PHASE_SPIRAL)
+            msg = 'SPIRAL error'
+            raise RuntimeError(msg)
+        if self._includeMetadata or bundle != None:
+            self._createMetadataFile(basename, builddir, bundle)
         
+        # stage the library in the build directory, then move a complete copy into
+        # the cache or .libs, so no process ever loads a partially written library
+        stageDir = os.path.join(builddir, SP_LIBSDIR)
+        ret = self._buildLibrary(basename, builddir, roots, stageDir)
         if ret != 0:
-            msg = "CMake error"
+            self._recordFailure(failurekey, SP_PHASE_COMPILE)
+            msg = "Build error"
             raise RuntimeError(msg)
+        if self._retryFailed:
+            failureClear(failurekey)
+        
+        sharedLibFullPath = os.path.join(stageDir, libname)
+        if self._useBuildCache:
+            with self._phase(SP_PHASE_CACHESTORE):
+                entry = cacheStore(cachekey, builddir, sharedLibFullPath)
+            with self._phase(SP_PHASE_INSTALL):
+                sharedLibFullPath = self._cachedLibrary(entry)
+        else:
+            with self._phase(SP_PHASE_INSTALL):
+                sharedLibFullPath = installFile(sharedLibFullPath, self._libsDir)
         
         # optionally remove temp dir
         if (not self._keeptemp):
-            shutil.rmtree(tempdir, ignore_errors=True)
+            shutil.rmtree(builddir, ignore_errors=True)
+        
+        # keep .libs within its budget, evicting least recently used libraries
+        if os.path.dirname(sharedLibFullPath) == self._libsDir:
+            with self._phase(SP_PHASE_PRUNE):
+                pruneToBudget(self._libsDir, keep=[libname])
         
-        return
+        return sharedLibFullPath
         
     def buildTestInput(self):
         raise NotImplementedError()
@@ -404,3 +1108,90 @@ class SPSolver:
             self._callGraph.insert(0, st)
         return ret
 
+
+class SPPlan:
+    """Prepared execution of a solver's generated function, for many repeated solves.
+
+    The plan calls a prototyped pointer to the generated function with the raw addresses of
+    the arrays, which are looked up again only when different arrays are passed.  Unlike
+    solve(), execute() neither allocates dst nor converts or checks the shapes of its
+    arguments: they must be contiguous arrays of the module of the solver's platform (NumPy
+    or CuPy), laid out as solve() passes them to the generated function.
+    """
+
+    def __init__(self, solver):
+        if not solver.isReady():
+            raise RuntimeError('solver library is not loaded, wait for buildFuture()')
+        self._solver = solver
+        self._gpu = solver._genCuda or solver._genHIP
+        if self._gpu and cp == None:
+            raise RuntimeError('GPU function requires CuPy')
+        self._arrayType = cp.ndarray if self._gpu else np.ndarray
+        # solve() takes the inputs and dst, the solver may add arrays of its own
+        nargs = len(inspect.signature(type(solver).solve).parameters) - 1
+        self._extra = solver._planArgs()
+        proto = ctypes.CFUNCTYPE(None, *([ctypes.c_void_p] * (nargs + len(self._extra))))
+        main = solver._MainFunc
+        if isinstance(main, _OpenMPCall):
+            self._call = main.wrap(proto(ctypes.cast(main.func, ctypes.c_void_p).value))
+        else:
+            self._call = proto(ctypes.cast(main, ctypes.c_void_p).value)
+        # as with solve(), only the address of the solver's own arrays matters, not their layout
+        self._extraPtrs = tuple([(a.data.ptr if self._gpu else a.ctypes.data) for a in self._extra])
+        self._normalize = solver._normalize
+        self._key = None
+        self._arrays = None
+        self._ptrs = None
+
+    def _pointer(self, a):
+        if not isinstance(a, self._arrayType):
+            msg = ('GPU function requires CuPy arrays' if self._gpu else 'CPU function requires NumPy arrays')
+            raise RuntimeError(msg)
+        if not (a.flags.c_contiguous or a.flags.f_contiguous):
+            raise RuntimeError('arrays must be contiguous')
+        return a.data.ptr if self._gpu else a.ctypes.data
+
+    def bind(self, dst, src, *args):
+        """Use arrays dst, src (and args, e.g. a symbol) when execute() is called without arguments."""
+        arrays = (dst, src) + args
+        ptrs = tuple([self._pointer(a) for a in arrays]) + self._extraPtrs
+        # keep the arrays alive while their addresses are in use
+        self._arrays = arrays
+        self._key = tuple(map(id, arrays))
+        self._ptrs = ptrs
+        return self
+
+    def execute(self, dst=None, src=None, *args):
+        """Run the generated function on dst, src (and args), or on the bound arrays.
+
+        Returns dst, scaled as by solve().
+        """
+        if dst is None:
+            if self._arrays == None:
+                raise RuntimeError('no arrays given or bound')
+            dst = self._arrays[0]
+        elif tuple(map(id, (dst, src) + args)) != self._key:
+            self.bind(dst, src, *args)
+        self._call(*self._ptrs)
+        self._normalize(dst)
+        return dst
+
+    def measureOverhead(self, calls=1000):
+        """Measure the per-call cost of execute() on the bound arrays.
+
+        Returns a dict with the seconds per call of the bare call of the generated function
+        (Call), of execute() (Execute), and the difference spent in Python (Overhead), which
+        includes the scaling of the result.
+        """
+        if self._arrays == None:
+            raise RuntimeError('bind arrays before measuring the overhead')
+        (call, ptrs, execute, arrays) = (self._call, self._ptrs, self.execute, self._arrays)
+        timings = dict()
+        for (key, func, args) in [(SP_KEY_CALL, call, ptrs), (SP_KEY_EXECUTE, execute, arrays)]:
+            func(*args)
+            start = time.perf_counter()
+            for i in range(calls):
+                func(*args)
+            timings[key] = (time.perf_counter() - start) / calls
+        timings[SP_KEY_OVERHEAD] = timings[SP_KEY_EXECUTE] - timings[SP_KEY_CALL]
+        return timings
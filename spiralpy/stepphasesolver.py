@@ -78,7 +78,7 @@ class StepPhaseSolver(SPSolver):
         
         if type(dst) == type(None):
             n = self._problem.dimN()  
-            dst = xp.zeros((n, n, n), src.dtype)
+            dst = self._empty(xp, (n, n, n), src.dtype)
         self._func(dst, src, amplitudes)
         return dst
                     
@@ -105,7 +105,7 @@ class StepPhaseSolver(SPSolver):
                     ctypes.cast(amplitudes.data.ptr, ctypes.POINTER(ctypes.c_void_p)))
 
     def _writeScript(self, script_file):
-        filename = self._namebase
+        filename = self._sourcePath(script_file)
         nameroot = self._namebase
         ns = str(self._problem.dimN())
         filetype = '.c'
@@ -139,6 +139,7 @@ class StepPhaseSolver(SPSolver):
         if self._opts.get(SP_OPT_REALCTYPE) == "float":
             print('opts.TRealCtype := "float";', file = script_file)
         print('Add(opts.includes, "<float.h>");',  file = script_file)
+        self._writeVariantOpts(script_file)
         print('tt := opts.tagIt(t);', file = script_file)
         print('', file = script_file)
         print('c := opts.fftxGen(tt);', file = script_file)
@@ -0,0 +1,284 @@
+# spiralpy/toolchain.py
+#
+# Copyright 2018-2023, Carnegie Mellon University
+# All rights reserved.
+#
+# See LICENSE (https://github.com/spiral-software/python-package-spiralpy/blob/main/LICENSE)
+
+"""
+SpiralPy Toolchain Module
+==========================
+
+Locate and probe the tools used to build SPIRAL-generated code.
+
+Probing a tool starts a process (SPIRAL to print its build information, compilers to print
+their version), so results are kept in a toolchain file next to .libs and reused until the
+tool's executable changes (modification time or size).
+"""
+
+from .constants import *
+from spiralpy.spiral import spiralBuildInfo, _spiralProgram
+
+import json
+import os
+import shutil
+import site
+import subprocess
+import sys
+import tempfile
+import threading
+
+
+# same optimization as CMake's Release configuration
+SP_CC_CFLAGS    = ['-O3', '-DNDEBUG', '-fPIC']
+SP_CC_LDFLAGS   = ['-shared', '-lm']
+SP_CC_OPENMP    = ['-fopenmp']
+
+# (compile, link) flags added by each optimization profile, for GCC and Clang compatible compilers,
+# profiles are combined with '+', e.g. native+fastmath
+SP_PROFILE_FLAGS = {
+    SP_PROFILE_DEFAULT:     ([], []),
+    SP_PROFILE_NATIVE:      (['-march=native'], []),
+    SP_PROFILE_FASTMATH:    (['-ffast-math'], []),
+    SP_PROFILE_LTO:         (['-flto'], ['-flto']),
+}
+
+
+_toolchain = None
+_toolchainLock = threading.Lock()
+
+def _toolchainFile():
+    return os.path.join(site.USER_BASE, SP_SHARE_DIR, __package__, SP_TOOLCHAIN_FILE)
+
+
+def _loadToolchain():
+    try:
+        with open(_toolchainFile(), 'r') as f:
+            data = json.load(f)
+        if data.get(SP_KEY_VERSION) == SP_TOOLCHAIN_VERSION:
+            return data
+    except (OSError, ValueError):
+        pass
+    return {SP_KEY_VERSION:SP_TOOLCHAIN_VERSION, SP_KEY_TOOLS:dict()}
+
+
+def _saveToolchain(data):
+    path = _toolchainFile()
+    tmpfile = path + '.' + str(os.getpid()) + '_' + str(threading.get_ident()) + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o777, exist_ok=True)
+        with open(tmpfile, 'w') as f:
+            json.dump(data, f, sort_keys=True, indent=1)
+        os.replace(tmpfile, path)
+    except OSError:
+        # not persisting only costs probing again in the next process
+        try:
+            os.remove(tmpfile)
+        except OSError:
+            pass
+
+
+def _toolInfo(kind, path, probe):
+    """Result of probe(path), reused while the file at path is unchanged.
+    
+    kind names the probe, so several probes of the same tool are stored separately.
+    """
+    global _toolchain
+    try:
+        st = os.stat(path)
+        stamp = [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return probe(path)
+    with _toolchainLock:
+        if _toolchain == None:
+            _toolchain = _loadToolchain()
+        entry = _toolchain[SP_KEY_TOOLS].get(kind, dict()).get(path)
+        if (entry != None) and (entry.get(SP_KEY_MTIME) == stamp):
+            return entry[SP_KEY_INFO]
+    info = probe(path)
+    with _toolchainLock:
+        # merge with entries other processes stored meanwhile
+        _toolchain = _loadToolchain()
+        _toolchain[SP_KEY_TOOLS].setdefault(kind, dict())[path] = {SP_KEY_MTIME:stamp, SP_KEY_INFO:info}
+        _saveToolchain(_toolchain)
+    return info
+
+
+def cachedSpiralBuildInfo():
+    """SPIRAL build information, probed once per SPIRAL executable."""
+    runprog = _spiralProgram()
+    if runprog == None:
+        return dict()
+    return _toolInfo('spiral', os.path.realpath(runprog), spiralBuildInfo)
+
+
+def _versionString(path):
+    try:
+        res = subprocess.run([path, '--version'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        return res.stdout.decode(errors='replace').strip()
+    except OSError:
+        return ''
+
+
+def compilerIdentity(platform=SP_CPU, compiler=None):
+    """Identity (path and version) of the compiler and CMake used for platform.
+
+    compiler is the compiler actually building the library, e.g. that of directCompiler();
+    by default it is the one CMake uses for platform.
+    """
+    if compiler == None:
+        if platform == SP_CUDA:
+            compiler = 'nvcc'
+        elif platform == SP_HIP:
+            compiler = 'hipcc'
+        else:
+            compiler = os.getenv('CC', 'cc')
+    ident = []
+    for prog in [compiler, 'cmake']:
+        path = shutil.which(prog)
+        version = '' if path == None else _toolInfo('version', os.path.realpath(path), _versionString)
+        ident.append(str(path) + '\n' + version)
+    return '\n'.join(ident)
+
+
+# SPIRAL vector ISA for double and single precision, compiler flags enabling the instructions,
+# and the CPU features (as named in /proc/cpuinfo) the code requires
+SP_VECTOR_ISAS = {
+    SP_ISA_SSE2:    ({SP_STR_DOUBLE:'SSE_2x64f', SP_STR_SINGLE:'SSE_4x32f'}, ['-msse2'], ['sse2']),
+    SP_ISA_AVX2:    ({SP_STR_DOUBLE:'AVX_4x64f', SP_STR_SINGLE:'AVX_8x32f'}, ['-mavx2', '-mfma'], ['avx2', 'fma']),
+    SP_ISA_AVX512:  ({SP_STR_DOUBLE:'AVX512_8x64f', SP_STR_SINGLE:'AVX512_16x32f'}, ['-mavx512f'], ['avx512f']),
+}
+
+# preference among usable variants, wider vectors first
+SP_ISA_RANK = [SP_ISA_AVX512, SP_ISA_AVX2, SP_ISA_SSE2, SP_ISA_SCALAR]
+
+
+def vectorISA(isa, precision):
+    """Return (SPIRAL ISA name, compile flags) of vector instruction set isa for precision.
+    
+    The SPIRAL ISA is None for scalar code.
+    """
+    if isa == SP_ISA_SCALAR:
+        return (None, [])
+    if not isa in SP_VECTOR_ISAS:
+        msg = 'unknown vector ISA "' + str(isa) + '", expected one of ' + ', '.join(sorted(SP_VECTOR_ISAS) + [SP_ISA_SCALAR])
+        raise RuntimeError(msg)
+    (names, cflags, features) = SP_VECTOR_ISAS[isa]
+    return (names[precision], list(cflags))
+
+
+def isaFeatures(isa):
+    """CPU features required by code for vector instruction set isa."""
+    if not isa in SP_VECTOR_ISAS:
+        return []
+    return list(SP_VECTOR_ISAS[isa][2])
+
+
+def isaRank(isa):
+    """Rank of vector instruction set isa, lower is faster."""
+    return SP_ISA_RANK.index(isa) if isa in SP_ISA_RANK else len(SP_ISA_RANK)
+
+
+def _probeHostCPUFeatures():
+    if sys.platform.startswith('linux'):
+        try:
+            with open('/proc/cpuinfo', 'r') as f:
+                for line in f:
+                    # x86 lists 'flags', Arm lists 'Features'
+                    (key, sep, value) = line.partition(':')
+                    if sep and key.strip() in ('flags', 'Features'):
+                        return set(value.split())
+        except OSError:
+            pass
+    elif sys.platform == 'darwin':
+        try:
+            res = subprocess.run(['sysctl', '-n', 'machdep.cpu.features', 'machdep.cpu.leaf7_features'],
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if res.returncode == 0:
+                return set(res.stdout.decode().lower().replace('.', '_').split())
+        except OSError:
+            pass
+    return None
+
+
+_hostCPUFeatures = None
+
+def hostCPUFeatures():
+    """Set of CPU features of this host, None if they cannot be determined."""
+    global _hostCPUFeatures
+    if _hostCPUFeatures == None:
+        _hostCPUFeatures = _probeHostCPUFeatures() or False
+    return _hostCPUFeatures or None
+
+
+def profileName(profile):
+    """Canonical name of an optimization profile, given by name, names joined by '+' or a list of names."""
+    names = profile.split('+') if type(profile) is str else list(profile)
+    for name in names:
+        if not name in SP_PROFILE_FLAGS:
+            msg = 'unknown optimization profile "' + str(name) + '", expected one of ' + ', '.join(sorted(SP_PROFILE_FLAGS))
+            raise RuntimeError(msg)
+    names = sorted(set(names) - set([SP_PROFILE_DEFAULT]))
+    return '+'.join(names) if len(names) > 0 else SP_PROFILE_DEFAULT
+
+
+def profileFlags(profile):
+    """Return (compile flags, link flags) of an optimization profile, see profileName."""
+    cflags = []
+    ldflags = []
+    for name in profileName(profile).split('+'):
+        cflags += SP_PROFILE_FLAGS[name][0]
+        ldflags += SP_PROFILE_FLAGS[name][1]
+    return (cflags, ldflags)
+
+
+def _probeDirectCompiler():
+    """Find a C compiler that builds shared libraries with the direct build flags."""
+    if sys.platform == 'win32':
+        return None
+    cc = os.getenv('CC')
+    candidates = [cc] if cc != None else ['cc', 'gcc', 'clang']
+    for compiler in candidates:
+        path = shutil.which(compiler)
+        if path == None:
+            continue
+        if _toolInfo('ccprobe', os.path.realpath(path), _compilesSharedLibrary):
+            return (path, list(SP_CC_CFLAGS), list(SP_CC_LDFLAGS))
+    return None
+
+
+def _compilesSharedLibrary(compiler):
+    """True if compiler builds a shared library with the direct build flags."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        src = os.path.join(tmpdir, 'probe.c')
+        lib = os.path.join(tmpdir, 'libprobe' + SP_SHLIB_EXT)
+        with open(src, 'w') as f:
+            print('int spiralpy_probe(void) { return 0; }', file = f)
+        cmd = [compiler] + SP_CC_CFLAGS + [src, '-o', lib] + SP_CC_LDFLAGS
+        try:
+            res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError:
+            return False
+        return res.returncode == 0 and os.path.exists(lib)
+
+
+_directCompiler = None
+
+def directCompiler():
+    """Return (compiler, cflags, ldflags) for CPU builds without CMake, None if unusable.
+
+    The compiler is probed once per process.
+    """
+    global _directCompiler
+    if _directCompiler == None:
+        _directCompiler = _probeDirectCompiler() or False
+    return _directCompiler or None
+
+
+def spiralIncludeDirs():
+    """Include directories of SPIRAL's profiler targets, None if SPIRAL_HOME is undefined."""
+    home = os.getenv('SPIRAL_HOME')
+    if home == None:
+        return None
+    targets = os.path.join(home, 'profiler', 'targets')
+    return [targets, os.path.join(targets, 'include')]
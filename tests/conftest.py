@@ -0,0 +1,80 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Fixtures for the SpiralPy tests, which run without SPIRAL installed
+
+import os
+import re
+import site
+import threading
+
+import pytest
+
+import spiralpy.spsolver
+from spiralpy.constants import *
+from spiralpy.spiral import SPIRAL_RET_ERR, SPIRAL_RET_OK
+
+
+_ENV_VARS = [SP_BUILDBACKEND, SP_BUILDJOBS, SP_BUILDLOG, SP_CACHE_DIR, SP_KEEPTEMP, SP_LIBRARY_PATH,
+             SP_LIBS_MAXCOUNT, SP_LIBS_MAXSIZE, SP_PRINTRULETREE, SP_RETRYFAILED, SP_SPIRALPOOL, SP_WORKDIR]
+
+
+class FakeSpiral:
+    """Stand-in for SPIRAL, writes a C source for each PrintTo of a script.
+
+    With proceed set to a threading.Event, SPIRAL runs wait for it, as slow builds.
+    """
+
+    def __init__(self):
+        self.scripts = []
+        self.error = None
+        self.proceed = None
+
+    def __call__(self, filename, cwd=None, errors=None, keepSession=True):
+        with open(filename, 'r') as f:
+            script = f.read()
+        self.scripts.append(script)
+        if self.proceed != None:
+            self.proceed.wait(30)
+        if self.error != None:
+            if errors != None:
+                errors.append(self.error)
+            return SPIRAL_RET_ERR
+        for path in re.findall(r'PrintTo\("([^"]+)"', script):
+            base = os.path.splitext(os.path.basename(path))[0]
+            with open(path, 'w') as f:
+                print('#include <string.h>', file = f)
+                print('static double D1[4];', file = f)
+                print('static void helper_%s(double *Y, double *X) { D1[0] = 0; }' % base, file = f)
+                print('void init_%s() { D1[0] = 1.0; }' % base, file = f)
+                if 'AParSMP(' in script:
+                    # OpenMP code reports the thread count it runs with
+                    print('int omp_get_max_threads(void);', file = f)
+                    print('void %s(double *Y, double *X) { Y[0] = omp_get_max_threads(); }' % base, file = f)
+                else:
+                    print('void %s(double *Y, double *X) { helper_%s(Y, X); memcpy(Y, X, 16); }' % (base, base), file = f)
+                print('void destroy_%s() { }' % base, file = f)
+        return SPIRAL_RET_OK
+
+
+@pytest.fixture
+def spenv(tmp_path, monkeypatch):
+    """Isolated SpiralPy environment under tmp_path with SPIRAL stubbed out.
+
+    Returns the FakeSpiral, the solvers' .libs directory is tmp_path/libs.
+    """
+    for var in _ENV_VARS:
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setattr(site, 'USER_BASE', str(tmp_path / 'base'))
+    spiralHome = tmp_path / 'spiral'
+    (spiralHome / 'profiler' / 'targets' / 'include').mkdir(parents=True)
+    monkeypatch.setenv('SPIRAL_HOME', str(spiralHome))
+    monkeypatch.setenv(SP_WORKDIR, str(tmp_path))
+    fake = FakeSpiral()
+    monkeypatch.setattr(spiralpy.spsolver, 'callSpiralWithFile', fake)
+    monkeypatch.setattr(spiralpy.spsolver, 'cachedSpiralBuildInfo', lambda: {'Version': 'test'})
+    fake.libsDir = str(tmp_path / 'libs')
+    return fake
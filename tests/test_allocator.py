@@ -0,0 +1,64 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Aligned and huge page backed allocation
+
+import numpy as np
+import pytest
+
+from spiralpy.allocator import *
+from spiralpy.bufferpool import *
+from spiralpy.constants import *
+from spiralpy.mddftsolver import *
+
+
+def test_aligned_zeros():
+    for alignment in [16, 64, 4096]:
+        arr = alignedZeros((3, 5), np.complex64, alignment=alignment)
+        assert arrayAlignment(arr) >= alignment
+        assert arr.shape == (3, 5) and arr.dtype == np.complex64 and not arr.any()
+    assert alignedZeros((3, 5), np.float64, order='F').flags.f_contiguous
+    with pytest.raises(RuntimeError, match='power of two'):
+        alignedZeros((4,), np.float64, alignment=24)
+
+
+def test_huge_pages_are_opt_in():
+    nbytes = SP_HUGEPAGE_SIZE
+    plain = SPAllocator()
+    plain.zeros(np, (nbytes // 8,), np.float64)
+    assert plain.stats()[SP_KEY_HUGEPAGEBYTES] == 0
+    huge = SPAllocator(hugePages=True, firstTouch=True)
+    arr = huge.zeros(np, (nbytes // 8,), np.float64)
+    assert not arr.any()
+    assert huge.stats()[SP_KEY_HUGEPAGEBYTES] in (0, nbytes)
+    if huge.stats()[SP_KEY_HUGEPAGEBYTES] > 0:
+        assert arrayAlignment(arr) >= SP_HUGEPAGE_SIZE
+
+
+def test_allocator_stats():
+    allocator = SPAllocator(alignment=256)
+    allocator.zeros(np, (7,), np.float64)
+    allocator.zeros(np, (3, 3), np.complex128)
+    stats = allocator.stats()
+    assert (stats[SP_KEY_ARRAYS], stats[SP_KEY_BYTES]) == (2, 56 + 144)
+    assert stats[SP_KEY_ALIGNMENT] >= 256 and allocator.alignment() == stats[SP_KEY_ALIGNMENT]
+    with pytest.raises(RuntimeError):
+        SPAllocator(alignment=3)
+
+
+def test_solvers_use_numpy_zeros_by_default(spenv):
+    opts = {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_NOBUILD:True}
+    solver = MddftSolver(MddftProblem([2, 2, 2]), dict(opts))
+    assert solver.allocator() == None
+    arr = solver._empty(np, (64, 64), np.complex128)
+    assert arr.flags.owndata and arr.base is None
+    allocator = SPAllocator(alignment=4096)
+    solver = MddftSolver(MddftProblem([2, 2, 2]), dict(opts, **{SP_OPT_ALLOCATOR:allocator}))
+    assert arrayAlignment(solver._empty(np, (64, 64), np.complex128)) >= 4096
+    # also for the arrays of the solver's buffer pool
+    solver = MddftSolver(MddftProblem([2, 2, 2]), dict(opts, **{SP_OPT_ALLOCATOR:allocator, SP_OPT_BUFFERPOOL:True}))
+    assert arrayAlignment(solver._empty(np, (5,), np.complex128)) >= 4096
+    assert allocator.stats()[SP_KEY_ARRAYS] == 2
@@ -0,0 +1,77 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Background builds, with solve() falling back to the Python definition meanwhile
+
+import shutil
+import threading
+
+import numpy as np
+import pytest
+
+from spiralpy.constants import *
+from spiralpy.mddftsolver import *
+from spiralpy.mdrconvsolver import *
+
+
+pytestmark = pytest.mark.skipif(shutil.which('cmake') == None or shutil.which('cc') == None,
+                                reason='requires CMake and a C compiler')
+
+
+def _callGraph(script):
+    """Stages of the Compose of a convolution script."""
+    lines = script.splitlines()
+    start = [i for i in range(len(lines)) if lines[i].endswith('Compose([')][0]
+    end = lines.index('        ])),', start)
+    return [line.strip() for line in lines[start + 1:end]]
+
+
+def test_solve_falls_back_while_building(spenv):
+    spenv.proceed = threading.Event()
+    solver = MddftSolver(MddftProblem([2, 2, 2]), {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_ASYNCBUILD:True})
+    assert not solver.isReady()
+    src = np.arange(8, dtype=np.complex128).reshape((2, 2, 2))
+    assert np.allclose(solver.solve(src), np.fft.fftn(src))
+    dst = np.zeros_like(src)
+    assert solver.solve(src, dst) is dst and np.allclose(dst, np.fft.fftn(src))
+    spenv.proceed.set()
+    assert solver.buildFuture().result(60) is solver
+    assert solver.isReady()
+    assert solver.buildReport()[SP_KEY_SOURCE] == SP_LIB_BUILT
+
+
+def test_background_build_errors_resolve_the_future(spenv):
+    spenv.error = 'Error, no rule applies'
+    solver = MddftSolver(MddftProblem([2, 2, 2]), {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_ASYNCBUILD:True})
+    with pytest.raises(RuntimeError, match='SPIRAL error'):
+        solver.buildFuture().result(60)
+    assert not solver.isReady()
+    src = np.ones((2, 2, 2), np.complex128)
+    assert np.allclose(solver.solve(src), np.fft.fftn(src))
+
+
+def test_solve_while_building_does_not_change_the_script(spenv, monkeypatch):
+    problem = MdrconvProblem([8, 8, 8])
+    expected = MdrconvSolver(problem, {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_NOBUILD:True})
+    expected._trace()
+    # a trace on another thread than the constructor's waits until solve() ran
+    tracing = threading.Event()
+    spenv.proceed = threading.Event()
+    constructor = threading.current_thread()
+    buildTestInput = MdrconvSolver.buildTestInput
+    def slowTestInput(self):
+        if threading.current_thread() != constructor:
+            tracing.set()
+            spenv.proceed.wait(30)
+        return buildTestInput(self)
+    monkeypatch.setattr(MdrconvSolver, 'buildTestInput', slowTestInput)
+    solver = MdrconvSolver(problem, {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_ASYNCBUILD:True})
+    tracing.wait(1)
+    (src, sym) = buildTestInput(expected)
+    assert np.allclose(solver.solve(src, sym), expected.runDef(src, sym))
+    spenv.proceed.set()
+    solver.buildFuture().exception(60)
+    assert _callGraph(spenv.scripts[0]) == [stage.strip() for stage in expected._callGraph]
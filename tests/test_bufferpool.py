@@ -0,0 +1,111 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Buffer pool reuse
+
+import shutil
+
+import numpy as np
+import pytest
+
+from spiralpy.bufferpool import *
+from spiralpy.constants import *
+from spiralpy.mddftsolver import *
+
+
+def test_reuse_after_result_is_dropped():
+    pool = SPBufferPool()
+    a = pool.empty(np, (4, 4), np.complex128)
+    addr = a.ctypes.data
+    del a
+    b = pool.empty(np, (4, 4), np.complex128)
+    assert b.ctypes.data == addr
+    stats = pool.stats()
+    assert (stats[SP_KEY_HITS], stats[SP_KEY_MISSES], stats[SP_KEY_BUFFERS]) == (1, 1, 1)
+    assert stats[SP_KEY_BYTES] == b.nbytes
+
+
+def test_no_reuse_while_in_use():
+    pool = SPBufferPool()
+    a = pool.empty(np, (8,), np.float64)
+    b = pool.empty(np, (8,), np.float64)
+    assert b.ctypes.data != a.ctypes.data
+    addr = b.ctypes.data
+    view = b[2:]
+    del b
+    assert pool.empty(np, (8,), np.float64).ctypes.data != addr
+    viewOfView = view[1:]
+    del view
+    assert pool.empty(np, (8,), np.float64).ctypes.data != addr
+    del viewOfView
+    assert pool.empty(np, (8,), np.float64).ctypes.data == addr
+
+
+def test_key_includes_shape_type_and_order():
+    pool = SPBufferPool()
+    a = pool.empty(np, (4, 2), np.float64)
+    del a
+    pool.empty(np, (2, 4), np.float64)
+    pool.empty(np, (4, 2), np.float32)
+    pool.empty(np, (4, 2), np.float64, order='F')
+    assert pool.stats()[SP_KEY_HITS] == 0
+
+
+def test_max_bytes_and_clear():
+    pool = SPBufferPool(maxBytes=100)
+    a = pool.empty(np, (8,), np.float64)
+    b = pool.empty(np, (8,), np.float64)
+    # no room for b, it is not pooled
+    assert pool.stats()[SP_KEY_BUFFERS] == 1
+    del a
+    # the free array is dropped to make room
+    c = pool.empty(np, (10,), np.float64)
+    assert pool.stats()[SP_KEY_BUFFERS] == 1
+    assert pool.stats()[SP_KEY_PEAKBYTES] == 80
+    del c
+    pool.clear()
+    assert pool.stats()[SP_KEY_BUFFERS] == 0
+    assert pool.stats()[SP_KEY_BYTES] == 0
+
+
+def test_arrays_derived_from_results_keep_them_in_use():
+    pool = SPBufferPool()
+    a = pool.empty(np, (2, 4), np.complex128, order='F')
+    assert a.flags.f_contiguous and a.flags.writeable
+    addr = a.ctypes.data
+    held = [np.asarray(a).T, memoryview(a[1:])]
+    del a
+    assert pool.empty(np, (2, 4), np.complex128, order='F').ctypes.data != addr
+    held.pop()
+    assert pool.empty(np, (2, 4), np.complex128, order='F').ctypes.data != addr
+    held.pop()
+    assert pool.empty(np, (2, 4), np.complex128, order='F').ctypes.data == addr
+
+
+def test_release():
+    pool = SPBufferPool()
+    a = pool.empty(np, (8,), np.float64)
+    addr = a.ctypes.data
+    pool.release(a[2:])
+    b = pool.empty(np, (8,), np.float64)
+    assert b.ctypes.data == addr
+    # the buffer returns once, not again when a is dropped
+    del a
+    assert pool.empty(np, (8,), np.float64).ctypes.data != addr
+    assert pool.stats()[SP_KEY_BUFFERS] == 2
+    # arrays not from a pool are ignored
+    pool.release(np.zeros(8))
+    assert pool.stats()[SP_KEY_BUFFERS] == 2
+
+
+@pytest.mark.skipif(shutil.which('cmake') == None or shutil.which('cc') == None,
+                    reason='requires CMake and a C compiler')
+def test_solver_results_from_pool(spenv):
+    solver = MddftSolver(MddftProblem([2, 2, 2]), {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_BUFFERPOOL:True})
+    src = np.ones((2, 2, 2), np.complex128)
+    addr = solver.solve(src).ctypes.data
+    assert solver.solve(src).ctypes.data == addr
+    assert solver.bufferPool().stats()[SP_KEY_HITS] == 1
@@ -0,0 +1,96 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Content-addressed build cache
+
+import os
+import shutil
+import sys
+
+import pytest
+
+import spiralpy.spsolver
+from spiralpy.buildcache import *
+from spiralpy.constants import *
+from spiralpy.mddftsolver import *
+
+
+@pytest.fixture
+def cachedir(tmp_path, monkeypatch):
+    path = tmp_path / 'cache'
+    monkeypatch.setenv(SP_CACHE_DIR, str(path))
+    return path
+
+
+def _builddir(tmp_path):
+    builddir = tmp_path / 'build'
+    builddir.mkdir()
+    (builddir / 'xform.g').write_text('script')
+    (builddir / 'xform.c').write_text('source')
+    (builddir / 'CMakeCache.txt').write_text('not cached')
+    lib = builddir / ('libxform' + SP_SHLIB_EXT)
+    lib.write_bytes(b'library')
+    return (str(builddir), str(lib))
+
+
+def test_keys():
+    key = buildCacheKey(['ab', 'c'])
+    assert key == buildCacheKey(['ab', 'c'])
+    assert len(key) == 64
+    assert key != buildCacheKey(['a', 'bc'])
+    assert key != buildCacheKey(['abc'])
+
+
+def test_store_and_lookup(tmp_path, cachedir):
+    key = buildCacheKey(['xform'])
+    libname = 'libxform' + SP_SHLIB_EXT
+    assert cacheLookup(key, libname) == None
+    (builddir, lib) = _builddir(tmp_path)
+    path = cacheStore(key, builddir, lib)
+    assert cacheLookup(key, libname) == path
+    assert path.startswith(str(cachedir))
+    entry = os.path.dirname(path)
+    assert sorted(os.listdir(entry)) == sorted(['xform.g', 'xform.c', libname])
+    # storing again keeps the existing entry
+    assert cacheStore(key, builddir, lib) == path
+    assert cacheLookup(buildCacheKey(['other']), libname) == None
+
+
+@pytest.mark.skipif(shutil.which('cmake') == None or shutil.which('cc') == None,
+                    reason='requires CMake and a C compiler')
+def test_solver_reuses_cached_library(spenv, cachedir):
+    opts = {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_BUILDCACHE:True}
+    solver = MddftSolver(MddftProblem([2, 2, 2]), dict(opts))
+    assert solver.buildReport()[SP_KEY_SOURCE] == SP_LIB_BUILT
+    os.remove(solver.buildReport()[SP_KEY_LIBRARY])
+    solver = MddftSolver(MddftProblem([2, 2, 2]), dict(opts))
+    assert solver.isReady()
+    assert solver.buildReport()[SP_KEY_SOURCE] == SP_LIB_CACHED
+    assert len(spenv.scripts) == 1
+
+
+def _fakeCompiler(tmp_path, name):
+    path = tmp_path / name
+    path.write_text('#!/bin/sh\necho ' + name + ' 1.0\n')
+    path.chmod(0o755)
+    return str(path)
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='requires a POSIX shell')
+def test_key_follows_direct_compiler(spenv, tmp_path, monkeypatch):
+    monkeypatch.delenv('CC', raising=False)
+    opts = {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_NOBUILD:True, SP_OPT_BUILDBACKEND:SP_BACKEND_CC}
+    solver = MddftSolver(MddftProblem([2, 2, 2]), opts)
+    builddir = tmp_path / 'build'
+    builddir.mkdir()
+    (builddir / (solver._namebase + '.g')).write_text('script')
+    keys = []
+    for name in ['gcc', 'clang']:
+        compiler = (_fakeCompiler(tmp_path, name), ['-O2'], [])
+        monkeypatch.setattr(spiralpy.spsolver, 'directCompiler', lambda: compiler)
+        assert solver._useDirectCompiler()
+        keys.append(solver._buildCacheKey(solver._namebase, str(builddir)))
+    assert keys[0] != keys[1]
@@ -0,0 +1,84 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Recording failed builds, and failing fast on a repeated build
+
+import os
+import shutil
+
+import pytest
+
+import spiralpy.buildcache
+from spiralpy.buildcache import *
+from spiralpy.constants import *
+from spiralpy.mddftsolver import *
+
+
+def _solver(spenv, **opts):
+    opts[SP_OPT_LIBDIR] = spenv.libsDir
+    return MddftSolver(MddftProblem([2, 2, 2]), opts)
+
+
+def test_spiral_error_is_recorded(spenv):
+    spenv.error = 'Error, no rule applies'
+    with pytest.raises(RuntimeError, match='SPIRAL error'):
+        _solver(spenv)
+    spenv.error = None
+    with pytest.raises(RuntimeError, match='no rule applies'):
+        _solver(spenv)
+    # the recorded failure is raised without running SPIRAL
+    assert len(spenv.scripts) == 1
+
+
+@pytest.mark.skipif(shutil.which('cmake') == None or shutil.which('cc') == None,
+                    reason='requires CMake and a C compiler')
+def test_retry_failed_builds_again(spenv, monkeypatch):
+    spenv.error = 'Error, no rule applies'
+    with pytest.raises(RuntimeError):
+        _solver(spenv)
+    spenv.error = None
+    assert _solver(spenv, **{SP_OPT_RETRYFAILED:True}).isReady()
+    # a successful retry removes the record
+    assert _solver(spenv).isReady()
+
+
+@pytest.mark.skipif(shutil.which('cmake') == None or shutil.which('cc') == None,
+                    reason='requires CMake and a C compiler')
+def test_environment_errors_are_not_recorded(spenv, monkeypatch):
+    spiralHome = os.environ['SPIRAL_HOME']
+    monkeypatch.delenv('SPIRAL_HOME')
+    with pytest.raises(RuntimeError, match='Build error'):
+        _solver(spenv, **{SP_OPT_BUILDBACKEND:SP_BACKEND_CMAKE})
+    monkeypatch.setenv('SPIRAL_HOME', spiralHome)
+    assert _solver(spenv, **{SP_OPT_BUILDBACKEND:SP_BACKEND_CMAKE}).isReady()
+
+
+def test_failure_key_includes_environment(spenv, monkeypatch):
+    solver = MddftSolver(MddftProblem([2, 2, 2]), {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_NOBUILD:True})
+    key = solver._failureKey('0' * 64)
+    monkeypatch.setenv('SPIRAL_HOME', '/elsewhere')
+    assert solver._failureKey('0' * 64) != key
+
+
+def test_failure_records(spenv):
+    key = buildCacheKey(['broken'])
+    assert failureLookup(key) == None
+    failureStore(key, {SP_KEY_PHASE:SP_PHASE_SPIRAL, SP_KEY_ERROR:'no rule'})
+    assert failureLookup(key) == {SP_KEY_PHASE:SP_PHASE_SPIRAL, SP_KEY_ERROR:'no rule'}
+    assert failureLookup(buildCacheKey(['fine'])) == None
+    failureClear(key)
+    assert failureLookup(key) == None
+    # clearing a missing record is harmless
+    failureClear(key)
+
+
+def test_corrupt_failure_record_is_ignored(spenv):
+    key = buildCacheKey(['broken'])
+    failureStore(key, {SP_KEY_ERROR:'x'})
+    path = spiralpy.buildcache._failureFile(key)
+    with open(path, 'w') as f:
+        f.write('{')
+    assert failureLookup(key) == None
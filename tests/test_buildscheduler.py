@@ -0,0 +1,64 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Building the libraries of several problems in parallel processes
+
+import shutil
+
+import pytest
+
+import spiralpy.buildscheduler
+from spiralpy.buildscheduler import *
+from spiralpy.constants import *
+from spiralpy.mddftsolver import *
+
+
+def test_solver_class_for_problem():
+    assert solverClassForProblem(MddftProblem([2, 2, 2])) is MddftSolver
+    assert solverClassForProblem(MdrconvProblem([4, 4, 4])) is MdrconvSolver
+    with pytest.raises(TypeError, match='no solver'):
+        solverClassForProblem([2, 2, 2])
+
+
+def test_job_key_ignores_default_options(spenv):
+    opts = {SP_OPT_LIBDIR:spenv.libsDir}
+    key = spiralpy.buildscheduler._jobKey(MddftProblem([2, 2, 2]), opts)
+    assert key == spiralpy.buildscheduler._jobKey(MddftProblem([2, 2, 2]), dict(opts, **{SP_OPT_THREADS:1}))
+    assert key != spiralpy.buildscheduler._jobKey(MddftProblem([4, 4, 4]), opts)
+    assert key != spiralpy.buildscheduler._jobKey(MddftProblem([2, 2, 2]), dict(opts, **{SP_OPT_NORM:SP_NORM_ORTHO}))
+
+
+def test_failed_and_duplicate_jobs(spenv):
+    # the build processes run without SPIRAL, so building fails
+    opts = {SP_OPT_LIBDIR:spenv.libsDir}
+    jobs = [(MddftProblem([2, 2, 2]), opts), (MddftProblem([2, 2, 2]), dict(opts, **{SP_OPT_THREADS:1}))]
+    reports = buildProblems(jobs)
+    assert reports[0][SP_KEY_STATUS] == SP_BUILD_FAILED
+    assert 'SPIRAL' in reports[0][SP_KEY_ERROR]
+    assert reports[1][SP_KEY_DUPLICATEOF] == 0
+    assert reports[1][SP_KEY_STATUS] == SP_BUILD_FAILED
+
+
+def test_timeout(spenv):
+    reports = buildProblems([(MddftProblem([2, 2, 2]), {SP_OPT_LIBDIR:spenv.libsDir})], timeout=0)
+    assert reports[0][SP_KEY_STATUS] == SP_BUILD_TIMEOUT
+
+
+@pytest.mark.skipif(shutil.which('cmake') == None or shutil.which('cc') == None,
+                    reason='requires CMake and a C compiler')
+def test_priority_order_and_reports(spenv, capsys):
+    opts = {SP_OPT_LIBDIR:spenv.libsDir}
+    # libraries already in .libs are loaded by the build processes
+    for dims in [[2, 2, 2], [4, 4, 4]]:
+        MddftSolver(MddftProblem(dims), dict(opts))
+    jobs = [(MddftProblem([2, 2, 2]), opts), (MddftProblem([4, 4, 4]), opts, 5)]
+    reports = buildProblems(jobs, maxWorkers=1, verbose=True)
+    assert [rep[SP_KEY_STATUS] for rep in reports] == [SP_BUILD_OK, SP_BUILD_OK]
+    assert [rep[SP_KEY_NAMEBASE] for rep in reports] == ['zmddft_fwd_2x2x2', 'zmddft_fwd_4x4x4']
+    assert reports[0][SP_KEY_SOURCE] == SP_LIB_INSTALLED
+    # one worker runs the job with higher priority first
+    lines = capsys.readouterr().out.splitlines()
+    assert ['job 1' in line for line in lines[-2:]] == [True, False]
@@ -0,0 +1,119 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Library use tracking and pruning of library directories
+
+import os
+import shutil
+
+import pytest
+
+import spiralpy.libcache
+from spiralpy.constants import *
+from spiralpy.libcache import *
+from spiralpy.locking import libraryLock
+from spiralpy.mddftsolver import *
+
+
+def _library(libdir, name, size, mtime):
+    path = os.path.join(libdir, 'lib' + name + SP_SHLIB_EXT)
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    os.utime(path, (mtime, mtime))
+    return os.path.basename(path)
+
+
+def _names(libs):
+    return [lib[SP_KEY_FILENAME] for lib in libs]
+
+
+def test_sizes():
+    assert parseSize('500M') == 500 << 20
+    assert parseSize('2GB') == 2 << 30
+    assert parseSize('1.5k') == 1536
+    with pytest.raises(RuntimeError, match='invalid size'):
+        parseSize('lots')
+    assert formatSize(1536) == '1.5K'
+
+
+def test_usage_orders_least_recently_used_first(tmp_path):
+    libdir = str(tmp_path)
+    a = _library(libdir, 'a', 10, 1000)
+    b = _library(libdir, 'b', 10, 2000)
+    assert _names(libraryUsage(libdir)) == [a, b]
+    recordLibraryUse(libdir, a)
+    recordLibraryUse(libdir, a)
+    usage = libraryUsage(libdir)
+    assert _names(usage) == [b, a]
+    assert usage[1][SP_KEY_HITS] == 2
+
+
+def test_usage_log_is_compacted(tmp_path, monkeypatch):
+    libdir = str(tmp_path)
+    a = _library(libdir, 'a', 10, 1000)
+    monkeypatch.setattr(spiralpy.libcache, 'SP_USAGE_LOG_MAXSIZE', 200)
+    for i in range(100):
+        recordLibraryUse(libdir, a)
+    assert os.path.getsize(os.path.join(libdir, SP_USAGE_LOG)) <= 250
+    assert libraryUsage(libdir)[0][SP_KEY_HITS] == 100
+
+
+def test_prune_to_count_and_size(tmp_path):
+    libdir = str(tmp_path)
+    names = [_library(libdir, name, 100, 1000 + i) for (i, name) in enumerate(['a', 'b', 'c', 'd'])]
+    assert _names(pruneLibraries(libdir, maxCount=2, dryRun=True)) == names[:2]
+    assert len([f for f in os.listdir(libdir) if f.endswith(SP_SHLIB_EXT)]) == 4
+    assert _names(pruneLibraries(libdir, maxCount=3, keep=[names[0]])) == names[1:2]
+    assert _names(pruneLibraries(libdir, maxSize=150)) == [names[0], names[2]]
+    assert _names(libraryUsage(libdir)) == names[3:]
+    assert pruneLibraries(libdir) == []
+
+
+def test_prune_skips_locked_libraries(tmp_path):
+    libdir = str(tmp_path)
+    a = _library(libdir, 'a', 100, 1000)
+    b = _library(libdir, 'b', 100, 2000)
+    with libraryLock(os.path.join(libdir, a)):
+        assert _names(pruneLibraries(libdir, maxCount=1)) == [b]
+    assert os.path.exists(os.path.join(libdir, a))
+
+
+def test_prune_to_budget(tmp_path, monkeypatch):
+    libdir = str(tmp_path)
+    a = _library(libdir, 'a', 100, 1000)
+    b = _library(libdir, 'b', 100, 2000)
+    monkeypatch.delenv(SP_LIBS_MAXSIZE, raising=False)
+    monkeypatch.delenv(SP_LIBS_MAXCOUNT, raising=False)
+    assert pruneToBudget(libdir) == []
+    monkeypatch.setenv(SP_LIBS_MAXCOUNT, '1')
+    assert _names(pruneToBudget(libdir, keep=[a])) == [b]
+
+
+@pytest.mark.skipif(shutil.which('cmake') == None or shutil.which('cc') == None,
+                    reason='requires CMake and a C compiler')
+def test_library_removed_before_loading_is_built_again(spenv, monkeypatch):
+    os.makedirs(spenv.libsDir)
+    pruned = os.path.join(spenv.libsDir, 'libzmddft_fwd_2x2x2' + SP_SHLIB_EXT)
+    resolve = MddftSolver._resolveLibrary
+    calls = []
+    def resolveRemoved(self):
+        calls.append(self)
+        return pruned if len(calls) == 1 else resolve(self)
+    monkeypatch.setattr(MddftSolver, '_resolveLibrary', resolveRemoved)
+    solver = MddftSolver(MddftProblem([2, 2, 2]), {SP_OPT_LIBDIR:spenv.libsDir})
+    assert solver.isReady()
+    assert solver.buildReport()[SP_KEY_SOURCE] == SP_LIB_BUILT
+    assert len(spenv.scripts) == 1
+
+
+@pytest.mark.skipif(shutil.which('cmake') == None or shutil.which('cc') == None,
+                    reason='requires CMake and a C compiler')
+def test_builds_keep_libs_within_budget(spenv, monkeypatch):
+    monkeypatch.setenv(SP_LIBS_MAXCOUNT, '1')
+    MddftSolver(MddftProblem([2, 2, 2]), {SP_OPT_LIBDIR:spenv.libsDir})
+    solver = MddftSolver(MddftProblem([4, 4, 4]), {SP_OPT_LIBDIR:spenv.libsDir})
+    assert _names(libraryUsage(spenv.libsDir)) == [os.path.basename(solver.buildReport()[SP_KEY_LIBRARY])]
+    assert SP_PHASE_PRUNE in solver.buildReport()[SP_KEY_PHASES]
@@ -0,0 +1,96 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Lock files and atomic installation of libraries
+
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from spiralpy.constants import *
+from spiralpy.locking import *
+from spiralpy.mddftsolver import *
+
+
+def test_lock_excludes_threads(tmp_path):
+    path = str(tmp_path / 'a.lock')
+    held = []
+    def hold():
+        with FileLock(path, poll=0.01):
+            held.append(len(held))
+            time.sleep(0.05)
+            held.append(len(held))
+    threads = [threading.Thread(target=hold) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # each holder enters and leaves before the next one enters
+    assert held == list(range(8))
+
+
+def test_lock_excludes_processes(tmp_path):
+    path = str(tmp_path / 'a.lock')
+    code = ('import sys; from spiralpy.locking import FileLock; '
+            'sys.exit(FileLock(sys.argv[1]).acquire(blocking=False) == None)')
+    with FileLock(path):
+        assert subprocess.run([sys.executable, '-c', code, path]).returncode == 1
+    assert subprocess.run([sys.executable, '-c', code, path]).returncode == 0
+
+
+def test_non_blocking_acquire(tmp_path):
+    path = str(tmp_path / 'a.lock')
+    with FileLock(path):
+        assert FileLock(path).acquire(blocking=False) == None
+    lock = FileLock(path).acquire(blocking=False)
+    assert lock != None
+    lock.release()
+    # releasing twice is harmless
+    lock.release()
+
+
+def test_library_lock_path(tmp_path):
+    lib = str(tmp_path / ('liba' + SP_SHLIB_EXT))
+    with libraryLock(lib):
+        assert os.path.exists(str(tmp_path / ('liba' + SP_LOCKFILE_EXT)))
+
+
+def test_install_file_replaces_atomically(tmp_path):
+    src = tmp_path / 'src'
+    src.mkdir()
+    (src / 'liba.so').write_bytes(b'new')
+    dest = tmp_path / 'dest'
+    dest.mkdir()
+    (dest / 'liba.so').write_bytes(b'old')
+    with open(str(dest / 'liba.so'), 'rb') as f:
+        assert installFile(str(src / 'liba.so'), str(dest)) == str(dest / 'liba.so')
+        # an open (or loaded) copy keeps the old contents
+        assert f.read() == b'old'
+    assert (dest / 'liba.so').read_bytes() == b'new'
+    assert os.listdir(str(dest)) == ['liba.so']
+
+
+@pytest.mark.skipif(shutil.which('cmake') == None or shutil.which('cc') == None,
+                    reason='requires CMake and a C compiler')
+def test_concurrent_solvers_build_once(spenv):
+    spenv.proceed = threading.Event()
+    solvers = []
+    def construct():
+        solvers.append(MddftSolver(MddftProblem([2, 2, 2]), {SP_OPT_LIBDIR:spenv.libsDir}))
+    threads = [threading.Thread(target=construct) for i in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)
+    spenv.proceed.set()
+    for t in threads:
+        t.join()
+    assert len(solvers) == 3 and all(s.isReady() for s in solvers)
+    assert len(spenv.scripts) == 1
@@ -0,0 +1,89 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Manifests of transforms to build ahead of time, and the build command
+
+import json
+import shutil
+
+import pytest
+
+from spiralpy.__main__ import main
+from spiralpy.constants import *
+from spiralpy.manifest import *
+from spiralpy.mddftsolver import *
+
+
+def _manifest(tmp_path, manifest):
+    path = tmp_path / 'manifest.json'
+    path.write_text(json.dumps(manifest))
+    return str(path)
+
+
+def test_job_from_entry():
+    (problem, opts) = jobFromEntry({'type':'MDDFT', 'dims':[8, 8, 8], 'direction':'inverse', 'precision':'single',
+                                    'order':'Fortran', 'options':{SP_OPT_THREADS:4}})
+    assert type(problem) is MddftProblem
+    assert problem.dimensions() == [8, 8, 8]
+    assert problem.direction() == SP_INVERSE
+    assert opts == {SP_OPT_THREADS:4, SP_OPT_METADATA:True, SP_OPT_REALCTYPE:'float', SP_OPT_COLMAJOR:True,
+                    SP_OPT_PLATFORM:SP_CPU}
+    (problem, opts) = jobFromEntry({'type':'dft', 'dims':1024, 'batch':[16, 1], 'strides':[1, 2]})
+    assert type(problem) is DftProblem
+    assert problem.dimN() == 1024
+    assert opts == {SP_OPT_METADATA:True, SP_OPT_PLATFORM:SP_CPU}
+
+
+@pytest.mark.parametrize('entry, error', [
+    ({'type':'fft', 'dims':[8]}, 'invalid type "fft"'),
+    ({'type':'mddft'}, 'missing dims'),
+    ({'type':'mddft', 'dims':[8, 8, 8], 'direction':'up'}, 'invalid direction "up"'),
+    ({'type':'mddft', 'dims':[8, 8, 8], 'platform':'tpu'}, 'invalid platform "tpu"'),
+    ({'type':'batchmddft', 'dims':[8, 8, 8]}, 'invalid batchmddft entry'),
+])
+def test_invalid_entries(entry, error):
+    with pytest.raises(RuntimeError, match=error):
+        jobFromEntry(entry)
+
+
+def test_read_manifest(tmp_path):
+    path = _manifest(tmp_path, {'defaults':{'precision':'single'},
+                                'transforms':[{'type':'mddft', 'dims':[8, 8, 8]},
+                                              {'type':'mddft', 'dims':[4, 4, 4], 'precision':'double'}]})
+    jobs = readManifest(path)
+    assert [opts.get(SP_OPT_REALCTYPE) for (problem, opts) in jobs] == ['float', None]
+    assert len(readManifest(_manifest(tmp_path, [{'type':'mdrconv', 'dims':[8, 8, 8]}]))) == 1
+    with pytest.raises(RuntimeError, match='transform 1: missing dims'):
+        readManifest(_manifest(tmp_path, [{'type':'mddft', 'dims':[8, 8, 8]}, {'type':'mddft'}]))
+    with pytest.raises(RuntimeError, match='expected a list'):
+        readManifest(_manifest(tmp_path, {'transforms':{'type':'mddft'}}))
+
+
+@pytest.mark.skipif(shutil.which('cmake') == None or shutil.which('cc') == None,
+                    reason='requires CMake and a C compiler')
+def test_build_manifest(spenv, tmp_path):
+    MddftSolver(MddftProblem([2, 2, 2]), {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_METADATA:True})
+    # the build processes run without SPIRAL, so the missing libraries fail to build
+    path = _manifest(tmp_path, [{'type':'mddft', 'dims':[2, 2, 2]}, {'type':'mddft', 'dims':[4, 4, 4]},
+                                {'type':'mddft', 'dims':[4, 4, 4], 'options':{SP_OPT_THREADS:1}}])
+    reports = buildManifest(path, spenv.libsDir)
+    assert [rep[SP_KEY_STATUS] for rep in reports] == [SP_BUILD_PRESENT, SP_BUILD_FAILED, SP_BUILD_FAILED]
+    assert reports[0][SP_KEY_NAMEBASE] == 'zmddft_fwd_2x2x2'
+    # duplicates refer to the manifest index
+    assert reports[2][SP_KEY_DUPLICATEOF] == 1
+
+
+@pytest.mark.skipif(shutil.which('cmake') == None or shutil.which('cc') == None,
+                    reason='requires CMake and a C compiler')
+def test_build_command(spenv, tmp_path, capsys):
+    MddftSolver(MddftProblem([2, 2, 2]), {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_METADATA:True})
+    path = _manifest(tmp_path, [{'type':'mddft', 'dims':[2, 2, 2]}])
+    assert main(['build', path, '--libdir', spenv.libsDir]) == 0
+    assert '1 transforms (1 ' + SP_BUILD_PRESENT + ')' in capsys.readouterr().out
+    path = _manifest(tmp_path, [{'type':'mddft', 'dims':[2, 2, 2]}, {'type':'mddft', 'dims':[4, 4, 4]}])
+    assert main(['build', path, '--libdir', spenv.libsDir, '-j', '1']) == 1
+    assert main(['build', _manifest(tmp_path, [{'type':'mddft'}])]) == 2
+    assert 'missing dims' in capsys.readouterr().err
@@ -0,0 +1,137 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Library metadata: extraction, matching, the per-directory index and the search
+
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import spiralpy.metadata
+from spiralpy.constants import *
+from spiralpy.metadata import *
+
+
+def _xform(name, dims=[8, 8, 8], **keys):
+    xform = {SP_KEY_TRANSFORMTYPE:SP_TRANSFORM_MDDFT, SP_KEY_DIMENSIONS:dims, SP_KEY_PRECISION:SP_STR_DOUBLE,
+             SP_KEY_PLATFORM:SP_CPU, SP_KEY_DIRECTION:SP_STR_FORWARD,
+             SP_KEY_NAMES:{SP_KEY_EXEC:name, SP_KEY_INIT:'init_' + name, SP_KEY_DESTROY:'destroy_' + name}}
+    xform.update(keys)
+    return xform
+
+
+def _writeLibrary(path, *xforms):
+    """Write a (non-ELF) file carrying metadata the way generated libraries do."""
+    text = json.dumps({SP_KEY_TRANSFORMS:list(xforms)})
+    with open(path, 'wb') as f:
+        f.write(b'\0' * 100 + (SP_METADATA_START + text + SP_METADATA_END).encode() + b'\0' * 100)
+
+
+def _search(**keys):
+    search = _xform('')
+    del search[SP_KEY_NAMES]
+    search.update(keys)
+    return search
+
+
+def test_matches_defaults_for_missing_keys():
+    legacy = _xform('f')
+    assert metadataMatches(legacy, _search(**{SP_KEY_NORM:SP_NORM_BACKWARD, SP_KEY_THREADS:1, SP_KEY_INPLACE:False}))
+    assert not metadataMatches(legacy, _search(**{SP_KEY_NORM:SP_NORM_ORTHO}))
+    assert not metadataMatches(legacy, _search(**{SP_KEY_INPLACE:True}))
+    # keys without a default must be present
+    assert not metadataMatches(legacy, _search(**{SP_KEY_ORDER:SP_STR_C}))
+
+
+def test_matches_recorded_values():
+    xform = _xform('f', **{SP_KEY_NORM:SP_NORM_ORTHO, SP_KEY_THREADS:4})
+    assert metadataMatches(xform, _search(**{SP_KEY_NORM:SP_NORM_ORTHO, SP_KEY_THREADS:4}))
+    assert not metadataMatches(xform, _search(**{SP_KEY_NORM:SP_NORM_BACKWARD}))
+    assert not metadataMatches(xform, _search(**{SP_KEY_DIRECTION:SP_STR_INVERSE}))
+    assert not metadataMatches(xform, dict())
+
+
+def test_metadata_in_file(tmp_path, monkeypatch):
+    path = str(tmp_path / ('liba' + SP_SHLIB_EXT))
+    _writeLibrary(path, _xform('a'))
+    assert metadataInFile(path)[SP_KEY_TRANSFORMS][0][SP_KEY_NAMES][SP_KEY_EXEC] == 'a'
+    # markers split across the chunks of the scan
+    monkeypatch.setattr(spiralpy.metadata, '_STREAM_CHUNK', 7)
+    assert metadataInFile(path)[SP_KEY_TRANSFORMS][0][SP_KEY_NAMES][SP_KEY_EXEC] == 'a'
+    (tmp_path / 'empty.bin').write_bytes(b'\0' * 1000)
+    assert metadataInFile(str(tmp_path / 'empty.bin')) == None
+    (tmp_path / 'zero.bin').write_bytes(b'')
+    assert metadataInFile(str(tmp_path / 'zero.bin')) == None
+
+
+@pytest.mark.skipif(shutil.which('cc') == None or SP_SHLIB_EXT != '.so', reason='requires a C compiler building ELF')
+def test_metadata_in_elf_library(tmp_path):
+    source = str(tmp_path / 'meta.c')
+    writeMetadataSourceFile({SP_KEY_TRANSFORMS:[_xform('a')]}, 'a_metadata', source)
+    lib = str(tmp_path / ('liba' + SP_SHLIB_EXT))
+    res = subprocess.run(['cc', '-shared', '-fPIC', '-o', lib, source], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    assert res.returncode == 0, res.stdout.decode()
+    with open(lib, 'rb') as f:
+        assert spiralpy.metadata._elfDataSections(f.read()) != None
+    assert metadataInFile(lib) == {SP_KEY_TRANSFORMS:[_xform('a')]}
+
+
+def test_index_buckets_and_persistence(tmp_path):
+    libdir = str(tmp_path)
+    _writeLibrary(os.path.join(libdir, 'liba' + SP_SHLIB_EXT), _xform('a'), _xform('b', dims=[4, 4, 4]))
+    _writeLibrary(os.path.join(libdir, 'libc' + SP_SHLIB_EXT), _xform('c'))
+    index = metadataIndexForDir(libdir)
+    bucket = index[spiralpy.metadata._indexBucket(_xform('x'))]
+    assert sorted([xform[SP_KEY_NAMES][SP_KEY_EXEC] for (path, xform) in bucket]) == ['a', 'c']
+    assert os.path.exists(os.path.join(libdir, SP_METAINDEX_FILE))
+    # a new process reads the persisted index
+    spiralpy.metadata._metadataIndexes.clear()
+    assert metadataIndexForDir(libdir) == index
+
+
+def test_index_refreshes_changed_and_removed_libraries(tmp_path):
+    libdir = str(tmp_path)
+    liba = os.path.join(libdir, 'liba' + SP_SHLIB_EXT)
+    _writeLibrary(liba, _xform('a'))
+    _writeLibrary(os.path.join(libdir, 'libc' + SP_SHLIB_EXT), _xform('c'))
+    key = spiralpy.metadata._indexBucket(_xform('x'))
+    assert len(metadataIndexForDir(libdir)[key]) == 2
+    _writeLibrary(liba, _xform('a2'), _xform('a3'))
+    os.remove(os.path.join(libdir, 'libc' + SP_SHLIB_EXT))
+    names = [xform[SP_KEY_NAMES][SP_KEY_EXEC] for (path, xform) in metadataIndexForDir(libdir)[key]]
+    assert sorted(names) == ['a2', 'a3']
+
+
+def test_find_functions(tmp_path, monkeypatch):
+    libdir = str(tmp_path)
+    monkeypatch.delenv(SP_LIBRARY_PATH, raising=False)
+    _writeLibrary(os.path.join(libdir, 'liba' + SP_SHLIB_EXT), _xform('a'), _xform('b', dims=[4, 4, 4]))
+    (path, names) = findFunctionsWithMetadata(_search(**{SP_KEY_DIMENSIONS:[4, 4, 4]}), libdir)
+    assert path == os.path.join(libdir, 'liba' + SP_SHLIB_EXT)
+    assert names == {SP_KEY_EXEC:'b', SP_KEY_INIT:'init_b', SP_KEY_DESTROY:'destroy_b'}
+    (path, names) = findFunctionsWithMetadata(_search(**{SP_KEY_DIMENSIONS:[16, 16, 16]}), libdir)
+    assert path == None
+
+
+def test_find_prefers_widest_usable_isa(tmp_path, monkeypatch):
+    libdir = str(tmp_path)
+    monkeypatch.delenv(SP_LIBRARY_PATH, raising=False)
+    _writeLibrary(os.path.join(libdir, 'libscalar' + SP_SHLIB_EXT), _xform('scalar'))
+    _writeLibrary(os.path.join(libdir, 'libavx2' + SP_SHLIB_EXT),
+                  _xform('avx2', **{SP_KEY_VECTORISA:SP_ISA_AVX2, SP_KEY_CPUFEATURES:['avx2', 'fma']}))
+    _writeLibrary(os.path.join(libdir, 'libavx512' + SP_SHLIB_EXT),
+                  _xform('avx512', **{SP_KEY_VECTORISA:SP_ISA_AVX512, SP_KEY_CPUFEATURES:['avx512f']}))
+    monkeypatch.setattr(spiralpy.metadata, 'hostCPUFeatures', lambda: set(['sse2', 'avx2', 'fma']))
+    (path, names) = findFunctionsWithMetadata(_search(), libdir)
+    assert names[SP_KEY_EXEC] == 'avx2'
+    monkeypatch.setattr(spiralpy.metadata, 'hostCPUFeatures', lambda: set(['sse2']))
+    (path, names) = findFunctionsWithMetadata(_search(), libdir)
+    assert names[SP_KEY_EXEC] == 'scalar'
+    (path, names) = findFunctionsWithMetadata(_search(**{SP_KEY_VECTORISA:SP_ISA_SSE2}), libdir)
+    assert path == None
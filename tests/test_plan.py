@@ -0,0 +1,78 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Plans: repeated execution of the generated function with little overhead
+
+import shutil
+
+import numpy as np
+import pytest
+
+from spiralpy.constants import *
+from spiralpy.mddftsolver import *
+
+pytestmark = pytest.mark.skipif(shutil.which('cmake') == None or shutil.which('cc') == None,
+                                reason='requires CMake and a C compiler')
+
+
+def _solver(spenv, **opts):
+    opts[SP_OPT_LIBDIR] = spenv.libsDir
+    return MddftSolver(MddftProblem([2, 2, 2]), opts)
+
+
+def _src():
+    return np.arange(8, dtype=np.cdouble).reshape(2, 2, 2) + 1
+
+
+def test_execute_matches_solve(spenv):
+    solver = _solver(spenv, **{SP_OPT_NORM:SP_NORM_ORTHO})
+    src = _src()
+    plan = solver.plan()
+    dst = np.zeros_like(src)
+    assert plan.execute(dst, src) is dst
+    assert np.array_equal(dst, solver.solve(src))
+
+
+def test_bound_and_rebound_arrays(spenv):
+    plan = _solver(spenv).plan()
+    (src, dst) = (_src(), np.zeros((2, 2, 2), np.cdouble))
+    plan.bind(dst, src)
+    # the fake generated function copies the first element
+    src[0, 0, 0] = 5
+    assert plan.execute()[0, 0, 0] == 5
+    src[0, 0, 0] = 6
+    plan.execute()
+    assert dst[0, 0, 0] == 6
+    # other arrays are bound in place of the old ones
+    (src2, dst2) = (_src() * 2, np.zeros((2, 2, 2), np.cdouble))
+    plan.execute(dst2, src2)
+    assert dst2[0, 0, 0] == 2
+    src2[0, 0, 0] = 7
+    assert plan.execute() is dst2
+    assert dst2[0, 0, 0] == 7 and dst[0, 0, 0] == 6
+
+
+def test_plan_errors(spenv):
+    with pytest.raises(RuntimeError, match='not loaded'):
+        _solver(spenv, **{SP_OPT_NOBUILD:True}).plan()
+    plan = _solver(spenv).plan()
+    with pytest.raises(RuntimeError, match='no arrays'):
+        plan.execute()
+    with pytest.raises(RuntimeError, match='bind arrays'):
+        plan.measureOverhead()
+    with pytest.raises(RuntimeError, match='NumPy arrays'):
+        plan.bind(np.zeros((2, 2, 2), np.cdouble), [1, 2])
+    with pytest.raises(RuntimeError, match='contiguous'):
+        plan.bind(np.zeros((2, 2, 2), np.cdouble), np.zeros((2, 2, 4), np.cdouble)[:, :, ::2])
+
+
+def test_measure_overhead(spenv):
+    plan = _solver(spenv).plan()
+    plan.bind(np.zeros((2, 2, 2), np.cdouble), _src())
+    timings = plan.measureOverhead(calls=10)
+    assert sorted(timings) == sorted([SP_KEY_CALL, SP_KEY_EXECUTE, SP_KEY_OVERHEAD])
+    assert timings[SP_KEY_CALL] > 0 and timings[SP_KEY_EXECUTE] > 0
+    assert timings[SP_KEY_OVERHEAD] == pytest.approx(timings[SP_KEY_EXECUTE] - timings[SP_KEY_CALL])
@@ -0,0 +1,50 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Running SPIRAL: finding the program and the process-wide pool
+
+import threading
+import time
+
+import spiralpy.spiral
+from spiralpy.constants import *
+from spiralpy.spiral import *
+
+
+def test_spiral_pool_is_created_once(monkeypatch):
+    created = []
+    class SlowPool:
+        def __init__(self, size):
+            created.append(size)
+            time.sleep(0.05)
+        def close(self):
+            pass
+    monkeypatch.setattr(spiralpy.spiral, '_spiralPool', None)
+    monkeypatch.setattr(spiralpy.spiral, 'SpiralPool', SlowPool)
+    monkeypatch.setenv(SP_SPIRALPOOL, '2')
+    pools = []
+    threads = [threading.Thread(target=lambda: pools.append(spiralPool())) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert created == [2]
+    assert len(set(id(pool) for pool in pools)) == 1
+
+
+def test_missing_spiral_is_reported_once(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(spiralpy.spiral, '_spiralPrograms', dict())
+    monkeypatch.setenv('PATH', str(tmp_path))
+    monkeypatch.delenv('SPIRAL_HOME', raising=False)
+    monkeypatch.delenv(SP_SPIRALPOOL, raising=False)
+    script = tmp_path / 'script.g'
+    script.write_text('quit;\n')
+    for i in range(3):
+        assert callSpiralWithFile(str(script)) == SPIRAL_RET_ERR
+    assert capsys.readouterr().out.count('Can\'t run') == 1
+    # a different environment searches again
+    monkeypatch.setenv('SPIRAL_HOME', str(tmp_path))
+    assert spiralpy.spiral._spiralProgram() == str(tmp_path / 'bin' / SPIRAL_EXE)
@@ -0,0 +1,49 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Building libraries from split sources, and the fallback to the whole sources
+
+import os
+import shutil
+
+import pytest
+
+import spiralpy.spsolver
+from spiralpy.constants import *
+from spiralpy.mddftsolver import *
+
+
+pytestmark = pytest.mark.skipif(shutil.which('cmake') == None or shutil.which('cc') == None,
+                                reason='requires CMake and a C compiler')
+
+
+def _brokenSplit(monkeypatch):
+    """Have every split produce a first unit that does not compile."""
+    splitSource = spiralpy.spsolver.splitSource
+    def split(filename, units):
+        roots = splitSource(filename, units)
+        if roots != None:
+            with open(os.path.join(os.path.dirname(filename), roots[0] + '.c'), 'a') as f:
+                print('#error broken unit', file = f)
+        return roots
+    monkeypatch.setattr(spiralpy.spsolver, 'splitSource', split)
+
+
+@pytest.mark.parametrize('backend', [SP_BACKEND_CMAKE, SP_BACKEND_CC])
+def test_split_build(spenv, backend):
+    opts = {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_SPLITSOURCES:2, SP_OPT_BUILDBACKEND:backend}
+    solver = MddftSolver(MddftProblem([2, 2, 2]), opts)
+    assert solver.isReady()
+    assert SP_PHASE_SPLIT in solver.buildReport()[SP_KEY_PHASES]
+
+
+@pytest.mark.parametrize('backend', [SP_BACKEND_CMAKE, SP_BACKEND_CC])
+def test_split_build_failure_falls_back_to_whole_sources(spenv, monkeypatch, backend):
+    _brokenSplit(monkeypatch)
+    opts = {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_SPLITSOURCES:2, SP_OPT_BUILDBACKEND:backend}
+    solver = MddftSolver(MddftProblem([2, 2, 2]), opts)
+    assert solver.isReady()
+    assert os.path.exists(os.path.join(spenv.libsDir, 'libzmddft_fwd_2x2x2' + SP_SHLIB_EXT))
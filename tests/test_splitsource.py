@@ -0,0 +1,95 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Splitting generated C sources into translation units
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from spiralpy.splitsource import *
+
+
+_SOURCE = '''
+/* generated */
+#include <string.h>
+#define N 4
+
+typedef struct { double re, im; } cplx;
+
+static double D1[N] = { 1.0, 2.0, 3.0, 4.0 };
+static double T1[N];
+double G1[2];
+
+static inline double twice(double x) { return 2.0 * x; }
+
+static void sub1(double *Y, double *X) {
+    for (int i = 0; i < N; i++) { Y[i] = D1[i] * X[i]; }
+}
+
+static void sub2(double *Y, double *X) {
+    for (int i = 0; i < N; i++) { T1[i] = twice(X[i]); Y[i] = T1[i]; }
+}
+
+void init_xform() {
+    G1[0] = 0.0;
+}
+
+void xform(double *Y, double *X) {
+    char *s = "not a } brace";
+    sub1(T1, X);
+    sub2(Y, T1);
+}
+
+void destroy_xform() { }
+'''
+
+
+def _write(tmp_path, text, name='xform.c'):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_split_units(tmp_path):
+    roots = splitSource(_write(tmp_path, _SOURCE), 3)
+    assert roots == ['xform_part0', 'xform_part1', 'xform_part2']
+    header = (tmp_path / 'xform_split.h').read_text()
+    # file-local names are made global and unique per transform
+    for name in ['D1', 'T1', 'sub1', 'sub2']:
+        assert ('#define ' + name + ' xform_' + name) in header
+    assert 'extern double G1[2];' in header
+    assert 'static inline double twice' in header
+    units = [(tmp_path / (root + '.c')).read_text() for root in roots]
+    # every function is defined in exactly one unit, the data in the first
+    for func in ['void sub1(', 'void sub2(', 'void init_xform(', 'void xform(', 'void destroy_xform(']:
+        assert sum([unit.count(func) for unit in units]) == 1
+    assert 'D1[N] =' in units[0]
+    assert all(['static' not in unit for unit in units])
+
+
+def test_units_limited_by_functions(tmp_path):
+    roots = splitSource(_write(tmp_path, _SOURCE), 16)
+    assert len(roots) == 5
+
+
+def test_small_or_unparsable_sources_are_not_split(tmp_path):
+    assert splitSource(_write(tmp_path, _SOURCE), 1) == None
+    assert splitSource(_write(tmp_path, 'void f() { }\n'), 4) == None
+    assert splitSource(_write(tmp_path, _SOURCE + '/* unterminated'), 4) == None
+    assert splitSource(_write(tmp_path, _SOURCE + 'void g() {\n'), 4) == None
+    assert not os.path.exists(tmp_path / 'xform_split.h')
+
+
+@pytest.mark.skipif(shutil.which('cc') == None, reason='requires a C compiler')
+def test_units_compile_and_link(tmp_path):
+    roots = splitSource(_write(tmp_path, _SOURCE), 3)
+    sources = [str(tmp_path / (root + '.c')) for root in roots]
+    lib = str(tmp_path / 'libxform.so')
+    res = subprocess.run(['cc', '-shared', '-fPIC', '-o', lib] + sources, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    assert res.returncode == 0, res.stdout.decode()
@@ -0,0 +1,59 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  OpenMP multithreaded CPU code
+
+import ctypes
+import ctypes.util
+import shutil
+
+import numpy as np
+import pytest
+
+from spiralpy.constants import *
+from spiralpy.mddftsolver import *
+from spiralpy.toolchain import directCompiler
+
+
+def _solver(spenv, threads, **opts):
+    opts[SP_OPT_LIBDIR] = spenv.libsDir
+    opts[SP_OPT_THREADS] = threads
+    return MddftSolver(MddftProblem([2, 2, 2]), opts)
+
+
+def test_thread_variants(spenv, tmp_path):
+    solver = _solver(spenv, 4, **{SP_OPT_NOBUILD:True})
+    assert solver._namebase == 'zmddft_fwd_2x2x2_t4'
+    assert solver._functionMetadata()[SP_KEY_THREADS] == 4
+    script = str(tmp_path / 'script.g')
+    solver._genScript(script)
+    with open(script) as f:
+        assert 'AParSMP(4)' in f.read()
+    assert '-fopenmp' in solver._variantFlags()[0]
+    with pytest.raises(RuntimeError, match='at least 1'):
+        _solver(spenv, 0, **{SP_OPT_NOBUILD:True})
+    with pytest.raises(RuntimeError, match='CPU libraries only'):
+        _solver(spenv, 2, **{SP_OPT_NOBUILD:True, SP_OPT_PLATFORM:SP_CUDA})
+
+
+@pytest.mark.skipif(shutil.which('cc') == None or ctypes.util.find_library('gomp') == None,
+                    reason='requires a C compiler with OpenMP')
+def test_thread_count_applies_to_each_call(spenv):
+    if directCompiler() == None:
+        pytest.skip('requires the direct compiler backend')
+    omp = ctypes.CDLL(ctypes.util.find_library('gomp'))
+    before = omp.omp_get_max_threads()
+    two = _solver(spenv, 2, **{SP_OPT_BUILDBACKEND:SP_BACKEND_CC})
+    three = _solver(spenv, 3, **{SP_OPT_BUILDBACKEND:SP_BACKEND_CC})
+    # loading a library leaves the process's thread count alone
+    assert omp.omp_get_max_threads() == before
+    src = np.zeros((2, 2, 2), np.complex128)
+    assert two.solve(src).real.flat[0] == 2
+    assert three.solve(src).real.flat[0] == 3
+    assert two.solve(src).real.flat[0] == 2
+    dst = np.zeros_like(src)
+    assert three.plan().execute(dst, src).real.flat[0] == 3
+    assert omp.omp_get_max_threads() == before
@@ -0,0 +1,174 @@
+##  Copyright (c) 2018-2023, Carnegie Mellon University
+##  All rights reserved.
+##
+##  See LICENSE file for full information
+##  SPDX-License-Identifier: BSD-2-Clause
+
+##  Variants of transforms: optimization profiles, vector ISAs, norm and in-place
+
+import json
+import shutil
+
+import numpy as np
+import pytest
+
+import spiralpy.spsolver
+from spiralpy.constants import *
+from spiralpy.mddftsolver import *
+from spiralpy.mdrconvsolver import *
+from spiralpy.toolchain import profileFlags, profileName, vectorISA
+
+
+def _solver(spenv, dims=[2, 2, 2], k=SP_FORWARD, **opts):
+    opts[SP_OPT_LIBDIR] = spenv.libsDir
+    opts.setdefault(SP_OPT_NOBUILD, True)
+    return MddftSolver(MddftProblem(dims, k), opts)
+
+
+def _script(solver, tmp_path):
+    filename = str(tmp_path / 'script.g')
+    solver._genScript(filename)
+    with open(filename) as f:
+        return f.read()
+
+
+def test_profile_names_and_flags():
+    assert profileName(SP_PROFILE_DEFAULT) == SP_PROFILE_DEFAULT
+    assert profileName('lto+fastmath') == 'fastmath+lto'
+    assert profileName([SP_PROFILE_NATIVE, SP_PROFILE_DEFAULT]) == SP_PROFILE_NATIVE
+    assert profileFlags('fastmath+lto') == (['-ffast-math', '-flto'], ['-flto'])
+    assert profileFlags(SP_PROFILE_FASTMATH) == (['-ffast-math'], [])
+    with pytest.raises(RuntimeError, match='unknown optimization profile'):
+        profileName('fast')
+
+
+def test_profile_variants(spenv):
+    solver = _solver(spenv, **{SP_OPT_OPTPROFILE:'native+fastmath'})
+    assert solver._namebase == 'zmddft_fwd_2x2x2_fastmath_native'
+    assert solver._functionMetadata()[SP_KEY_OPTPROFILE] == 'fastmath+native'
+    custom = _solver(spenv, **{SP_OPT_CFLAGS:'-O2 -funroll-loops'})
+    assert custom._functionMetadata()[SP_KEY_OPTPROFILE] == SP_PROFILE_CUSTOM
+    assert custom._functionMetadata()[SP_KEY_COMPILEFLAGS] == ['-O2', '-funroll-loops']
+    other = _solver(spenv, **{SP_OPT_CFLAGS:'-O3'})
+    assert custom._variantSuffix().startswith('_o') and custom._variantSuffix() != other._variantSuffix()
+    with pytest.raises(RuntimeError, match='CPU libraries only'):
+        _solver(spenv, **{SP_OPT_OPTPROFILE:SP_PROFILE_FASTMATH, SP_OPT_PLATFORM:SP_CUDA})
+
+
+def test_vector_isas():
+    assert vectorISA(SP_ISA_SCALAR, SP_STR_DOUBLE) == (None, [])
+    assert vectorISA(SP_ISA_AVX2, SP_STR_DOUBLE) == ('AVX_4x64f', ['-mavx2', '-mfma'])
+    assert vectorISA(SP_ISA_AVX512, SP_STR_SINGLE)[0] == 'AVX512_16x32f'
+    with pytest.raises(RuntimeError, match='unknown vector ISA'):
+        vectorISA('neon', SP_STR_DOUBLE)
+
+
+def test_vector_isa_variants(spenv, tmp_path):
+    assert 'paradigms.vector' not in _script(_solver(spenv), tmp_path)
+    solver = _solver(spenv, **{SP_OPT_VECTORISA:SP_ISA_AVX2})
+    assert solver._namebase == 'zmddft_fwd_2x2x2_avx2'
+    assert solver._functionMetadata()[SP_KEY_VECTORISA] == SP_ISA_AVX2
+    assert solver._codeFlags() == (['-mavx2', '-mfma'], [])
+    script = _script(solver, tmp_path)
+    assert 'opts.vector := rec(isa := AVX_4x64f);' in script
+    assert 'AVecReg(AVX_4x64f)' in script
+    single = _solver(spenv, **{SP_OPT_VECTORISA:SP_ISA_SSE2, SP_OPT_REALCTYPE:'float'})
+    assert 'isa := SSE_4x32f' in _script(single, tmp_path)
+    with pytest.raises(RuntimeError, match='CPU libraries only'):
+        _solver(spenv, **{SP_OPT_VECTORISA:SP_ISA_AVX2, SP_OPT_PLATFORM:SP_HIP})
+
+
+def test_required_cpu_features(spenv, monkeypatch):
+    assert _solver(spenv)._cpuFeatures() == []
+    assert _solver(spenv, **{SP_OPT_VECTORISA:SP_ISA_AVX2})._cpuFeatures() == ['avx2', 'fma']
+    # -march=native code requires every feature of the build host
+    monkeypatch.setattr(spiralpy.spsolver, 'hostCPUFeatures', lambda: set(['sse2', 'avx2', 'fma', 'bmi2']))
+    native = _solver(spenv, **{SP_OPT_OPTPROFILE:SP_PROFILE_NATIVE})
+    assert native._cpuFeatures() == ['avx2', 'bmi2', 'fma', 'sse2']
+    monkeypatch.setattr(spiralpy.spsolver, 'hostCPUFeatures', lambda: None)
+    assert native._cpuFeatures() == [SP_FEATURE_UNKNOWNHOST]
+
+
+@pytest.mark.parametrize('norm,k,scale', [
+    (SP_NORM_BACKWARD, SP_FORWARD, None),
+    (SP_NORM_BACKWARD, SP_INVERSE, '1/64'),
+    (SP_NORM_FORWARD, SP_FORWARD, '1/64'),
+    (SP_NORM_FORWARD, SP_INVERSE, None),
+    (SP_NORM_ORTHO, SP_FORWARD, '1/8'),
+    (SP_NORM_ORTHO, SP_INVERSE, '1/8'),
+])
+def test_norm_scale(spenv, norm, k, scale):
+    solver = _solver(spenv, [4, 4, 4], k, **{SP_OPT_NORM:norm})
+    assert solver._normScale() == scale
+    spec = solver._scaledSpec('MDDFT(ns, k)')
+    assert spec == ('MDDFT(ns, k)' if scale == None else 'Scale(' + scale + ', MDDFT(ns, k))')
+
+
+def test_ortho_scale_is_not_in_e_notation(spenv):
+    assert _solver(spenv, [105], **{SP_OPT_NORM:SP_NORM_ORTHO})._normScale() == '1/10.246950765959598'
+
+
+def test_norm_variants(spenv, tmp_path):
+    assert 'Scale(' not in _script(_solver(spenv), tmp_path)
+    solver = _solver(spenv, **{SP_OPT_NORM:SP_NORM_ORTHO})
+    assert solver._namebase == 'zmddft_fwd_2x2x2_ortho'
+    assert solver._functionMetadata()[SP_KEY_NORM] == SP_NORM_ORTHO
+    assert 'Scale(1/2.8284271247461903, ' in _script(solver, tmp_path)
+    src = np.arange(8, dtype=np.complex128).reshape((2, 2, 2))
+    assert np.allclose(solver.runDef(src), np.fft.fftn(src, norm=SP_NORM_ORTHO))
+    with pytest.raises(RuntimeError, match='invalid norm'):
+        _solver(spenv, **{SP_OPT_NORM:'none'})
+    with pytest.raises(RuntimeError, match='does not support norm'):
+        MdrconvSolver(MdrconvProblem([8, 8, 8]), {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_NOBUILD:True,
+                                                   SP_OPT_NORM:SP_NORM_ORTHO})
+
+
+def test_norm_of_legacy_library_is_unknown(spenv, tmp_path):
+    solver = _solver(spenv, **{SP_OPT_NORM:SP_NORM_ORTHO})
+    xform = solver._functionMetadata()
+    xform[SP_KEY_NAMES] = {SP_KEY_EXEC:solver._mainFuncName}
+    def write(xform):
+        path = str(tmp_path / ('lib' + SP_SHLIB_EXT))
+        text = SP_METADATA_START + json.dumps({SP_KEY_TRANSFORMS:[xform]}) + SP_METADATA_END
+        with open(path, 'wb') as f:
+            f.write(b'\0' + text.encode() + b'\0')
+        return path
+    assert solver._functionNorm(write(xform)) == SP_NORM_ORTHO
+    del xform[SP_KEY_NORM]
+    assert solver._functionNorm(write(xform)) == None
+
+
+def test_in_place_variants(spenv, tmp_path):
+    assert 'Inplace(' not in _script(_solver(spenv), tmp_path)
+    solver = _solver(spenv, **{SP_OPT_NORM:SP_NORM_ORTHO, SP_OPT_INPLACE:True})
+    assert solver._variantSuffix() == '_ip_ortho'
+    assert solver._namebase == 'zmddft_fwd_2x2x2_ip_ortho'
+    funcmeta = solver._functionMetadata()
+    assert (funcmeta[SP_KEY_NORM], funcmeta[SP_KEY_INPLACE]) == (SP_NORM_ORTHO, True)
+    assert 'Inplace(' in _script(solver, tmp_path)
+    with pytest.raises(RuntimeError, match='does not support in-place'):
+        MdrconvSolver(MdrconvProblem([8, 8, 8]), {SP_OPT_LIBDIR:spenv.libsDir, SP_OPT_NOBUILD:True,
+                                                   SP_OPT_INPLACE:True})
+    with pytest.raises(RuntimeError, match='in the background'):
+        _solver(spenv, **{SP_OPT_INPLACE:True, SP_OPT_ASYNCBUILD:True})
+
+
+def test_in_place_dst(spenv):
+    solver = _solver(spenv, **{SP_OPT_INPLACE:True})
+    src = np.zeros((2, 2, 2), np.complex128)
+    assert solver._inPlaceDst(src, None) is src
+    assert solver._inPlaceDst(src, src[...]) is src
+    with pytest.raises(RuntimeError, match='dst to be src'):
+        solver._inPlaceDst(src, np.zeros_like(src))
+
+
+@pytest.mark.skipif(shutil.which('cmake') == None or shutil.which('cc') == None,
+                    reason='requires CMake and a C compiler')
+def test_in_place_build(spenv):
+    solver = _solver(spenv, **{SP_OPT_NOBUILD:False, SP_OPT_INPLACE:True, SP_OPT_NORM:SP_NORM_ORTHO})
+    assert solver.isReady()
+    assert 'Inplace(' in spenv.scripts[-1] and 'Scale(' in spenv.scripts[-1]
+    src = np.ones((2, 2, 2), np.complex128)
+    assert solver.solve(src) is src
+    with pytest.raises(RuntimeError):
+        solver.solve(src, np.zeros_like(src))